@@ -3,16 +3,68 @@
 AI Commit - Main Entry Point
 """
 
-import tkinter as tk
-from src.gui.main_window import AICommit
+import sys
+import argparse
+import importlib
 
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="AI Commit")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print per-phase startup timings once the window is shown, then exit")
+    parser.add_argument("--startup-budget", type=float, default=0, metavar="SECONDS",
+                        help="with --profile-startup, exit with status 1 if the window takes longer to show")
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        sys.exit(profile_startup(args.startup_budget))
+
+    import tkinter as tk
+    from src.gui.main_window import AICommit
+
     root = tk.Tk()
     app = AICommit(root)
     root.mainloop()
 
 
+def profile_startup(budget: float = 0) -> int:
+    """Time each startup phase up to the first paint and print the report"""
+    from src.utils.profiling import StartupProfiler, loaded_sdk_modules
+
+    profiler = StartupProfiler()
+    with profiler.phase("import tkinter"):
+        import tkinter as tk
+    with profiler.phase("import core modules"):
+        for module in ("src.core.ai_provider", "src.core.bulk_generator", "src.core.speculative"):
+            importlib.import_module(module)
+    with profiler.phase("import gui modules"):
+        from src.gui.main_window import AICommit
+    with profiler.phase("create Tk root"):
+        root = tk.Tk()
+    with profiler.phase("build main window"):
+        app = AICommit(root)
+    with profiler.phase("first paint"):
+        root.update()
+    window_seconds = profiler.elapsed()
+    early_sdks = loaded_sdk_modules()
+
+    # Normally done in a background thread after the window shows
+    from src.core.ai_provider import SDK_MODULES
+    warmup = app.ai_provider.warmup(list(SDK_MODULES))
+    root.destroy()
+
+    print(profiler.report())
+    print(f"Window shown after {window_seconds * 1000:.1f} ms")
+    print(f"SDKs imported before the window: {', '.join(early_sdks) or 'none'}")
+    for provider, seconds in warmup.items():
+        print(f"Deferred SDK import ({provider}): {seconds * 1000:.1f} ms")
+
+    if budget and window_seconds > budget:
+        print(f"Startup budget exceeded: {window_seconds:.2f}s > {budget:.2f}s", file=sys.stderr)
+        return 1
+    return 0
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark fresh vs. reused OpenAI clients against a local stub server.
+
+Starts an OpenAI-compatible stub on localhost and times N chat completion
+requests twice: once building a new client per request (the old behaviour)
+and once through AIProvider, which keeps a pooled client.
+
+Usage: python scripts/bench_ai_clients.py [--requests 50] [--delay 0.0]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from openai import OpenAI
+
+from src.core.ai_provider import AIProvider
+from src.core.settings_manager import SettingsManager
+from src.core.staged_diff import StagedDiff
+
+COMPLETION = {
+    "id": "chatcmpl-stub",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "stub",
+    "choices": [{
+        "index": 0,
+        "message": {"role": "assistant", "content": "chore: stub response"},
+        "finish_reason": "stop"
+    }],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    delay = 0.0
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        StubHandler.connections += 1
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        if self.delay:
+            time.sleep(self.delay)
+        body = json.dumps(COMPLETION).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_fresh(base_url: str, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        client = OpenAI(api_key="stub", base_url=base_url)
+        client.chat.completions.create(
+            model="stub",
+            messages=[{"role": "user", "content": "diff"}],
+            max_tokens=200,
+            timeout=30
+        )
+        client.close()
+    return time.perf_counter() - start
+
+
+def run_pooled(base_url: str, requests: int) -> float:
+    settings_file = os.path.join(tempfile.mkdtemp(), "settings.json")
+    with open(settings_file, "w", encoding="utf-8") as f:
+        json.dump({}, f)
+    settings_manager = SettingsManager(settings_file)
+    settings_manager.settings.update({
+        "openai_api_key": "stub",
+        "openai_base_url": base_url,
+        "openai_model": "stub",
+        "ai_cache_enabled": False
+    })
+    provider = AIProvider(settings_manager)
+    diff = StagedDiff(text="diff")
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        provider.generate_commit_message(diff, "chatgpt", use_cache=False)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--delay", type=float, default=0.0, help="stub server latency in seconds")
+    args = parser.parse_args()
+
+    StubHandler.delay = args.delay
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    for name, runner in (("fresh client per request", run_fresh), ("pooled client", run_pooled)):
+        StubHandler.connections = 0
+        elapsed = runner(base_url, args.requests)
+        print(f"{name:>26}: {elapsed:.3f}s total, "
+              f"{elapsed / args.requests * 1000:.1f} ms/request, "
+              f"{StubHandler.connections} connection(s)")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
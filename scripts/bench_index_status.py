@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark change detection from .git/index against running git status.
+
+Creates a synthetic repository with many tracked files (plus ignored build
+output) in a temporary directory, then times the "has changes" check both
+ways: spawning `git status --porcelain` as the scan does without the fast
+path, and reading the index with src.core.fast_status. Each case is run
+on a clean tree and again after an untracked file appears, which the fast
+path hands back to git. Indexes above fast_status.DEFAULT_MAX_ENTRIES
+are always left to git, so the large repository measures that fallback;
+pass --files below the limit to time the reader itself. Finally a folder of
+--repos small repositories is scanned with and without the fast path.
+
+Usage: python scripts/bench_index_status.py [--files 20000] [--runs 20] [--repos 200]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core.fast_status import check_worktree
+from src.core.git_manager import GitManager
+
+
+def make_repo(path: str, files: int, per_dir: int = 100, settle: bool = True):
+    """Commit ``files`` small files spread over directories of ``per_dir``.
+
+    With ``settle`` the index is refreshed once past the racy-git window so
+    its stat data is trusted; callers creating many repositories can wait
+    once themselves instead.
+    """
+    subprocess.run(["git", "init", "-q", path], check=True)
+    for index in range(files):
+        directory = os.path.join(path, "src", f"pkg{index // per_dir:04d}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"module{index:06d}.py"), "w", encoding="utf-8") as f:
+            f.write(f"VALUE = {index}\n")
+    with open(os.path.join(path, ".gitignore"), "w", encoding="utf-8") as f:
+        f.write("build/\n*.pyc\n")
+    os.makedirs(os.path.join(path, "build"))
+    for index in range(200):
+        with open(os.path.join(path, "build", f"out{index}.o"), "w", encoding="utf-8") as f:
+            f.write("x\n")
+
+    def git(*args):
+        subprocess.run(["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com", *args],
+                       cwd=path, check=True, stdout=subprocess.DEVNULL)
+
+    git("add", "-A")
+    git("commit", "-q", "-m", "initial")
+    if settle:
+        time.sleep(1.1)
+        git("status", "--porcelain")
+
+
+def time_runs(check, runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        check()
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--repos", type=int, default=200, help="small repositories to scan (0 to skip)")
+    parser.add_argument("--keep", action="store_true", help="keep the synthetic repository")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench-index-")
+    repo = os.path.join(root, "repo")
+    try:
+        start = time.perf_counter()
+        make_repo(repo, args.files)
+        print(f"Synthetic repository: {args.files} files in {time.perf_counter() - start:.1f}s ({repo})")
+
+        git_manager = GitManager()
+        fast_git_manager = GitManager(fast_status=True)
+        for case in ("clean", "untracked file"):
+            if case == "untracked file":
+                with open(os.path.join(repo, "notes.txt"), "w", encoding="utf-8") as f:
+                    f.write("x\n")
+
+            result = check_worktree(repo)
+            expected = git_manager.check_has_changes(repo)
+            git_seconds = time_runs(lambda: git_manager.check_has_changes(repo), args.runs)
+            index_seconds = time_runs(lambda: check_worktree(repo, max_entries=0), args.runs)
+            combined_seconds = time_runs(lambda: fast_git_manager.check_has_changes(repo), args.runs)
+
+            answer = "fallback to git" if result.has_changes is None else result.has_changes
+            print(f"\n{case}: git status says {expected}, index reader says {answer} ({result.reason})")
+            print(f"{'git status subprocess':>24}: {git_seconds * 1000:8.1f} ms/check")
+            print(f"{'index reader (no limit)':>24}: {index_seconds * 1000:8.1f} ms/check")
+            print(f"{'index reader + fallback':>24}: {combined_seconds * 1000:8.1f} ms/check "
+                  f"({git_seconds / combined_seconds:.1f}x)")
+
+        if args.repos:
+            folder = os.path.join(root, "many")
+            os.makedirs(folder)
+            start = time.perf_counter()
+            for index in range(args.repos):
+                make_repo(os.path.join(folder, f"repo{index:04d}"), 50, settle=False)
+            time.sleep(1.1)
+            print(f"\nScan of {args.repos} repositories with 50 files each "
+                  f"(created in {time.perf_counter() - start:.1f}s)")
+            git_seconds = time_runs(lambda: git_manager.scan_repositories(folder), 3)
+            fast_seconds = time_runs(lambda: fast_git_manager.scan_repositories(folder), 3)
+            print(f"{'git status subprocess':>24}: {git_seconds * 1000:8.1f} ms/scan")
+            print(f"{'index reader + fallback':>24}: {fast_seconds * 1000:8.1f} ms/scan "
+                  f"({git_seconds / fast_seconds:.1f}x)")
+    finally:
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
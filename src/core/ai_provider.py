@@ -3,88 +3,886 @@ AI Provider for generating commit messages using Gemini and OpenAI
 """
 
 import os
-from typing import Optional
+import re
+import time
+import queue
+import importlib
+import importlib.util
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Optional, Dict, Tuple, Any, Callable, List
 
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
+from src.core.git_status import display_path
+from src.core.heuristic_generator import generate_heuristic_message
+from src.core.metrics import MetricsRecorder, RequestRecord
+from src.core.model_catalog import PromptBudget, estimate_tokens, get_capabilities, plan_prompt_budget
+from src.core.rate_limiter import RequestScheduler, RequestCancelled
+from src.core.response_cache import ResponseCache
+from src.core.settings_manager import SettingsManager
+from src.core.staged_diff import StagedDiff, FileStat
 
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
 
-from src.core.settings_manager import SettingsManager
+# Bump whenever the prompts change so cached responses are not reused
+PROMPT_TEMPLATE_VERSION = "2"
+
+SYSTEM_PROMPT = (
+    "You are a helpful assistant that generates clear and concise git commit "
+    "messages following conventional commits format."
+)
+
+COMMIT_FORMAT_INSTRUCTIONS = """Format: <type>(<scope>): <subject>
+
+Types: feat, fix, docs, style, refactor, test, chore
+Use English, be concise. Return only the commit message."""
+
+
+def build_commit_prompt(diff: str) -> str:
+    """Prompt asking for a commit message for the given diff"""
+    return f"""Generate a clear commit message following conventional commits format.
+
+Git diff:
+{diff}
+
+{COMMIT_FORMAT_INSTRUCTIONS}"""
+
+
+# Bump whenever the per-chunk summary prompt changes
+MAP_TEMPLATE_VERSION = "1"
+
+MAP_PROMPT_TEMPLATE = """Summarize the following part of a larger git diff in 1 to 3 short bullet points.
+Describe what changed and why if it is apparent. Do not write a commit message.
+
+Git diff:
+{diff}"""
+
+
+def build_reduce_prompt(summaries: List[str], other_files: str = "", note: str = "") -> str:
+    """Prompt asking for one commit message from per-file change summaries"""
+    sections = "\n\n".join(summaries)
+    extra = "\n\n".join(part for part in (other_files, note) if part)
+    if extra:
+        sections = f"{sections}\n\n{extra}"
+    return f"""Generate a clear commit message following conventional commits format.
+The diff was too large to show, so these are summaries of the changes in each file.
+
+Change summaries:
+{sections}
+
+{COMMIT_FORMAT_INSTRUCTIONS}"""
+
+
+# Bump whenever the multi-answer prompt changes
+CANDIDATES_TEMPLATE_VERSION = "1"
+
+CANDIDATE_SEPARATOR = "---"
+
+CANDIDATES_INSTRUCTIONS = """Write {count} alternative commit messages for these changes, each taking a
+different angle or level of detail. Separate the messages with a line containing only {separator}
+and write nothing else."""
+
+# Separator lines and list numbering the model may add in a multi-answer reply
+_SEPARATOR_LINE = re.compile(r"^\s*-{3,}\s*$", re.MULTILINE)
+_LEADING_NUMBER = re.compile(r"^\s*(?:\d+[.)]|#\d+:?)\s+")
+
+
+def build_candidates_prompt(prompt: str, count: int) -> str:
+    """Ask for ``count`` messages in one reply, for models without native candidates"""
+    instructions = CANDIDATES_INSTRUCTIONS.format(count=count, separator=CANDIDATE_SEPARATOR)
+    return f"{prompt}\n\n{instructions}"
+
+
+def split_candidates(text: str) -> List[str]:
+    """Split a multi-answer reply into individual messages"""
+    return [_LEADING_NUMBER.sub("", part.strip(), count=1) for part in _SEPARATOR_LINE.split(text)
+            if part.strip()]
+
+
+def unique_messages(messages: List[str]) -> List[str]:
+    """Drop empty and repeated messages, keeping the first occurrence"""
+    seen = set()
+    unique = []
+    for message in messages:
+        message = message.strip()
+        if message and message not in seen:
+            seen.add(message)
+            unique.append(message)
+    return unique
+
+
+def _is_invalid_request(error: BaseException) -> bool:
+    """Whether the provider rejected the request itself (e.g. an unsupported option)"""
+    for attr in ("status_code", "code"):
+        status = getattr(error, attr, None)
+        if isinstance(status, int) and not isinstance(status, bool):
+            return status == 400
+    return any(cls.__name__ in ("BadRequestError", "InvalidArgument") for cls in type(error).__mro__)
+
+
+# Provider SDKs, imported on first use (or by ``AIProvider.warmup``) rather
+# than at startup, since importing them takes longer than building the window
+SDK_MODULES = {
+    "gemini": "google.generativeai",
+    "chatgpt": "openai"
+}
+
+SDK_INSTALL_HINTS = {
+    "gemini": "google-generativeai not installed. Install with: pip install google-generativeai",
+    "chatgpt": "openai not installed. Install with: pip install openai"
+}
+
+
+@lru_cache(maxsize=None)
+def sdk_available(provider: str) -> bool:
+    """Whether the provider's SDK is installed, without importing it"""
+    name = SDK_MODULES.get(provider)
+    if name is None:
+        return False
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def load_sdk(provider: str) -> Any:
+    """Import the provider's SDK module, raising ImportError with an install hint"""
+    try:
+        return importlib.import_module(SDK_MODULES[provider])
+    except ImportError as e:
+        raise ImportError(SDK_INSTALL_HINTS[provider]) from e
+
+
+class GenerationCancelled(Exception):
+    """Raised when an in-flight generation is cancelled"""
+
+
+# Settings that make existing provider clients stale
+CLIENT_SETTINGS = ("gemini_api_key", "openai_api_key", "openai_base_url")
+
+# Settings holding each provider's requests and tokens per minute
+RATE_LIMIT_SETTINGS = {
+    "gemini": ("gemini_rpm", "gemini_tpm"),
+    "chatgpt": ("openai_rpm", "openai_tpm")
+}
+
+# Local provider that derives the message from file paths and line counts
+OFFLINE_PROVIDER = "offline"
+
+# Hedging modes: one provider only, start the other provider after
+# ``hedge_delay`` seconds, or start both at once
+HEDGE_MODES = ("off", "hedge", "race")
+
+# The provider used to hedge each provider
+HEDGE_PARTNERS = {"gemini": "chatgpt", "chatgpt": "gemini"}
 
 
 class AIProvider:
-    def __init__(self, settings_manager: SettingsManager):
+    def __init__(self, settings_manager: SettingsManager,
+                 response_cache: Optional[ResponseCache] = None,
+                 metrics: Optional[MetricsRecorder] = None):
         self.settings_manager = settings_manager
+        self.response_cache = response_cache
+        self.metrics = metrics
+        
+        # Long-lived clients keyed by (provider, api key, model/base url), so
+        # repeated generations reuse pooled HTTP connections
+        self._clients: Dict[Tuple[str, str, str], Any] = {}
+        self._clients_lock = threading.Lock()
+        self._gemini_configured_key = None
+        
+        # (provider, model) pairs that ignored or rejected native multi-candidate requests
+        self._single_candidate_models = set()
+        
+        # Shared by every request so concurrent generations respect the limits
+        self.scheduler = RequestScheduler(max_retries=self.settings_manager.get("ai_max_retries", 4))
+        for provider in RATE_LIMIT_SETTINGS:
+            self._apply_rate_limits(provider)
+        self.settings_manager.add_listener(self._on_setting_changed)
+    
+    def _on_setting_changed(self, key: str, value: Any):
+        if key in CLIENT_SETTINGS:
+            self.invalidate_clients()
+        elif key == "ai_max_retries":
+            self.scheduler.max_retries = value
+        for provider, keys in RATE_LIMIT_SETTINGS.items():
+            if key in keys:
+                self._apply_rate_limits(provider)
     
-    def generate_commit_message(self, diff: str, provider: str) -> str:
-        """Generate commit message using AI"""
-        diff_truncated = diff[:3000] if len(diff) > 3000 else diff
+    def _apply_rate_limits(self, provider: str):
+        rpm_key, tpm_key = RATE_LIMIT_SETTINGS[provider]
+        self.scheduler.set_limits(
+            provider,
+            requests_per_minute=self.settings_manager.get(rpm_key, 0),
+            tokens_per_minute=self.settings_manager.get(tpm_key, 0)
+        )
+    
+    def invalidate_clients(self):
+        """Drop cached provider clients, closing their connection pools"""
+        with self._clients_lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._gemini_configured_key = None
         
+        for client in clients:
+            close = getattr(client, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except Exception:
+                    pass
+    
+    def _get_openai_client(self, api_key: str) -> Any:
+        """Get a pooled OpenAI client for the api key and base url"""
+        base_url = self.settings_manager.get("openai_base_url", "") or None
+        key = ("chatgpt", api_key, base_url or "")
+        with self._clients_lock:
+            client = self._clients.get(key)
+            if client is None:
+                # Retries are handled by the request scheduler
+                client = load_sdk("chatgpt").OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+                self._clients[key] = client
+            return client
+    
+    def _get_gemini_model(self, api_key: str, model_name: str) -> Any:
+        """Get a cached Gemini model, configuring the SDK once per api key"""
+        key = ("gemini", api_key, model_name)
+        with self._clients_lock:
+            model = self._clients.get(key)
+            if model is None:
+                genai = load_sdk("gemini")
+                if self._gemini_configured_key != api_key:
+                    genai.configure(api_key=api_key)
+                    self._gemini_configured_key = api_key
+                model = genai.GenerativeModel(model_name)
+                self._clients[key] = model
+            return model
+    
+    def get_model_name(self, provider: str) -> str:
+        """Get the configured model for a provider"""
         if provider == "gemini":
-            return self._generate_with_gemini(diff_truncated)
-        else:  # chatgpt
-            return self._generate_with_openai(diff_truncated)
+            return self.settings_manager.get("gemini_model", "gemini-2.5-flash")
+        if provider == OFFLINE_PROVIDER:
+            return "heuristic"
+        return self.settings_manager.get("openai_model", "gpt-4o-mini")
+    
+    def plan_budget(self, provider: str) -> PromptBudget:
+        """Prompt and output budget for the provider's configured model.
+
+        By default (``prompt_budget_mode`` ``fixed``) the diff is limited to
+        ``diff_max_bytes`` regardless of the model; ``model`` sizes it from
+        the model's context window instead.
+        """
+        model_name = self.get_model_name(provider)
+        budget = plan_prompt_budget(
+            model_name,
+            fraction=self.settings_manager.get("context_fraction", 0.1),
+            overhead_tokens=estimate_tokens(SYSTEM_PROMPT + build_commit_prompt("")),
+            max_prompt_tokens=self.settings_manager.get("max_prompt_tokens", 0)
+        )
+        if self.settings_manager.get("prompt_budget_mode", "fixed") == "fixed":
+            max_bytes = self.settings_manager.get("diff_max_bytes", 3000)
+            budget = PromptBudget(model_name, 0, max_bytes, budget.max_output_tokens)
+        return budget
+    
+    def _prompt_diff(self, diff: StagedDiff) -> str:
+        """Diff text as sent to the model, including the omission note"""
+        note = diff.omitted_note()
+        return f"{diff.text}\n\n{note}" if note else diff.text
+    
+    def _cache_key(self, diff: StagedDiff, provider: str) -> str:
+        return self.response_cache.make_key(
+            self._prompt_diff(diff), provider, self.get_model_name(provider), PROMPT_TEMPLATE_VERSION
+        )
+    
+    def get_cached_message(self, diff: StagedDiff, provider: str) -> Optional[str]:
+        """Return a previously generated message for the same diff, if any"""
+        if self.response_cache is None:
+            return None
+        cached = self.response_cache.get(self._cache_key(diff, provider))
+        if cached is not None:
+            self._record_cache_hit(provider, "message", self._prompt_diff(diff), cached)
+        return cached
+    
+    def _candidates_key(self, diff: StagedDiff, provider: str) -> str:
+        return self.response_cache.make_key(
+            self._prompt_diff(diff), provider, self.get_model_name(provider),
+            f"{PROMPT_TEMPLATE_VERSION}-candidates-{CANDIDATES_TEMPLATE_VERSION}"
+        )
+    
+    def get_cached_candidates(self, diff: StagedDiff, provider: str, count: int) -> Optional[List[str]]:
+        """Return a cached set of at least ``count`` messages for the same diff, if any"""
+        if self.response_cache is None:
+            return None
+        if count <= 1:
+            cached = self.get_cached_message(diff, provider)
+            return [cached] if cached is not None else None
+        cached = self.response_cache.get(self._candidates_key(diff, provider))
+        if not isinstance(cached, list) or len(cached) < count:
+            return None
+        self._record_cache_hit(provider, "candidates", self._prompt_diff(diff), "\n".join(cached[:count]))
+        return cached[:count]
+    
+    def _record(self, provider: str, kind: str, prompt: str, prompt_tokens: Optional[int] = None,
+                start: Optional[float] = None, output: str = "", ttft: Optional[float] = None,
+                retries: int = 0, status: str = "ok", error: str = "", cache_hit: bool = False):
+        """Pass one request to the metrics recorder, if any"""
+        if self.metrics is None:
+            return
+        if prompt_tokens is None:
+            prompt_tokens = estimate_tokens(SYSTEM_PROMPT + prompt)
+        self.metrics.record(RequestRecord(
+            provider=provider,
+            model=self.get_model_name(provider),
+            kind=kind,
+            prompt_bytes=len(prompt.encode('utf-8', errors='replace')),
+            prompt_tokens=prompt_tokens,
+            output_tokens=estimate_tokens(output),
+            ttft=ttft,
+            latency=time.monotonic() - start if start is not None else 0.0,
+            retries=retries,
+            cache_hit=cache_hit,
+            status=status,
+            error=error
+        ))
+    
+    def _record_cache_hit(self, provider: str, kind: str, prompt: str, output: str):
+        if self.metrics is not None:
+            self._record(provider, kind, prompt, output=output, cache_hit=True)
+    
+    def metrics_summary(self) -> Dict[Tuple[str, str, str], Dict[str, Optional[float]]]:
+        """Latency percentiles and counters per provider, model and request kind"""
+        if self.metrics is None:
+            return {}
+        return self.metrics.summary()
     
-    def _generate_with_gemini(self, diff: str) -> str:
-        """Generate commit message using Gemini"""
-        if not GEMINI_AVAILABLE:
-            raise ImportError("google-generativeai not installed. Install with: pip install google-generativeai")
+    def scheduler_stats(self) -> Dict[str, float]:
+        """Retry and rate limit counters for monitoring"""
+        return self.scheduler.stats()
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """Response cache counters for monitoring"""
+        if self.response_cache is None:
+            return {}
+        return self.response_cache.stats()
+    
+    def generate_commit_message(self, diff: StagedDiff, provider: str, use_cache: bool = True,
+                                on_token: Optional[Callable[[str], None]] = None,
+                                cancel_event: Optional[threading.Event] = None,
+                                on_progress: Optional[Callable[[int, int], None]] = None,
+                                on_hedge_result: Optional[Callable[[str, Dict[str, Dict[str, Any]]], None]] = None) -> str:
+        """Generate commit message using AI.
+
+        With ``use_cache`` a cached response for the same diff, provider,
+        model and prompt version is returned without calling the provider.
+        Fresh responses are always written to the cache. When ``on_token`` is
+        given the response is streamed and each text fragment is passed to
+        it as it arrives; setting ``cancel_event`` aborts the request with
+        ``GenerationCancelled``.
+
+        A diff split into ``chunks`` is summarized chunk by chunk first and
+        the summaries are combined into one message; ``on_progress`` receives
+        ``(done, total)`` as chunk summaries complete.
+
+        With ``hedge_mode`` set, the other provider is asked as well and the
+        first to respond wins; ``on_hedge_result`` receives the winner and
+        the per-provider timings (see ``_complete_hedged``).
+
+        The ``offline`` provider returns a heuristic message at once, without
+        the cache or any network request.
+        """
+        if provider == OFFLINE_PROVIDER:
+            return self.generate_offline_message(diff)
         
-        api_key = self.settings_manager.get("gemini_api_key")
-        if not api_key:
-            raise ValueError("Gemini API Key not set. Please configure in Settings.")
+        if use_cache:
+            cached = self.get_cached_message(diff, provider)
+            if cached is not None:
+                return cached
         
-        genai.configure(api_key=api_key)
-        model_name = self.settings_manager.get("gemini_model", "gemini-2.5-flash")
-        model = genai.GenerativeModel(model_name)
+        prompt = self._message_prompt(diff, provider, cancel_event, on_progress)
+        winner, message = self._complete_hedged(provider, prompt, on_token=on_token, cancel_event=cancel_event,
+                                                on_hedge_result=on_hedge_result)
         
-        prompt = f"""Generate a clear commit message following conventional commits format.
+        # Keyed on the provider that answered, so a hedge partner's message
+        # is never served as the primary provider's
+        if self.response_cache is not None and message:
+            self.response_cache.put(self._cache_key(diff, winner), message)
+        return message
+    
+    def generate_candidates(self, diff: StagedDiff, provider: str, count: Optional[int] = None,
+                            use_cache: bool = True,
+                            cancel_event: Optional[threading.Event] = None,
+                            on_progress: Optional[Callable[[int, int], None]] = None) -> List[str]:
+        """Generate up to ``count`` alternative commit messages in one request.
 
-Git diff:
-{diff}
+        ``count`` defaults to the ``candidate_count`` setting. OpenAI is asked
+        for ``n`` choices and Gemini for ``candidate_count`` candidates; models
+        that reject or ignore those get a single prompt asking for several
+        messages instead. Duplicates are dropped, so fewer than ``count``
+        messages may come back. The whole set is cached for the diff, and
+        with ``count`` of 1 this is ``generate_commit_message``.
+        """
+        if count is None:
+            count = self.settings_manager.get("candidate_count", 1)
+        if count <= 1 or provider == OFFLINE_PROVIDER:
+            return [self.generate_commit_message(diff, provider, use_cache=use_cache,
+                                                 cancel_event=cancel_event, on_progress=on_progress)]
+        
+        if use_cache:
+            cached = self.get_cached_candidates(diff, provider, count)
+            if cached is not None:
+                return cached
+        
+        prompt = self._message_prompt(diff, provider, cancel_event, on_progress)
+        messages = self._complete_candidates(provider, prompt, count, cancel_event)
+        
+        if self.response_cache is not None and messages:
+            self.response_cache.put(self._candidates_key(diff, provider), messages)
+            self.response_cache.put(self._cache_key(diff, provider), messages[0])
+        return messages
+    
+    def generate_offline_message(self, diff: StagedDiff) -> str:
+        """Heuristic message from the diff's file stats; instant and deterministic"""
+        stats = diff.stats or [FileStat(path=path) for path in diff.files]
+        # File names in the message may carry bytes that are not valid UTF-8
+        return display_path(generate_heuristic_message(stats))
+    
+    def _message_prompt(self, diff: StagedDiff, provider: str,
+                        cancel_event: Optional[threading.Event] = None,
+                        on_progress: Optional[Callable[[int, int], None]] = None) -> str:
+        """Prompt for the final message, summarizing the chunks of a large diff first"""
+        if diff.chunks:
+            return self._reduce_prompt(diff, provider, cancel_event, on_progress)
+        return build_commit_prompt(self._prompt_diff(diff))
+    
+    def _reduce_prompt(self, diff: StagedDiff, provider: str,
+                       cancel_event: Optional[threading.Event] = None,
+                       on_progress: Optional[Callable[[int, int], None]] = None) -> str:
+        """Summarize each chunk concurrently and build the prompt combining the summaries"""
+        total = len(diff.chunks)
+        summaries: List[Optional[str]] = [None] * total
+        workers = max(1, min(int(self.settings_manager.get("map_concurrency", 4)), total))
+        
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="map-summary")
+        try:
+            futures = {
+                executor.submit(self._summarize_chunk, chunk, provider, cancel_event): index
+                for index, chunk in enumerate(diff.chunks)
+            }
+            done = 0
+            for future in as_completed(futures):
+                summaries[futures[future]] = future.result()
+                done += 1
+                if on_progress is not None:
+                    on_progress(done, total)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        if cancel_event is not None and cancel_event.is_set():
+            raise GenerationCancelled("Generation cancelled")
+        
+        return build_reduce_prompt(
+            [summary for summary in summaries if summary], diff.summary, diff.omitted_note()
+        )
+    
+    def _summarize_chunk(self, chunk: str, provider: str,
+                         cancel_event: Optional[threading.Event] = None) -> str:
+        """Summarize one diff chunk, reusing cached summaries of identical chunks"""
+        if cancel_event is not None and cancel_event.is_set():
+            raise GenerationCancelled("Generation cancelled")
+        
+        key = None
+        if self.response_cache is not None:
+            key = self.response_cache.make_key(
+                chunk, provider, self.get_model_name(provider), f"map-{MAP_TEMPLATE_VERSION}"
+            )
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                self._record_cache_hit(provider, "summary", chunk, cached)
+                return cached
+        
+        summary = self._complete(provider, MAP_PROMPT_TEMPLATE.format(diff=chunk),
+                                 cancel_event=cancel_event, kind="summary")
+        if key is not None and summary:
+            self.response_cache.put(key, summary)
+        return summary
+    
+    def is_provider_ready(self, provider: str) -> bool:
+        """Whether the provider's SDK is installed and its API key is set"""
+        if provider == OFFLINE_PROVIDER:
+            return True
+        if provider == "gemini":
+            return sdk_available("gemini") and bool(self.settings_manager.get("gemini_api_key"))
+        return sdk_available("chatgpt") and bool(self.settings_manager.get("openai_api_key"))
+    
+    def warmup(self, providers: Optional[List[str]] = None) -> Dict[str, float]:
+        """Import provider SDKs ahead of the first request.
 
-Format: <type>(<scope>): <subject>
+        Defaults to the providers that are ready to use. Meant to run in a
+        background thread once the window is shown; returns the seconds spent
+        importing each SDK, skipping failures.
+        """
+        if providers is None:
+            providers = [provider for provider in SDK_MODULES if self.is_provider_ready(provider)]
+        timings = {}
+        for provider in providers:
+            start = time.perf_counter()
+            try:
+                load_sdk(provider)
+            except Exception:
+                continue
+            timings[provider] = time.perf_counter() - start
+        return timings
+    
+    def _complete_hedged(self, provider: str, prompt: str, max_tokens: Optional[int] = None,
+                         on_token: Optional[Callable[[str], None]] = None,
+                         cancel_event: Optional[threading.Event] = None,
+                         on_hedge_result: Optional[Callable[[str, Dict[str, Dict[str, Any]]], None]] = None) -> Tuple[str, str]:
+        """Send a prompt to ``provider`` and, when hedging, to its partner too.
 
-Types: feat, fix, docs, style, refactor, test, chore
-Use English, be concise. Return only the commit message."""
+        Returns ``(winner, text)``, where ``winner`` is the provider whose
+        response was used.
+
+        Both attempts stream; the first to deliver text wins and the other is
+        cancelled. If an attempt fails before any winner is chosen, the other
+        one carries on (and is started at once if still waiting on the hedge
+        delay). ``on_hedge_result`` gets the winner and, per provider, the
+        ``status`` (won, cancelled, failed or not started) with
+        ``first_token`` and ``total`` latencies in seconds where known.
+        """
+        mode = self.settings_manager.get("hedge_mode", "off")
+        partner = HEDGE_PARTNERS.get(provider)
+        if mode not in ("hedge", "race") or not partner or not self.is_provider_ready(partner):
+            return provider, self._complete(provider, prompt, max_tokens, on_token, cancel_event)
+        
+        delay = 0.0 if mode == "race" else max(0.0, float(self.settings_manager.get("hedge_delay", 2.0)))
+        order = [provider, partner]
+        attempt_events = {name: threading.Event() for name in order}
+        report = {name: {"status": "not started", "first_token": None, "total": None} for name in order}
+        results = queue.Queue()
+        lock = threading.Lock()
+        state = {"winner": None}
+        start = time.monotonic()
+        
+        def claim(name: str) -> bool:
+            """Make ``name`` the winner if there is none yet (lock held)"""
+            if state["winner"] is None:
+                state["winner"] = name
+                for other in order:
+                    if other != name:
+                        attempt_events[other].set()
+            return state["winner"] == name
+        
+        def run(name: str):
+            def on_attempt_token(text: str):
+                with lock:
+                    if report[name]["first_token"] is None:
+                        report[name]["first_token"] = time.monotonic() - start
+                    won = claim(name)
+                if not won:
+                    raise GenerationCancelled("Lost the hedged race")
+                if on_token is not None:
+                    on_token(text)
+            
+            try:
+                text = self._complete(name, prompt, max_tokens, on_attempt_token, attempt_events[name])
+                results.put((name, text, None))
+            except Exception as e:
+                results.put((name, None, e))
+        
+        def launch(name: str):
+            report[name]["status"] = "running"
+            thread = threading.Thread(target=run, args=(name,), daemon=True, name=f"hedge-{name}")
+            thread.start()
         
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        launch(provider)
+        pending = {provider}
+        errors = {}
+        try:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise GenerationCancelled("Generation cancelled")
+                
+                if report[partner]["status"] == "not started" and state["winner"] is None:
+                    wait = delay - (time.monotonic() - start)
+                    if wait <= 0 or not pending:
+                        launch(partner)
+                        pending.add(partner)
+                        continue
+                    timeout = min(wait, 0.1)
+                elif not pending:
+                    break
+                else:
+                    timeout = 0.1
+                
+                try:
+                    name, text, error = results.get(timeout=timeout)
+                except queue.Empty:
+                    continue
+                pending.discard(name)
+                report[name]["total"] = time.monotonic() - start
+                
+                if error is None and text:
+                    with lock:
+                        won = claim(name)
+                    if won:
+                        report[name]["status"] = "won"
+                        return name, text
+                    report[name]["status"] = "cancelled"
+                elif isinstance(error, GenerationCancelled) and attempt_events[name].is_set():
+                    report[name]["status"] = "cancelled"
+                else:
+                    report[name]["status"] = "failed"
+                    errors[name] = error or ValueError(f"{name} returned an empty response")
+                    if state["winner"] == name:
+                        # Failed mid-stream after winning; the partner was already cancelled
+                        raise errors[name]
+            
+            # Every attempt failed; report the primary provider's error
+            raise errors.get(provider) or next(iter(errors.values()))
+        finally:
+            for event in attempt_events.values():
+                if state["winner"] is None or event is not attempt_events.get(state["winner"]):
+                    event.set()
+            for name in pending:
+                if name != state["winner"]:
+                    report[name]["status"] = "cancelled"
+                    report[name]["total"] = time.monotonic() - start
+            if on_hedge_result is not None:
+                on_hedge_result(state["winner"] or "", report)
+    
+    def _complete(self, provider: str, prompt: str, max_tokens: Optional[int] = None,
+                  on_token: Optional[Callable[[str], None]] = None,
+                  cancel_event: Optional[threading.Event] = None,
+                  kind: str = "message") -> str:
+        """Send a prompt to a provider and return the stripped response text.
+
+        The request waits its turn in the scheduler and is retried on rate
+        limits and transient errors, unless streamed text was already passed
+        to ``on_token``. ``max_tokens`` defaults to the output budget of
+        the provider's model. Every request is recorded in the metrics as
+        ``kind``, whether it succeeds, fails or is cancelled.
+        """
+        if max_tokens is None:
+            max_tokens = self.plan_budget(provider).max_output_tokens
+        prompt_tokens = estimate_tokens(SYSTEM_PROMPT + prompt)
+        start = time.monotonic()
+        streamed = []
+        retries = []
+        
+        def forward(text: str):
+            if not streamed:
+                streamed.append(time.monotonic() - start)
+            on_token(text)
+        
+        def call() -> str:
+            token_callback = forward if on_token is not None else None
+            if provider == "gemini":
+                return self._generate_with_gemini(prompt, token_callback, cancel_event)
+            return self._generate_with_openai(prompt, max_tokens, token_callback, cancel_event)
+        
+        text, status, error = "", "cancelled", ""
+        try:
+            text = self.scheduler.run(
+                provider, call,
+                tokens=prompt_tokens + max_tokens,
+                cancel_event=cancel_event,
+                can_retry=lambda: not streamed,
+                on_retry=lambda e, delay: retries.append(delay)
+            )
+            if cancel_event is not None and cancel_event.is_set():
+                raise GenerationCancelled("Generation cancelled")
+            status = "ok"
+        except RequestCancelled:
+            raise GenerationCancelled("Generation cancelled")
+        except Exception as e:
+            if not isinstance(e, GenerationCancelled):
+                status, error = "error", str(e)
+            raise
+        finally:
+            self._record(provider, kind, prompt, prompt_tokens, start, text,
+                         ttft=streamed[0] if streamed else None, retries=len(retries),
+                         status=status, error=error)
+        return text.strip()
+    
+    def _complete_candidates(self, provider: str, prompt: str, count: int,
+                             cancel_event: Optional[threading.Event] = None) -> List[str]:
+        """Ask one provider for ``count`` messages in a single round trip.
+
+        Native multi-candidate requests are tried first; a model that rejects
+        them or returns a single candidate is remembered and asked with the
+        multi-answer prompt from then on.
+        """
+        max_tokens = self.plan_budget(provider).max_output_tokens
+        model_key = (provider, self.get_model_name(provider))
+        
+        if model_key not in self._single_candidate_models:
+            def call_native() -> List[str]:
+                if provider == "gemini":
+                    return self._candidates_with_gemini(prompt, count, max_tokens)
+                return self._candidates_with_openai(prompt, count, max_tokens)
+            
+            prompt_tokens = estimate_tokens(SYSTEM_PROMPT + prompt)
+            start = time.monotonic()
+            retries = []
+            messages, status, error = [], "cancelled", ""
+            try:
+                messages = self.scheduler.run(
+                    provider, call_native,
+                    tokens=prompt_tokens + max_tokens * count,
+                    cancel_event=cancel_event,
+                    on_retry=lambda e, delay: retries.append(delay)
+                )
+                status = "ok"
+            except RequestCancelled:
+                raise GenerationCancelled("Generation cancelled")
+            except Exception as e:
+                status, error = "error", str(e)
+                if not _is_invalid_request(e):
+                    raise
+            finally:
+                self._record(provider, "candidates", prompt, prompt_tokens, start, "\n".join(messages),
+                             retries=len(retries), status=status, error=error)
+            
+            if cancel_event is not None and cancel_event.is_set():
+                raise GenerationCancelled("Generation cancelled")
+            unique = unique_messages(messages)
+            if len(messages) >= count and unique:
+                return unique
+            self._single_candidate_models.add(model_key)
+        
+        reply = self._complete(provider, build_candidates_prompt(prompt, count),
+                               max_tokens=max_tokens * count, cancel_event=cancel_event, kind="candidates")
+        return unique_messages(split_candidates(reply))[:count]
+    
+    def _generate_with_gemini(self, prompt: str,
+                              on_token: Optional[Callable[[str], None]] = None,
+                              cancel_event: Optional[threading.Event] = None) -> str:
+        """Generate text using Gemini"""
+        load_sdk("gemini")
+        
+        api_key = self.settings_manager.get("gemini_api_key")
+        if not api_key:
+            raise ValueError("Gemini API Key not set. Please configure in Settings.")
+        
+        model = self._get_gemini_model(api_key, self.get_model_name("gemini"))
+        
+        if on_token is None:
+            response = model.generate_content(prompt)
+            return response.text
+        
+        parts = []
+        response = model.generate_content(prompt, stream=True)
+        for chunk in response:
+            if cancel_event is not None and cancel_event.is_set():
+                # Stop consuming the stream; the SDK drops the connection
+                raise GenerationCancelled("Generation cancelled")
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. safety metadata)
+                continue
+            if text:
+                parts.append(text)
+                on_token(text)
+        return "".join(parts)
+    
+    def _generate_with_openai(self, prompt: str, max_tokens: int = 200,
+                              on_token: Optional[Callable[[str], None]] = None,
+                              cancel_event: Optional[threading.Event] = None) -> str:
+        """Generate text using OpenAI"""
+        load_sdk("chatgpt")
+        
+        api_key = self.settings_manager.get("openai_api_key")
+        if not api_key:
+            raise ValueError("OpenAI API Key not set. Please configure in Settings.")
+        
+        client = self._get_openai_client(api_key)
+        model_name = self.get_model_name("chatgpt")
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        
+        # Reasoning models reject temperature and max_tokens
+        if get_capabilities(model_name).reasoning:
+            options = {"max_completion_tokens": max_tokens}
+        else:
+            options = {"temperature": 0.7, "max_tokens": max_tokens}
+        
+        if on_token is None:
+            response = client.chat.completions.create(
+                model=model_name,
+                messages=messages,
+                timeout=30,
+                **options
+            )
+            return response.choices[0].message.content or ""
+        
+        parts = []
+        stream = client.chat.completions.create(
+            model=model_name,
+            messages=messages,
+            timeout=30,
+            stream=True,
+            **options
+        )
+        try:
+            for chunk in stream:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise GenerationCancelled("Generation cancelled")
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if text:
+                    parts.append(text)
+                    on_token(text)
+        finally:
+            # Closes the HTTP response, aborting the request when cancelled
+            stream.close()
+        return "".join(parts)
+    
+    def _candidates_with_gemini(self, prompt: str, count: int, max_tokens: int = 200) -> List[str]:
+        """Generate ``count`` candidates in one Gemini request"""
+        genai = load_sdk("gemini")
+        
+        api_key = self.settings_manager.get("gemini_api_key")
+        if not api_key:
+            raise ValueError("Gemini API Key not set. Please configure in Settings.")
+        
+        model = self._get_gemini_model(api_key, self.get_model_name("gemini"))
+        response = model.generate_content(
+            prompt,
+            generation_config=genai.GenerationConfig(candidate_count=count, max_output_tokens=max_tokens)
+        )
+        messages = []
+        for candidate in response.candidates:
+            parts = getattr(candidate.content, "parts", None) or []
+            messages.append("".join(getattr(part, "text", "") for part in parts))
+        return messages
     
-    def _generate_with_openai(self, diff: str) -> str:
-        """Generate commit message using OpenAI"""
-        if not OPENAI_AVAILABLE:
-            raise ImportError("openai not installed. Install with: pip install openai")
+    def _candidates_with_openai(self, prompt: str, count: int, max_tokens: int = 200) -> List[str]:
+        """Generate ``count`` choices in one OpenAI request"""
+        load_sdk("chatgpt")
         
         api_key = self.settings_manager.get("openai_api_key")
         if not api_key:
             raise ValueError("OpenAI API Key not set. Please configure in Settings.")
         
-        client = OpenAI(api_key=api_key)
-        model_name = self.settings_manager.get("openai_model", "gpt-4o-mini")
+        client = self._get_openai_client(api_key)
+        model_name = self.get_model_name("chatgpt")
+        if get_capabilities(model_name).reasoning:
+            options = {"max_completion_tokens": max_tokens}
+        else:
+            options = {"temperature": 0.9, "max_tokens": max_tokens}
         
         response = client.chat.completions.create(
             model=model_name,
             messages=[
-                {
-                    "role": "system", 
-                    "content": "You are a helpful assistant that generates clear and concise git commit messages following conventional commits format."
-                },
-                {
-                    "role": "user", 
-                    "content": f"Generate a commit message for the following changes:\n\n{diff}\n\nFormat: <type>(<scope>): <subject>\n\nTypes: feat, fix, docs, style, refactor, test, chore\nUse English, be concise. Return only the commit message."
-                }
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
             ],
-            temperature=0.7,
-            max_tokens=200,
-            timeout=30
+            n=count,
+            timeout=30,
+            **options
         )
-        return response.choices[0].message.content.strip()
\ No newline at end of file
+        return [choice.message.content or "" for choice in response.choices]
@@ -0,0 +1,278 @@
+"""
+Asyncio git backend for work across many repositories
+"""
+
+import os
+import asyncio
+import threading
+import weakref
+from typing import Optional, List, Tuple, Dict, Any, Callable, Iterable
+
+from src.core.fast_status import quick_has_changes
+from src.core.git_manager import GitManager, GIT_TIMEOUT, CANCEL_POLL_INTERVAL, LOCK_RETRIES, LOCK_RETRY_DELAY
+from src.core.repo_locks import RepoLockRegistry
+from src.core.status_cache import StatusCache
+
+# Git processes allowed to run at once on one event loop
+DEFAULT_MAX_PROCESSES = 16
+
+
+class AsyncGitManager(GitManager):
+    """GitManager whose bulk operations run as asyncio subprocesses.
+
+    Each git process is awaited on the event loop instead of occupying a
+    thread, so scanning or staging hundreds of repositories needs a single
+    thread. At most ``max_processes`` git processes run at once per loop,
+    every call has its own timeout, and a cancelled call kills and reaps its
+    child. Repository locks are awaited on the loop too, owned by the
+    calling task and shared with threaded callers. The synchronous
+    ``GitManager`` methods keep working unchanged; ``scan_repositories`` and
+    ``stage_all_many`` run their own event loop so threaded callers can use
+    them as before.
+    """
+
+    def __init__(self, status_cache: Optional[StatusCache] = None,
+                 locks: Optional[RepoLockRegistry] = None,
+                 fast_status: bool = False,
+                 max_processes: int = DEFAULT_MAX_PROCESSES,
+                 timeout: float = GIT_TIMEOUT):
+        super().__init__(status_cache, locks, fast_status)
+        self.max_processes = max(1, max_processes)
+        self.timeout = timeout
+        # asyncio primitives belong to one loop, and every asyncio.run makes a new one
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = \
+            weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_processes)
+        return semaphore
+
+    async def run_git_command_async(self, command: List[str], cwd: Optional[str] = None,
+                                    input: Optional[str] = None,
+                                    timeout: Optional[float] = None) -> Tuple[bool, str]:
+        """Async counterpart of ``run_git_command``"""
+        success, output = await self.run_git_command_bytes_async(
+            command, cwd=cwd, input=input.encode('utf-8') if input is not None else None, timeout=timeout
+        )
+        return success, output.decode('utf-8', errors='replace').strip()
+
+    async def run_git_command_bytes_async(self, command: List[str], cwd: Optional[str] = None,
+                                          input: Optional[bytes] = None,
+                                          timeout: Optional[float] = None) -> Tuple[bool, bytes]:
+        """Async counterpart of ``run_git_command_bytes``.
+
+        Cancelling the awaiting task kills git, waits for it to exit and
+        re-raises ``CancelledError``.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        async with self._semaphore():
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *command,
+                    stdin=asyncio.subprocess.PIPE if input is not None else asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=cwd,
+                    **self._console_kwargs()
+                )
+            except FileNotFoundError:
+                return False, b"Git command not found. Is Git installed?"
+            except Exception as e:
+                return False, f"Unexpected error: {str(e)}".encode('utf-8')
+
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(input), timeout)
+            except asyncio.TimeoutError:
+                await self._kill(process)
+                return False, f"Command timed out after {timeout:g} seconds".encode('utf-8')
+            except BaseException:
+                # Includes CancelledError: never leave an orphaned git behind
+                await self._kill(process)
+                raise
+
+        if process.returncode != 0 and stderr and not stdout.strip():
+            return False, stderr
+        return process.returncode == 0, stdout
+
+    @staticmethod
+    async def _kill(process: asyncio.subprocess.Process):
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+        # Shielded so the child is reaped even while the caller is being cancelled
+        await asyncio.shield(process.wait())
+
+    async def run_git_read_async(self, command: List[str], cwd: Optional[str] = None,
+                                 timeout: Optional[float] = None) -> Tuple[bool, str]:
+        success, output = await self.run_git_read_bytes_async(command, cwd=cwd, timeout=timeout)
+        return success, output.decode('utf-8', errors='replace').strip()
+
+    async def run_git_read_bytes_async(self, command: List[str], cwd: Optional[str] = None,
+                                       timeout: Optional[float] = None) -> Tuple[bool, bytes]:
+        async with self.repo_lock(cwd).read_async():
+            return await self.run_git_command_bytes_async(command, cwd=cwd, timeout=timeout)
+
+    async def run_git_write_async(self, command: List[str], cwd: Optional[str] = None,
+                                  input: Optional[str] = None,
+                                  timeout: Optional[float] = None) -> Tuple[bool, str]:
+        """Async counterpart of ``run_git_write``, with the same lock file retries"""
+        async with self.repo_lock(cwd).write_async():
+            delay = LOCK_RETRY_DELAY
+            for attempt in range(LOCK_RETRIES + 1):
+                success, output = await self.run_git_command_async(command, cwd=cwd, input=input, timeout=timeout)
+                if success or attempt == LOCK_RETRIES or not self.is_lock_contention(output):
+                    return success, output
+                await asyncio.sleep(delay)
+                delay *= 2
+            return success, output
+
+    async def check_has_changes_async(self, repo_path: str, force_refresh: bool = False) -> bool:
+        """Async counterpart of ``check_has_changes_cached``"""
+        cache = self.status_cache
+        if cache is not None and not force_refresh:
+            # Confirming a clean entry stats every tracked file
+            cached = await asyncio.get_running_loop().run_in_executor(None, self.cached_has_changes, repo_path)
+            if cached is not None:
+                return cached
+
+        has_changes = None
+        if self.fast_status:
+            # Stats every tracked file, so keep it off the event loop
+            has_changes = await asyncio.get_running_loop().run_in_executor(None, quick_has_changes, repo_path)
+        if has_changes is None:
+            success, output = await self.run_git_read_bytes_async(
+                ["git", "--no-optional-locks", "status", "--porcelain"],
+                cwd=repo_path
+            )
+            if not success:
+                return False
+            has_changes = bool(output.strip())
+        if cache is not None:
+            cache.put(repo_path, cache.fingerprint(repo_path), has_changes)
+        return has_changes
+
+    async def scan_repositories_async(self, parent_folder: str,
+                                      on_repo: Optional[Callable[[Dict[str, Any]], None]] = None,
+                                      max_concurrency: Optional[int] = None,
+                                      max_depth: int = 1,
+                                      ignore_dirs: Optional[List[str]] = None,
+                                      force_refresh: bool = False) -> List[Dict[str, Any]]:
+        """Async counterpart of ``scan_repositories``; cancel the task to stop early.
+
+        ``max_concurrency`` further limits how many checks of this scan are
+        in flight, below the manager-wide ``max_processes``.
+        """
+        repos = []
+
+        if not os.path.isdir(parent_folder):
+            return repos
+
+        current_dirs = {os.path.abspath(os.getcwd()), os.path.realpath(os.getcwd())}
+        limit = asyncio.Semaphore(max(1, max_concurrency or self.max_processes))
+
+        async def check(name: str, path: str):
+            async with limit:
+                try:
+                    has_changes = await self.check_has_changes_async(path, force_refresh)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    has_changes = False
+            repo = self._build_repo_entry(name, path, has_changes, os.path.abspath(path) in current_dirs)
+            repos.append(repo)
+            if on_repo is not None:
+                on_repo(repo)
+
+        tasks = []
+        try:
+            for name, path in self.discover_repositories(parent_folder, max_depth, ignore_dirs):
+                tasks.append(asyncio.ensure_future(check(name, path)))
+                # Let started checks make progress while discovery continues
+                await asyncio.sleep(0)
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self.status_cache is not None:
+            self.status_cache.evict()
+            self.status_cache.save()
+
+        repos.sort(key=lambda repo: repo['name'])
+        return repos
+
+    def scan_repositories(self, parent_folder: str,
+                          on_repo: Optional[Callable[[Dict[str, Any]], None]] = None,
+                          cancel_event: Optional[threading.Event] = None,
+                          max_workers: int = DEFAULT_MAX_PROCESSES,
+                          max_depth: int = 1,
+                          ignore_dirs: Optional[List[str]] = None,
+                          force_refresh: bool = False) -> List[Dict[str, Any]]:
+        """Scan on a private event loop in the calling thread.
+
+        Same contract as ``GitManager.scan_repositories``, with
+        ``max_workers`` bounding concurrent git processes instead of threads.
+        On cancel the repositories found so far are returned.
+        """
+        repos: List[Dict[str, Any]] = []
+
+        def collect(repo: Dict[str, Any]):
+            repos.append(repo)
+            if on_repo is not None:
+                on_repo(repo)
+
+        scan = self.scan_repositories_async(parent_folder, collect, max_workers, max_depth,
+                                            ignore_dirs, force_refresh)
+        self._run_cancellable(scan, cancel_event)
+        repos.sort(key=lambda repo: repo['name'])
+        return repos
+
+    async def stage_all_async(self, repo_path: str) -> Tuple[bool, str]:
+        """Stage every change in the repository, like staging all rows of its status"""
+        return await self.run_git_write_async(["git", "add", "-A"], cwd=repo_path)
+
+    def stage_all_many(self, repo_paths: Iterable[str],
+                       on_done: Optional[Callable[[str, bool, str], None]] = None,
+                       cancel_event: Optional[threading.Event] = None) -> Dict[str, Tuple[bool, str]]:
+        """Stage all changes in many repositories concurrently on one event loop.
+
+        ``on_done(repo_path, success, output)`` is called from the calling
+        thread as each repository finishes. Repositories not reached before
+        ``cancel_event`` is set are missing from the result.
+        """
+        results: Dict[str, Tuple[bool, str]] = {}
+
+        async def stage(path: str):
+            success, output = await self.stage_all_async(path)
+            results[path] = (success, output)
+            if on_done is not None:
+                on_done(path, success, output)
+
+        async def stage_all():
+            await asyncio.gather(*(stage(path) for path in repo_paths))
+
+        self._run_cancellable(stage_all(), cancel_event)
+        return results
+
+    def _run_cancellable(self, coroutine, cancel_event: Optional[threading.Event]) -> bool:
+        """Run ``coroutine`` to completion on a new loop; returns False if ``cancel_event`` stopped it"""
+        async def watch() -> bool:
+            task = asyncio.ensure_future(coroutine)
+            while cancel_event is not None and not task.done():
+                if cancel_event.is_set():
+                    task.cancel()
+                    break
+                await asyncio.wait({task}, timeout=CANCEL_POLL_INTERVAL)
+            try:
+                await task
+            except asyncio.CancelledError:
+                return False
+            return True
+
+        return asyncio.run(watch())
@@ -0,0 +1,216 @@
+"""
+Bulk commit message generation across many repositories
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, Callable
+
+from src.core.ai_provider import AIProvider, GenerationCancelled
+from src.core.async_git import AsyncGitManager
+from src.core.git_manager import GitManager
+from src.core.prompt_builder import PromptBuilder
+from src.core.staged_diff import StagedDiff
+
+# Defaults for parallel git work and concurrent AI requests
+DEFAULT_GIT_WORKERS = 8
+DEFAULT_AI_CONCURRENCY = 4
+
+
+@dataclass
+class BulkItem:
+    """One repository in a bulk run and where it is in the pipeline.
+
+    ``state`` moves through pending, staging, queued, generating and ready,
+    or ends in skipped, failed or cancelled; committing sets committed or
+    pushed.
+    """
+
+    name: str
+    path: str
+    state: str = "pending"
+    message: str = ""
+    error: str = ""
+    files: int = 0
+    accepted: bool = True
+    diff: Optional[StagedDiff] = None
+
+    @property
+    def is_done(self) -> bool:
+        return self.state not in ("pending", "staging", "queued", "generating")
+
+
+class BulkGenerator:
+    """Generate commit messages for many repositories at once.
+
+    Staging and diff collection run in a pool of ``git_workers`` threads.
+    Each diff is handed to a second pool as soon as it is ready, so at most
+    ``ai_concurrency`` AI requests are in flight while git work for the
+    remaining repositories carries on. ``on_update`` is called from worker
+    threads with the item whenever its state changes.
+    """
+
+    def __init__(self, git_manager: GitManager, prompt_builder: PromptBuilder,
+                 ai_provider: AIProvider, settings_manager):
+        self.git_manager = git_manager
+        self.prompt_builder = prompt_builder
+        self.ai_provider = ai_provider
+        self.settings_manager = settings_manager
+
+    def run(self, items: List[BulkItem], provider: str, stage_all: bool = False,
+            on_update: Optional[Callable[[BulkItem], None]] = None,
+            cancel_event: Optional[threading.Event] = None,
+            use_cache: bool = True):
+        """Collect staged diffs and generate messages for ``items``; blocks until done.
+
+        With ``stage_all`` every change in each repository, untracked files
+        included, is staged first.
+        """
+        cancel_event = cancel_event or threading.Event()
+        on_update = on_update or (lambda item: None)
+        git_workers = self.settings_manager.get("scan_max_workers", DEFAULT_GIT_WORKERS)
+        ai_workers = self.settings_manager.get("bulk_ai_concurrency", DEFAULT_AI_CONCURRENCY)
+
+        if stage_all and isinstance(self.git_manager, AsyncGitManager):
+            # Stage everything on one event loop instead of a thread per repository
+            self._stage_all_async(items, on_update, cancel_event)
+            items = [item for item in items if not item.is_done]
+            stage_all = False
+
+        git_pool = ThreadPoolExecutor(max_workers=max(1, git_workers), thread_name_prefix="bulk-git")
+        ai_pool = ThreadPoolExecutor(max_workers=max(1, ai_workers), thread_name_prefix="bulk-ai")
+        try:
+            def prepare(item: BulkItem):
+                if self._prepare(item, provider, stage_all, on_update, cancel_event):
+                    ai_pool.submit(self._generate, item, provider, on_update, cancel_event, use_cache)
+
+            for future in [git_pool.submit(prepare, item) for item in items]:
+                future.result()
+        finally:
+            git_pool.shutdown(wait=True, cancel_futures=True)
+            ai_pool.shutdown(wait=True, cancel_futures=cancel_event.is_set())
+
+        for item in items:
+            if not item.is_done:
+                self._set_state(item, "cancelled", on_update)
+
+    def _stage_all_async(self, items: List[BulkItem], on_update: Callable[[BulkItem], None],
+                         cancel_event: threading.Event):
+        by_path = {item.path: item for item in items}
+        for item in items:
+            self._set_state(item, "staging", on_update)
+
+        def staged(path: str, success: bool, output: str):
+            if not success:
+                item = by_path[path]
+                item.error = output.strip() or "git add failed"
+                self._set_state(item, "failed", on_update)
+
+        self.git_manager.stage_all_many(list(by_path), on_done=staged, cancel_event=cancel_event)
+
+    def regenerate(self, item: BulkItem, provider: str,
+                   on_update: Optional[Callable[[BulkItem], None]] = None,
+                   cancel_event: Optional[threading.Event] = None):
+        """Generate a fresh message for one item, bypassing the response cache"""
+        on_update = on_update or (lambda item: None)
+        cancel_event = cancel_event or threading.Event()
+        if item.diff is None:
+            if not self._prepare(item, provider, False, on_update, cancel_event):
+                return
+        self._generate(item, provider, on_update, cancel_event, use_cache=False)
+
+    def commit(self, item: BulkItem, push: bool = False,
+               on_update: Optional[Callable[[BulkItem], None]] = None) -> bool:
+        """Commit an item's staged changes with its message, optionally pushing"""
+        on_update = on_update or (lambda item: None)
+        success, output = self.git_manager.commit_changes(item.path, item.message)
+        if not success:
+            item.error = output.strip()
+            self._set_state(item, "failed", on_update)
+            return False
+
+        self.git_manager.update_status_cache(item.path, False)
+        if not push:
+            self._set_state(item, "committed", on_update)
+            return True
+
+        success, output = self.git_manager.push_changes(
+            item.path,
+            self.settings_manager.get("github_username"),
+            self.settings_manager.get("github_token"),
+            lambda message: None
+        )
+        if success:
+            self._set_state(item, "pushed", on_update)
+        else:
+            item.error = f"Committed, but push failed: {output.strip()}"
+            self._set_state(item, "committed", on_update)
+        return True
+
+    def _prepare(self, item: BulkItem, provider: str, stage_all: bool,
+                 on_update: Callable[[BulkItem], None], cancel_event: threading.Event) -> bool:
+        """Stage changes and read the diff; returns True if there is something to generate for"""
+        if cancel_event.is_set():
+            return False
+        try:
+            if stage_all:
+                self._set_state(item, "staging", on_update)
+                success, output = self.git_manager.get_status_bytes(item.path)
+                if not success:
+                    raise RuntimeError(output.decode('utf-8', errors='replace').strip() or "git status failed")
+                status = self.git_manager.parse_git_status(output)
+                if status:
+                    self.git_manager.auto_stage_files(item.path, status, list(range(len(status))),
+                                                      lambda message: None)
+
+            if cancel_event.is_set():
+                return False
+            budget = self.ai_provider.plan_budget(provider)
+            success, diff = self.prompt_builder.build_with_settings(
+                item.path, self.settings_manager, max_bytes=budget.max_bytes, max_tokens=budget.prompt_tokens
+            )
+            if not success:
+                raise RuntimeError("Failed to get staged changes")
+        except Exception as e:
+            item.error = str(e)
+            self._set_state(item, "failed", on_update)
+            return False
+
+        if diff is None or diff.is_empty():
+            item.error = "No staged changes"
+            item.accepted = False
+            self._set_state(item, "skipped", on_update)
+            return False
+
+        item.diff = diff
+        item.files = len(diff.files)
+        self._set_state(item, "queued", on_update)
+        return True
+
+    def _generate(self, item: BulkItem, provider: str, on_update: Callable[[BulkItem], None],
+                  cancel_event: threading.Event, use_cache: bool = True):
+        if cancel_event.is_set():
+            self._set_state(item, "cancelled", on_update)
+            return
+        self._set_state(item, "generating", on_update)
+        try:
+            item.message = self.ai_provider.generate_commit_message(
+                item.diff, provider, use_cache=use_cache, cancel_event=cancel_event
+            )
+            item.error = ""
+            self._set_state(item, "ready", on_update)
+        except GenerationCancelled:
+            self._set_state(item, "cancelled", on_update)
+        except Exception as e:
+            item.error = str(e)
+            self._set_state(item, "failed", on_update)
+
+    def _set_state(self, item: BulkItem, state: str, on_update: Callable[[BulkItem], None]):
+        item.state = state
+        on_update(item)
+
+    @staticmethod
+    def items_for(repos: List[Dict[str, Any]]) -> List[BulkItem]:
+        """Bulk items for every scanned repository flagged with changes"""
+        return [BulkItem(name=repo['name'], path=repo['path']) for repo in repos if repo.get('has_changes')]
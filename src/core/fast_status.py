@@ -0,0 +1,490 @@
+"""
+Change detection from .git/index without running git status
+"""
+
+import os
+import re
+import mmap
+import stat
+import zlib
+import struct
+from dataclasses import dataclass
+from typing import Optional, List, Tuple, Set
+
+from src.core.git_index import (
+    GitIndex, IndexEntry, IndexFormatError, read_index, index_entry_count,
+    FLAG_ASSUME_VALID, FLAG_STAGE_MASK, MODE_GITLINK, MODE_SYMLINK
+)
+
+# Stat fields are stored truncated to 32 bits in the index
+_U32 = 0xFFFFFFFF
+
+# Pack object types
+_PACK_COMMIT = 1
+
+# Above this many tracked files git's own stat loop beats reading the index
+# in Python; starting a process costs far more on Windows, which moves the
+# break-even up (see scripts/bench_index_status.py)
+DEFAULT_MAX_ENTRIES = 5000 if os.name == 'nt' else 500
+
+
+class _Undecided(Exception):
+    """The fast path cannot answer; ``git status`` has to"""
+
+
+class _Dirty(Exception):
+    """The repository certainly has changes"""
+
+
+@dataclass
+class FastStatus:
+    """Outcome of a fast change check.
+
+    ``has_changes`` is True or False when the index and working tree answer
+    the question with certainty, and None when git must be asked, with
+    ``reason`` saying why.
+    """
+
+    has_changes: Optional[bool]
+    reason: str = ""
+
+
+def resolve_git_dir(repo_path: str) -> Optional[str]:
+    """Return the git directory, following ``gitdir:`` files of worktrees/submodules"""
+    dot_git = os.path.join(repo_path, ".git")
+    if os.path.isdir(dot_git):
+        return dot_git
+    try:
+        with open(dot_git, 'r', encoding='utf-8') as f:
+            line = f.readline().strip()
+    except OSError:
+        return None
+    if not line.startswith("gitdir:"):
+        return None
+    git_dir = line[len("gitdir:"):].strip()
+    return os.path.normpath(os.path.join(repo_path, git_dir))
+
+
+def _common_dir(git_dir: str) -> str:
+    """Directory holding refs and objects (differs from ``git_dir`` in linked worktrees)"""
+    try:
+        with open(os.path.join(git_dir, "commondir"), 'r', encoding='utf-8') as f:
+            return os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    except OSError:
+        return git_dir
+
+
+def _hash_size(common_dir: str) -> int:
+    try:
+        with open(os.path.join(common_dir, "config"), 'rb') as f:
+            config = f.read()
+    except OSError:
+        return 20
+    return 32 if re.search(rb"(?im)^\s*objectformat\s*=\s*sha256\s*$", config) else 20
+
+
+def _resolve_head(git_dir: str, common_dir: str) -> Optional[bytes]:
+    """Commit name of HEAD as hex, or None for an unborn branch"""
+    with open(os.path.join(git_dir, "HEAD"), 'rb') as f:
+        head = f.read().strip()
+    for _ in range(5):
+        if not head.startswith(b"ref:"):
+            return head
+        ref = head[4:].strip().decode('utf-8', errors='surrogateescape')
+        try:
+            # Per-worktree refs live in the worktree's git dir, the rest in the common dir
+            base = git_dir if ref == "HEAD" or not ref.startswith("refs/") else common_dir
+            with open(os.path.join(base, *ref.split("/")), 'rb') as f:
+                head = f.read().strip()
+            continue
+        except FileNotFoundError:
+            pass
+        except OSError:
+            raise _Undecided("unreadable ref")
+        packed = _packed_ref(common_dir, ref.encode('utf-8', errors='surrogateescape'))
+        if packed is None:
+            return None
+        return packed
+    raise _Undecided("symbolic ref loop")
+
+
+def _packed_ref(common_dir: str, ref: bytes) -> Optional[bytes]:
+    try:
+        with open(os.path.join(common_dir, "packed-refs"), 'rb') as f:
+            for line in f:
+                if line[:1] in (b"#", b"^"):
+                    continue
+                oid, _, name = line.rstrip(b"\n").partition(b" ")
+                if name == ref:
+                    return oid
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def _object_dirs(common_dir: str) -> List[str]:
+    objects = os.path.join(common_dir, "objects")
+    dirs = [objects]
+    try:
+        with open(os.path.join(objects, "info", "alternates"), 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    dirs.append(os.path.normpath(os.path.join(objects, line)))
+    except OSError:
+        pass
+    return dirs
+
+
+def _find_packed(object_dir: str, oid: bytes) -> Optional[bytes]:
+    """Start of the commit's zlib stream in a pack, or None if no pack has it"""
+    pack_dir = os.path.join(object_dir, "pack")
+    try:
+        names = [name for name in os.listdir(pack_dir) if name.endswith(".idx")]
+    except OSError:
+        return None
+
+    for name in names:
+        with open(os.path.join(pack_dir, name), 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as idx:
+            if idx[:8] != b"\377tOc\0\0\0\2":
+                raise _Undecided("unsupported pack index")
+            hash_size = len(oid)
+            first = oid[0]
+            lo = struct.unpack_from(">I", idx, 8 + 4 * (first - 1))[0] if first else 0
+            hi = struct.unpack_from(">I", idx, 8 + 4 * first)[0]
+            count = struct.unpack_from(">I", idx, 8 + 4 * 255)[0]
+            names_at = 8 + 1024
+            while lo < hi:
+                middle = (lo + hi) // 2
+                found = idx[names_at + middle * hash_size:names_at + (middle + 1) * hash_size]
+                if found < oid:
+                    lo = middle + 1
+                elif found > oid:
+                    hi = middle
+                else:
+                    break
+            else:
+                continue
+
+            offsets_at = names_at + count * hash_size + count * 4
+            offset = struct.unpack_from(">I", idx, offsets_at + middle * 4)[0]
+            if offset & 0x80000000:
+                large_at = offsets_at + count * 4 + (offset & 0x7FFFFFFF) * 8
+                offset = struct.unpack_from(">Q", idx, large_at)[0]
+
+        with open(os.path.join(pack_dir, name[:-4] + ".pack"), 'rb') as pack:
+            pack.seek(offset)
+            header = pack.read(16)
+            kind = (header[0] >> 4) & 7
+            if kind != _PACK_COMMIT:
+                # Deltified commits would need the delta chain resolved
+                raise _Undecided("HEAD commit is deltified")
+            pos = 1
+            while header[pos - 1] & 0x80:
+                pos += 1
+            pack.seek(offset + pos)
+            return pack.read(4096)
+    return None
+
+
+def _head_tree(common_dir: str, commit: bytes) -> bytes:
+    """Tree object name of a commit, read from loose objects or packs"""
+    try:
+        oid = bytes.fromhex(commit.decode('ascii'))
+    except ValueError:
+        raise _Undecided("unreadable HEAD")
+
+    hex_name = oid.hex()
+    for object_dir in _object_dirs(common_dir):
+        compressed = None
+        try:
+            with open(os.path.join(object_dir, hex_name[:2], hex_name[2:]), 'rb') as f:
+                compressed = f.read(4096)
+        except FileNotFoundError:
+            compressed = _find_packed(object_dir, oid)
+        if compressed is None:
+            continue
+
+        try:
+            text = zlib.decompressobj().decompress(compressed, 1024)
+        except zlib.error:
+            raise _Undecided("unreadable HEAD commit")
+        if text.startswith(b"commit "):
+            text = text[text.index(b"\0") + 1:]
+        match = re.match(rb"tree ([0-9a-f]+)\n", text)
+        if not match:
+            raise _Undecided("unreadable HEAD commit")
+        return bytes.fromhex(match.group(1).decode('ascii'))
+    raise _Undecided("HEAD commit not found")
+
+
+class _IgnoreRules:
+    """The subset of gitignore matching needed to tell ignored files apart.
+
+    Patterns come from ``.gitignore`` files and ``info/exclude``. The global
+    ``core.excludesFile`` is not read: a file only it would ignore looks
+    untracked here, which makes the caller fall back to git rather than
+    give a wrong answer. Escaped patterns are not supported.
+    """
+
+    def __init__(self):
+        # (directory relative to the root, compiled patterns) from the root down
+        self.stack: List[Tuple[str, List[Tuple["re.Pattern", bool, bool]]]] = []
+        self.exclude: List[Tuple["re.Pattern", bool, bool]] = []
+
+    @staticmethod
+    def parse(path: str) -> List[Tuple["re.Pattern", bool, bool]]:
+        try:
+            with open(path, 'rb') as f:
+                lines = f.read().decode('utf-8', errors='surrogateescape').splitlines()
+        except OSError:
+            return []
+        rules = []
+        for line in lines:
+            line = line.rstrip(" ")
+            if not line or line.startswith("#"):
+                continue
+            if "\\" in line:
+                raise _Undecided("escaped ignore pattern")
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            line = line.lstrip("/")
+            regex = _translate(line)
+            if not anchored:
+                regex = "(?:.*/)?" + regex
+            rules.append((re.compile(regex + r"\Z", re.DOTALL), negate, dir_only))
+        return rules
+
+    def ignored(self, rel_path: str, is_dir: bool) -> bool:
+        """Whether ``rel_path`` (relative to the worktree root) is ignored"""
+        for base, rules in reversed(self.stack):
+            if base:
+                if not rel_path.startswith(base + "/"):
+                    continue
+                path = rel_path[len(base) + 1:]
+            else:
+                path = rel_path
+            verdict = self._match(rules, path, is_dir)
+            if verdict is not None:
+                return verdict
+        return bool(self._match(self.exclude, rel_path, is_dir))
+
+    @staticmethod
+    def _match(rules, path: str, is_dir: bool) -> Optional[bool]:
+        for pattern, negate, dir_only in reversed(rules):
+            if dir_only and not is_dir:
+                continue
+            if pattern.match(path):
+                return not negate
+        return None
+
+
+def _translate(pattern: str) -> str:
+    """Turn a gitignore glob into a regex over slash-separated paths"""
+    regex = []
+    i = 0
+    length = len(pattern)
+    while i < length:
+        char = pattern[i]
+        if pattern.startswith("**", i):
+            at_start = i == 0 or pattern[i - 1] == "/"
+            at_end = i + 2 == length or pattern[i + 2] == "/"
+            if at_start and at_end:
+                if i + 2 == length:
+                    regex.append(".*")
+                else:
+                    regex.append("(?:.*/)?")
+                    i += 1
+                i += 2
+                continue
+            regex.append("[^/]*")
+            i += 2
+            continue
+        if char == "*":
+            regex.append("[^/]*")
+        elif char == "?":
+            regex.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                raise _Undecided("unsupported ignore pattern")
+            body = pattern[i + 1:end]
+            if body[:1] in ("!", "^"):
+                body = "^" + body[1:]
+            regex.append("(?!/)[" + body.replace("[", "\\[") + "]")
+            i = end
+        else:
+            regex.append(re.escape(char))
+        i += 1
+    return "".join(regex)
+
+
+def _stat_matches(entry: IndexEntry, st: os.stat_result) -> bool:
+    """Compare the stat data git recorded with the file as it is now"""
+    if entry.mode == MODE_SYMLINK:
+        if not stat.S_ISLNK(st.st_mode):
+            return False
+    elif not stat.S_ISREG(st.st_mode) or bool(entry.mode & 0o100) != bool(st.st_mode & 0o100):
+        return False
+    if entry.size != st.st_size & _U32:
+        return False
+    if entry.mtime_s != (st.st_mtime_ns // 1_000_000_000) & _U32 or entry.mtime_ns != st.st_mtime_ns % 1_000_000_000:
+        return False
+    if entry.ctime_s and (entry.ctime_s != (st.st_ctime_ns // 1_000_000_000) & _U32
+                          or entry.ctime_ns != st.st_ctime_ns % 1_000_000_000):
+        return False
+    if entry.ino and entry.ino != st.st_ino & _U32:
+        return False
+    return True
+
+
+def _check_entries(repo_path: str, index: GitIndex):
+    """Stat every tracked path, raising ``_Dirty`` or ``_Undecided`` once the answer is known"""
+    index_mtime = index.mtime_ns
+    prefix = os.fsencode(repo_path) + b"/"
+    lstat = os.lstat
+
+    for entry in index.entries:
+        if entry.flags & (FLAG_STAGE_MASK | FLAG_ASSUME_VALID) or entry.extended_flags:
+            if entry.stage:
+                raise _Dirty("unmerged paths")
+            if entry.intent_to_add:
+                raise _Dirty("intent-to-add paths")
+            if entry.skip_worktree or entry.assume_valid:
+                continue
+        if entry.mode == MODE_GITLINK:
+            raise _Undecided("submodules")
+
+        try:
+            st = lstat(prefix + entry.path)
+        except (FileNotFoundError, NotADirectoryError):
+            raise _Dirty("deleted files")
+        if not _stat_matches(entry, st):
+            raise _Undecided("stat data changed")
+        # Racy git: a file written in the same instant as the index may have
+        # changed after git recorded its stat data
+        if st.st_mtime_ns >= index_mtime:
+            raise _Undecided("racy timestamps")
+
+
+def _tracked_directories(tracked: Set[bytes]) -> Set[bytes]:
+    """Every directory that holds a tracked path, including the root (``b""``)"""
+    directories = {path.rpartition(b"/")[0] for path in tracked}
+    for directory in list(directories):
+        while directory:
+            directory = directory.rpartition(b"/")[0]
+            if directory in directories:
+                break
+            directories.add(directory)
+    directories.add(b"")
+    return directories
+
+
+def _walk_untracked(repo_path: str, git_dir: str, tracked: Set[bytes]):
+    """Walk the worktree for files that are neither tracked nor ignored"""
+    directories = _tracked_directories(tracked)
+    rules = _IgnoreRules()
+    rules.exclude = _IgnoreRules.parse(os.path.join(git_dir, "info", "exclude"))
+    root = os.fsencode(repo_path)
+
+    def walk(rel: bytes, ignored_dir: bool):
+        """``ignored_dir``: an ignored directory that still holds tracked files"""
+        rel_text = os.fsdecode(rel)
+        rules.stack.append((rel_text, _IgnoreRules.parse(os.path.join(repo_path, rel_text, ".gitignore"))))
+        try:
+            with os.scandir(os.path.join(root, rel) if rel else root) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if name == b".git":
+                        continue
+                    path = rel + b"/" + name if rel else name
+                    if path in tracked:
+                        continue
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if is_dir and path in directories:
+                        walk(path, ignored_dir or rules.ignored(os.fsdecode(path), True))
+                        continue
+                    # Nothing below an ignored directory can be re-included
+                    if ignored_dir or rules.ignored(os.fsdecode(path), is_dir):
+                        continue
+                    if is_dir and not os.path.exists(os.path.join(entry.path, b".git")):
+                        # git only lists untracked directories that contain files
+                        walk(path, False)
+                        continue
+                    raise _Undecided("untracked files")
+        finally:
+            rules.stack.pop()
+
+    walk(b"", False)
+
+
+def check_worktree(repo_path: str, max_entries: int = DEFAULT_MAX_ENTRIES) -> FastStatus:
+    """Decide from the index and working tree whether ``git status`` would report changes.
+
+    Staged changes are found by comparing the index's cached root tree with
+    HEAD's tree, unstaged ones from the stat data git recorded for each
+    tracked file, and untracked ones by walking the working tree with the
+    repository's ignore files. Anything that would need file contents,
+    submodules, a split or sparse index, or ignore rules beyond
+    ``.gitignore`` and ``info/exclude`` leaves the answer to git, and so
+    does an index with more than ``max_entries`` entries (0 for no limit).
+    """
+    git_dir = resolve_git_dir(repo_path)
+    if git_dir is None:
+        return FastStatus(None, "no git directory")
+    common_dir = _common_dir(git_dir)
+
+    try:
+        if os.path.exists(os.path.join(git_dir, "index.lock")):
+            raise _Undecided("index is being written")
+        hash_size = _hash_size(common_dir)
+        index_path = os.path.join(git_dir, "index")
+        try:
+            if max_entries and index_entry_count(index_path) > max_entries:
+                raise _Undecided("large index")
+            index = read_index(index_path, hash_size)
+        except IndexFormatError as e:
+            raise _Undecided(f"unsupported index: {e}")
+        except OSError:
+            raise _Undecided("unreadable index")
+
+        for signature in index.extensions:
+            if signature == b"link":
+                raise _Undecided("split index")
+            if signature == b"sdir":
+                raise _Undecided("sparse index")
+            if not b"A" <= signature[:1] <= b"Z":
+                raise _Undecided("required index extension")
+
+        head = _resolve_head(git_dir, common_dir)
+        if head is None:
+            if index.entries:
+                raise _Dirty("files staged on an unborn branch")
+        else:
+            cached_tree = index.cached_root_tree()
+            if cached_tree is None:
+                raise _Undecided("index tree not cached")
+            if cached_tree != _head_tree(common_dir, head):
+                raise _Dirty("staged changes")
+
+        _check_entries(repo_path, index)
+        _walk_untracked(repo_path, git_dir, {entry.path for entry in index.entries})
+    except _Dirty as e:
+        return FastStatus(True, str(e))
+    except _Undecided as e:
+        return FastStatus(None, str(e))
+    except OSError as e:
+        return FastStatus(None, f"read error: {e.strerror or e}")
+    return FastStatus(False, "clean")
+
+
+def quick_has_changes(repo_path: str, max_entries: int = DEFAULT_MAX_ENTRIES) -> Optional[bool]:
+    """``check_worktree`` reduced to True, False or None (ask git)"""
+    return check_worktree(repo_path, max_entries).has_changes
@@ -0,0 +1,209 @@
+"""
+Reader for the .git/index file format (versions 2 to 4)
+"""
+
+import os
+import struct
+from typing import Optional, List, Dict, Tuple
+
+# Entry flags
+FLAG_ASSUME_VALID = 0x8000
+FLAG_EXTENDED = 0x4000
+FLAG_STAGE_MASK = 0x3000
+FLAG_NAME_MASK = 0x0FFF
+
+# Extended flags (version 3 and later)
+FLAG_SKIP_WORKTREE = 0x4000
+FLAG_INTENT_TO_ADD = 0x2000
+
+# File modes stored in the index
+MODE_GITLINK = 0o160000
+MODE_SYMLINK = 0o120000
+
+
+class IndexFormatError(ValueError):
+    """The file is not an index this reader understands"""
+
+
+class IndexEntry:
+    """One path in the index with the stat data git recorded for it.
+
+    Times, ``dev``, ``ino`` and ``size`` are truncated to 32 bits, as git
+    stores them. ``path`` is the raw bytes of the repository-relative path.
+    """
+
+    __slots__ = (
+        'ctime_s', 'ctime_ns', 'mtime_s', 'mtime_ns', 'dev', 'ino',
+        'mode', 'uid', 'gid', 'size', 'oid', 'flags', 'extended_flags', 'path'
+    )
+
+    def __init__(self, stat_fields: List[int], oid: bytes, flags: int,
+                 extended_flags: int, path: bytes):
+        (self.ctime_s, self.ctime_ns, self.mtime_s, self.mtime_ns, self.dev, self.ino,
+         self.mode, self.uid, self.gid, self.size) = stat_fields
+        self.oid = oid
+        self.flags = flags
+        self.extended_flags = extended_flags
+        self.path = path
+
+    @property
+    def stage(self) -> int:
+        """0 for a normal entry, 1-3 for the sides of a merge conflict"""
+        return (self.flags & FLAG_STAGE_MASK) >> 12
+
+    @property
+    def assume_valid(self) -> bool:
+        return bool(self.flags & FLAG_ASSUME_VALID)
+
+    @property
+    def skip_worktree(self) -> bool:
+        return bool(self.extended_flags & FLAG_SKIP_WORKTREE)
+
+    @property
+    def intent_to_add(self) -> bool:
+        return bool(self.extended_flags & FLAG_INTENT_TO_ADD)
+
+    def __repr__(self) -> str:
+        return f"IndexEntry({self.mode:o}, {self.path!r})"
+
+
+class GitIndex:
+    """Parsed index: entries in path order plus raw extension data"""
+
+    def __init__(self, version: int, entries: List[IndexEntry], extensions: Dict[bytes, bytes],
+                 mtime_ns: int = 0, hash_size: int = 20):
+        self.version = version
+        self.entries = entries
+        self.extensions = extensions
+        self.hash_size = hash_size
+        # Modification time of the index file, for racy timestamp checks
+        self.mtime_ns = mtime_ns
+
+    def cached_root_tree(self) -> Optional[bytes]:
+        """Object name of the whole index as a tree, if the cache-tree extension has it.
+
+        git keeps this up to date while the index is unchanged since the
+        last commit or checkout; staging a path invalidates it.
+        """
+        data = self.extensions.get(b"TREE")
+        if not data:
+            return None
+        # Root record: "" NUL entry_count SP subtree_count LF oid
+        nul = data.find(b"\0")
+        newline = data.find(b"\n", nul)
+        if nul != 0 or newline == -1:
+            return None
+        counts = data[nul + 1:newline].split(b" ")
+        if len(counts) != 2 or counts[0].startswith(b"-"):
+            return None
+        oid = data[newline + 1:newline + 1 + self.hash_size]
+        return oid if len(oid) == self.hash_size else None
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """Decode git's offset varint (used for v4 path prefixes)"""
+    byte = data[pos]
+    pos += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, pos
+
+
+def parse_index(data: bytes, hash_size: int = 20) -> Tuple[int, List[IndexEntry], Dict[bytes, bytes]]:
+    """Parse index file contents into ``(version, entries, extensions)``.
+
+    The trailing checksum is not verified. Raises ``IndexFormatError`` for
+    anything other than a well-formed version 2, 3 or 4 index.
+    """
+    if len(data) < 12 + hash_size or data[:4] != b"DIRC":
+        raise IndexFormatError("not an index file")
+    version, count = struct.unpack_from(">II", data, 4)
+    if version not in (2, 3, 4):
+        raise IndexFormatError(f"unsupported index version {version}")
+
+    end = len(data) - hash_size
+    entries = []
+    pos = 12
+    previous = b""
+    fixed = struct.Struct(f">10I{hash_size}sH")
+    try:
+        for _ in range(count):
+            start = pos
+            *stat_fields, oid, flags = fixed.unpack_from(data, pos)
+            pos += fixed.size
+            extended_flags = 0
+            if flags & FLAG_EXTENDED:
+                if version < 3:
+                    raise IndexFormatError("extended flags in a version 2 index")
+                extended_flags, = struct.unpack_from(">H", data, pos)
+                pos += 2
+
+            if version == 4:
+                strip, pos = _read_varint(data, pos)
+                nul = data.index(b"\0", pos)
+                if strip > len(previous):
+                    raise IndexFormatError("bad path prefix")
+                path = previous[:len(previous) - strip] + data[pos:nul]
+                pos = nul + 1
+            else:
+                name_length = flags & FLAG_NAME_MASK
+                if name_length < FLAG_NAME_MASK:
+                    nul = pos + name_length
+                    if data[nul:nul + 1] != b"\0":
+                        raise IndexFormatError("bad path length")
+                else:
+                    nul = data.index(b"\0", pos)
+                path = data[pos:nul]
+                # Entries are NUL padded to a multiple of eight bytes
+                length = nul - start
+                pos = start + ((length + 8) & ~7)
+
+            if pos > end:
+                raise IndexFormatError("truncated entry")
+            entries.append(IndexEntry(stat_fields, oid, flags, extended_flags, path))
+            previous = path
+    except (struct.error, IndexError, ValueError) as e:
+        if isinstance(e, IndexFormatError):
+            raise
+        raise IndexFormatError(f"corrupt entry: {e}") from None
+
+    extensions = {}
+    while pos + 8 <= end:
+        signature = data[pos:pos + 4]
+        size, = struct.unpack_from(">I", data, pos + 4)
+        pos += 8
+        if pos + size > end:
+            raise IndexFormatError("truncated extension")
+        extensions[signature] = data[pos:pos + size]
+        pos += size
+
+    if pos != end:
+        raise IndexFormatError("trailing data after extensions")
+    return version, entries, extensions
+
+
+def index_entry_count(index_path: str) -> int:
+    """Number of entries from the index header, without reading the rest"""
+    try:
+        with open(index_path, 'rb') as f:
+            header = f.read(12)
+    except FileNotFoundError:
+        return 0
+    if len(header) < 12 or header[:4] != b"DIRC":
+        raise IndexFormatError("not an index file")
+    return struct.unpack_from(">I", header, 8)[0]
+
+
+def read_index(index_path: str, hash_size: int = 20) -> GitIndex:
+    """Read and parse an index file; a missing file is an empty index"""
+    try:
+        with open(index_path, 'rb') as f:
+            mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+            data = f.read()
+    except FileNotFoundError:
+        return GitIndex(2, [], {}, hash_size=hash_size)
+    version, entries, extensions = parse_index(data, hash_size)
+    return GitIndex(version, entries, extensions, mtime_ns, hash_size)
@@ -3,49 +3,179 @@ Git Manager for handling Git operations
 """
 
 import os
+import re
+import time
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional, List, Tuple, Dict, Any, Callable
+from typing import Optional, List, Tuple, Dict, Any, Callable, Iterator, Union
+
+from src.core.fast_status import quick_has_changes
+from src.core.git_status import StatusList, parse_porcelain_v2, split_z, display_path
+from src.core.repo_locks import RepoLockRegistry, RepoLock, REPO_LOCKS
+from src.core.settings_manager import DEFAULT_SCAN_IGNORE_DIRS
+from src.core.staged_diff import StagedDiff
+from src.core.status_cache import StatusCache
+
+# Default number of concurrent `git status` workers used while scanning
+DEFAULT_SCAN_WORKERS = 8
+
+# Seconds before a git command is killed
+GIT_TIMEOUT = 30
+
+# How often a cancellable git command checks its cancel event (seconds)
+CANCEL_POLL_INTERVAL = 0.1
+
+# Retries of a write that failed because another git process holds a lock
+# file such as index.lock; the delay doubles each time (about 6 s in total)
+LOCK_RETRIES = 5
+LOCK_RETRY_DELAY = 0.2
+
+# e.g. "fatal: Unable to create '/repo/.git/index.lock': File exists."
+LOCK_CONTENTION_PATTERN = re.compile(rb"Unable to create '[^']*\.lock': File exists")
 
 
 class GitManager:
-    def __init__(self):
-        pass
+    def __init__(self, status_cache: Optional[StatusCache] = None,
+                 locks: Optional[RepoLockRegistry] = None,
+                 fast_status: bool = False):
+        self.status_cache = status_cache
+        self.locks = locks or REPO_LOCKS
+        # Answer "has changes" from .git/index when it is unambiguous
+        self.fast_status = fast_status
     
-    def run_git_command(self, command: List[str], cwd: Optional[str] = None) -> Tuple[bool, str]:
-        """Execute git command with hidden console"""
+    def _console_kwargs(self) -> Dict[str, Any]:
+        """Subprocess arguments that hide the console window on Windows"""
+        startupinfo = None
+        creationflags = 0
+        if os.name == 'nt':  # Windows
+            startupinfo = subprocess.STARTUPINFO()
+            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+            startupinfo.wShowWindow = 0  # SW_HIDE
+            creationflags = subprocess.CREATE_NO_WINDOW
+        return {'startupinfo': startupinfo, 'creationflags': creationflags}
+    
+    def run_git_command(self, command: List[str], cwd: Optional[str] = None,
+                        input: Optional[str] = None,
+                        cancel_event: Optional[threading.Event] = None) -> Tuple[bool, str]:
+        """Execute git command with hidden console.
+
+        Output is decoded as UTF-8 and stripped. Setting ``cancel_event``
+        while the command runs kills git and returns ``(False, "Cancelled")``.
+        """
+        success, output = self.run_git_command_bytes(
+            command, cwd=cwd,
+            input=input.encode('utf-8') if input is not None else None,
+            cancel_event=cancel_event
+        )
+        return success, output.decode('utf-8', errors='replace').strip()
+    
+    def run_git_command_bytes(self, command: List[str], cwd: Optional[str] = None,
+                              input: Optional[bytes] = None,
+                              cancel_event: Optional[threading.Event] = None) -> Tuple[bool, bytes]:
+        """Execute git command and return its raw stdout.
+
+        Nothing is decoded, stripped or copied, so large outputs can be
+        parsed in place and paths that are not valid UTF-8 survive. If git
+        fails without output, its stderr is returned instead; errors raised
+        here (timeout, cancel, missing git) come back UTF-8 encoded.
+        """
         try:
-            # Hide console window for Windows
-            startupinfo = None
-            creationflags = 0
-            if os.name == 'nt':  # Windows
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = 0  # SW_HIDE
-                creationflags = subprocess.CREATE_NO_WINDOW
-            
-            result = subprocess.run(
+            process = subprocess.Popen(
                 command,
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='replace',
+                stdin=subprocess.PIPE if input is not None else None,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
                 cwd=cwd,
-                timeout=30,
-                startupinfo=startupinfo,
-                creationflags=creationflags
+                **self._console_kwargs()
             )
-            output = result.stdout.strip() if result.stdout else ""
-            return result.returncode == 0, output
-        except subprocess.TimeoutExpired:
-            return False, "Command timed out after 30 seconds"
-        except subprocess.CalledProcessError as e:
-            error_output = e.stderr if e.stderr else str(e)
-            return False, error_output.strip()
         except FileNotFoundError:
-            return False, "Git command not found. Is Git installed?"
+            return False, b"Git command not found. Is Git installed?"
+        except Exception as e:
+            return False, f"Unexpected error: {str(e)}".encode('utf-8')
+        
+        deadline = time.monotonic() + GIT_TIMEOUT
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                wait = min(remaining, CANCEL_POLL_INTERVAL) if cancel_event is not None else remaining
+                try:
+                    stdout, stderr = process.communicate(input, timeout=max(0.0, wait))
+                    break
+                except subprocess.TimeoutExpired:
+                    # Input is written on the first call only
+                    input = None
+                    if cancel_event is not None and cancel_event.is_set():
+                        process.kill()
+                        process.communicate()
+                        return False, b"Cancelled"
+                    if time.monotonic() >= deadline:
+                        process.kill()
+                        process.communicate()
+                        return False, f"Command timed out after {GIT_TIMEOUT} seconds".encode('utf-8')
         except Exception as e:
-            return False, f"Unexpected error: {str(e)}"
+            process.kill()
+            process.wait()
+            return False, f"Unexpected error: {str(e)}".encode('utf-8')
+        
+        if process.returncode != 0 and stderr and not stdout.strip():
+            return False, stderr
+        return process.returncode == 0, stdout
+    
+    def repo_lock(self, repo_path: Optional[str]) -> RepoLock:
+        """Read/write lock shared by every git operation on ``repo_path``"""
+        return self.locks.get(repo_path)
+    
+    def run_git_read(self, command: List[str], cwd: Optional[str] = None,
+                     cancel_event: Optional[threading.Event] = None) -> Tuple[bool, str]:
+        """Run a read-only git command; other reads of the repository may run alongside"""
+        with self.repo_lock(cwd).read():
+            return self.run_git_command(command, cwd=cwd, cancel_event=cancel_event)
+    
+    def run_git_read_bytes(self, command: List[str], cwd: Optional[str] = None,
+                           cancel_event: Optional[threading.Event] = None) -> Tuple[bool, bytes]:
+        """``run_git_read`` returning raw stdout, see ``run_git_command_bytes``"""
+        with self.repo_lock(cwd).read():
+            return self.run_git_command_bytes(command, cwd=cwd, cancel_event=cancel_event)
+    
+    def run_git_write(self, command: List[str], cwd: Optional[str] = None,
+                      input: Optional[str] = None,
+                      cancel_event: Optional[threading.Event] = None) -> Tuple[bool, str]:
+        """Run a git command that writes the index or refs, alone in its repository"""
+        with self.repo_lock(cwd).write():
+            success, output = self._run_with_lock_retry(
+                command, cwd, input.encode('utf-8') if input is not None else None, cancel_event
+            )
+        return success, output.decode('utf-8', errors='replace').strip()
+    
+    def _run_with_lock_retry(self, command: List[str], cwd: Optional[str] = None,
+                             input: Optional[bytes] = None,
+                             cancel_event: Optional[threading.Event] = None) -> Tuple[bool, bytes]:
+        """Run a write, retrying with backoff while an outside git process holds a lock file.
+
+        The in-process write lock is held by the caller; this only covers
+        git running elsewhere (a terminal, an IDE) at the same time.
+        """
+        delay = LOCK_RETRY_DELAY
+        for attempt in range(LOCK_RETRIES + 1):
+            success, output = self.run_git_command_bytes(command, cwd=cwd, input=input, cancel_event=cancel_event)
+            if success or attempt == LOCK_RETRIES or not self.is_lock_contention(output):
+                return success, output
+            if cancel_event is not None:
+                if cancel_event.wait(delay):
+                    return False, b"Cancelled"
+            else:
+                time.sleep(delay)
+            delay *= 2
+        return success, output
+    
+    @staticmethod
+    def is_lock_contention(output: Union[str, bytes]) -> bool:
+        """Whether git failed because another process holds one of its lock files"""
+        if isinstance(output, str):
+            output = output.encode('utf-8', errors='surrogateescape')
+        return bool(LOCK_CONTENTION_PATTERN.search(output or b""))
     
     def is_git_repo(self, path: str) -> bool:
         """Check if path is a git repository"""
@@ -53,105 +183,224 @@ class GitManager:
     
     def check_has_changes(self, repo_path: str) -> bool:
         """Check if repository has changes"""
-        success, output = self.run_git_command(
-            ["git", "status", "--porcelain"],
+        if self.fast_status:
+            has_changes = quick_has_changes(repo_path)
+            if has_changes is not None:
+                return has_changes
+        success, output = self.run_git_read_bytes(
+            ["git", "--no-optional-locks", "status", "--porcelain"],
             cwd=repo_path
         )
-        return success and bool(output)
+        return success and bool(output.strip())
     
-    def scan_repositories(self, parent_folder: str) -> List[Dict[str, Any]]:
-        """Scan for git repositories in parent folder"""
+    def check_has_changes_cached(self, repo_path: str, force_refresh: bool = False) -> bool:
+        """Check if repository has changes, reusing the status cache when possible"""
+        cache = self.status_cache
+        if cache is None:
+            return self.check_has_changes(repo_path)
+        
+        if not force_refresh:
+            cached = self.cached_has_changes(repo_path)
+            if cached is not None:
+                return cached
+        
+        has_changes = quick_has_changes(repo_path) if self.fast_status else None
+        if has_changes is None:
+            success, output = self.run_git_read_bytes(
+                ["git", "--no-optional-locks", "status", "--porcelain"],
+                cwd=repo_path
+            )
+            if not success:
+                return False
+            has_changes = bool(output.strip())
+        
+        # Fingerprint after the check, in case a commit landed meanwhile
+        cache.put(repo_path, cache.fingerprint(repo_path), has_changes)
+        return has_changes
+    
+    def cached_has_changes(self, repo_path: str) -> Optional[bool]:
+        """Cached ``has_changes`` that can be trusted, or None to run a check.
+
+        The cache fingerprint misses edits to tracked files below the
+        working tree root, so a cached clean result is only reused when
+        ``quick_has_changes`` confirms it from the index. A repository
+        found dirty that way is recorded at once.
+        """
+        cache = self.status_cache
+        cached = cache.get(repo_path, cache.fingerprint(repo_path))
+        if cached is False:
+            cached = quick_has_changes(repo_path)
+            if cached:
+                cache.put(repo_path, cache.fingerprint(repo_path), True)
+        return cached
+    
+    def update_status_cache(self, repo_path: str, has_changes: bool):
+        """Record a status result obtained elsewhere (e.g. when loading files)"""
+        if self.status_cache is not None:
+            self.status_cache.put(repo_path, self.status_cache.fingerprint(repo_path), has_changes)
+            self.status_cache.save()
+    
+    def discover_repositories(self, parent_folder: str, max_depth: int = 1,
+                              ignore_dirs: Optional[List[str]] = None,
+                              cancel_event: Optional[threading.Event] = None) -> Iterator[Tuple[str, str]]:
+        """Yield ``(name, path)`` for git repositories below parent folder.
+
+        Walks with ``os.scandir`` and relies on ``DirEntry`` type information,
+        so directories are not stat'ed. A directory containing a ``.git``
+        entry (directory for regular clones, file for worktrees/submodules)
+        is reported and not descended into. ``max_depth`` of 1 only looks at
+        direct children of the parent folder.
+        """
+        max_depth = max(1, max_depth)
+        ignored = set(DEFAULT_SCAN_IGNORE_DIRS if ignore_dirs is None else ignore_dirs)
+        visited_links = set()
+        # Stack of (path, name relative to parent folder, depth)
+        stack = [(parent_folder, "", 0)]
+        
+        while stack:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            
+            path, rel_name, depth = stack.pop()
+            if depth >= max_depth:
+                # Leaf level: a single lookup is cheaper than listing the directory
+                if os.path.exists(os.path.join(path, ".git")):
+                    yield rel_name, path
+                continue
+            
+            subdirs = []
+            is_repo = False
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        name = entry.name
+                        if name == ".git":
+                            is_repo = True
+                            if depth > 0:
+                                break
+                            continue
+                        if name.startswith('.') or name in ignored:
+                            continue
+                        try:
+                            if not entry.is_dir():
+                                continue
+                            if entry.is_symlink():
+                                # Only symlinks need a stat, to avoid walking loops
+                                st = entry.stat()
+                                key = (st.st_dev, st.st_ino)
+                                if key in visited_links:
+                                    continue
+                                visited_links.add(key)
+                        except OSError:
+                            continue
+                        subdirs.append(name)
+            except OSError:
+                continue
+            
+            if is_repo and depth > 0:
+                yield rel_name, path
+                continue
+            
+            # Reverse so the stack pops children in sorted order
+            for name in sorted(subdirs, reverse=True):
+                stack.append((
+                    os.path.join(path, name),
+                    f"{rel_name}/{name}" if rel_name else name,
+                    depth + 1
+                ))
+    
+    def scan_repositories(self, parent_folder: str,
+                          on_repo: Optional[Callable[[Dict[str, Any]], None]] = None,
+                          cancel_event: Optional[threading.Event] = None,
+                          max_workers: int = DEFAULT_SCAN_WORKERS,
+                          max_depth: int = 1,
+                          ignore_dirs: Optional[List[str]] = None,
+                          force_refresh: bool = False) -> List[Dict[str, Any]]:
+        """Scan for git repositories in parent folder.
+
+        Discovered repositories are checked in a bounded worker pool while
+        discovery continues. Each repository is passed to ``on_repo`` (from
+        the calling thread) as soon as its check finishes, and setting
+        ``cancel_event`` stops the scan early. Cached statuses are reused
+        unless ``force_refresh`` is set.
+        """
         repos = []
-        scan_path = Path(parent_folder)
         
-        if not scan_path.exists():
+        if not os.path.isdir(parent_folder):
             return repos
         
+        current_dirs = {os.path.abspath(os.getcwd()), os.path.realpath(os.getcwd())}
+        executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
         try:
-            for item in sorted(scan_path.iterdir()):
-                if item.is_dir() and not item.name.startswith('.'):
-                    if self.is_git_repo(str(item)):
-                        has_changes = self.check_has_changes(str(item))
-                        indicator = "🔴" if has_changes else "⚪"
-                        
-                        display_name = f"{indicator} {item.name}"
-                        if item.resolve() == Path('.').resolve():
-                            display_name += " (current)"
-                        
-                        repos.append({
-                            'name': item.name,
-                            'path': str(item),
-                            'has_changes': has_changes,
-                            'display_name': display_name
-                        })
-        except PermissionError:
-            pass
+            futures = {}
+            for name, path in self.discover_repositories(parent_folder, max_depth, ignore_dirs, cancel_event):
+                future = executor.submit(self.check_has_changes_cached, path, force_refresh)
+                futures[future] = (name, path)
+            
+            for future in as_completed(futures):
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                
+                name, path = futures[future]
+                try:
+                    has_changes = future.result()
+                except Exception:
+                    has_changes = False
+                
+                is_current = os.path.abspath(path) in current_dirs
+                repo = self._build_repo_entry(name, path, has_changes, is_current)
+                repos.append(repo)
+                if on_repo is not None:
+                    on_repo(repo)
+        finally:
+            # Drop queued checks on cancel; running ones finish on their own
+            executor.shutdown(wait=False, cancel_futures=True)
         
+        if self.status_cache is not None:
+            self.status_cache.evict()
+            self.status_cache.save()
+        
+        repos.sort(key=lambda repo: repo['name'])
         return repos
     
+    def _build_repo_entry(self, name: str, path: str, has_changes: bool, is_current: bool) -> Dict[str, Any]:
+        """Build the repository dict shown in the repository dropdown"""
+        indicator = "🔴" if has_changes else "⚪"
+        display_name = f"{indicator} {name}"
+        if is_current:
+            display_name += " (current)"
+        
+        return {
+            'name': name,
+            'path': path,
+            'has_changes': has_changes,
+            'display_name': display_name
+        }
+    
     def get_status(self, repo_path: str) -> Tuple[bool, str]:
-        """Get git status with encoding handling"""
-        success, output = self.run_git_command(
-            ["git", "status", "--porcelain"],
+        """Get git status in porcelain v2 format with NUL-terminated paths"""
+        success, output = self.get_status_bytes(repo_path)
+        return success, output.decode('utf-8', errors='replace').strip()
+    
+    def get_status_bytes(self, repo_path: str) -> Tuple[bool, bytes]:
+        """Raw `git status --porcelain=v2 -z` output for ``parse_git_status``.
+
+        ``--no-optional-locks`` keeps status from taking index.lock to
+        refresh stat data, which would make a concurrent git add or commit
+        (ours or the user's) fail.
+        """
+        return self.run_git_read_bytes(
+            ["git", "--no-optional-locks", "status", "--porcelain=v2", "-z"],
             cwd=repo_path
         )
-        
-        if not success:
-            return False, output
-        
-        # Ensure we return empty string instead of None
-        return True, output if output is not None else ""
     
-    def parse_git_status(self, output: str) -> List[Dict[str, Any]]:
-        """Parse git status output correctly"""
-        files = []
-        
+    def parse_git_status(self, output: Union[bytes, str]) -> StatusList:
+        """Parse `git status --porcelain=v2 -z` output"""
         if not output:
-            return files
-            
-        for line in output.strip().split('\n'):
-            if not line.strip():
-                continue
-                
-            # Git status format: XY filename
-            status = line[:2].strip()
-            filename = line[3:].strip()
-            
-            # Handle renamed files: "R  oldfile -> newfile"
-            if '->' in filename:
-                if 'R' in status:  # Renamed
-                    parts = filename.split('->')
-                    old_file = parts[0].strip()
-                    new_file = parts[1].strip()
-                    files.append({
-                        'status': status,
-                        'filename': new_file,
-                        'old_filename': old_file,
-                        'type': 'renamed'
-                    })
-                    continue
-                elif 'C' in status:  # Copied
-                    parts = filename.split('->')
-                    old_file = parts[0].strip()
-                    new_file = parts[1].strip()
-                    files.append({
-                        'status': status,
-                        'filename': new_file,
-                        'old_filename': old_file,
-                        'type': 'copied'
-                    })
-                    continue
-            
-            # Handle regular files
-            files.append({
-                'status': status,
-                'filename': filename,
-                'type': 'regular'
-            })
-        
-        return files
+            return StatusList()
+        return parse_porcelain_v2(output)
     
-    def find_exact_file(self, repo_path: str, filename: str, raw_git_status: List[Dict]) -> Optional[str]:
+    def find_exact_file(self, repo_path: str, filename: str, raw_git_status: StatusList) -> Optional[str]:
         """Find exact file match in git status"""
         repo_path_obj = Path(repo_path)
         filename = filename.replace('\\', '/')
@@ -161,193 +410,255 @@ class GitManager:
             return filename
         
         # For deleted files, we don't expect them to exist
-        for file_info in raw_git_status:
-            if file_info['filename'] == filename:
-                if 'D' in file_info['status']:
-                    return filename
-                if (repo_path_obj / filename).exists():
-                    return filename
+        file_info = raw_git_status.get(filename)
+        if file_info is not None and 'D' in file_info.status:
+            return filename
         
         return None
     
-    def stage_files(self, repo_path: str, raw_git_status: List[Dict], 
-                   selected_indices: List[int], log_func: Callable) -> Tuple[int, List[str]]:
-        """Stage selected files"""
-        files_to_add = []
-        deleted_files = []
-        renamed_files = []
+    def _collect_stage_items(self, repo_path: str, raw_git_status: StatusList,
+                             selected_indices: List[int]) -> List[Dict[str, Any]]:
+        """Turn selected status rows into stage items with their pathspecs"""
+        items = []
         
         for i in selected_indices:
             if i < len(raw_git_status):
                 file_info = raw_git_status[i]
-                status_code = file_info['status']
-                filename = file_info['filename']
-                file_type = file_info.get('type', 'regular')
+                status_code = file_info.status
+                filename = file_info.filename
+                file_type = file_info.type
                 
                 if file_type == 'renamed':
-                    old_filename = file_info.get('old_filename')
+                    old_filename = file_info.old_filename
                     if old_filename:
-                        renamed_files.append((old_filename, filename))
+                        # A rename already recorded in the index has no old path left to stage
+                        paths = [filename] if file_info.index_status in 'RC' else [old_filename, filename]
+                        items.append({
+                            'kind': 'renamed',
+                            'filename': filename,
+                            'old_filename': old_filename,
+                            'paths': paths
+                        })
                 elif 'D' in status_code:
-                    deleted_files.append(filename)
+                    items.append({'kind': 'deleted', 'filename': filename, 'paths': [filename]})
                 else:
-                    files_to_add.append(filename)
+                    actual_file = self.find_exact_file(repo_path, filename, raw_git_status)
+                    items.append({
+                        'kind': 'regular' if actual_file else 'missing',
+                        'filename': actual_file or filename,
+                        'paths': [actual_file or filename]
+                    })
+        
+        return items
+    
+    def _stage_pathspecs(self, repo_path: str, paths: List[str]) -> Tuple[bool, str]:
+        """Stage additions, modifications and deletions of paths in one git call"""
+        # Paths are fed NUL-separated on stdin, so selection size does not
+        # affect the number of processes or the command line length
+        success, output = self._run_with_lock_retry(
+            ["git", "--literal-pathspecs", "add", "-A",
+             "--pathspec-from-file=-", "--pathspec-file-nul"],
+            cwd=repo_path,
+            input=b"\0".join(os.fsencode(path) for path in paths)
+        )
+        return success, output.decode('utf-8', errors='replace').strip()
+    
+    def _stage_items(self, repo_path: str,
+                     items: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], str]]]:
+        """Stage items in a batch, returning (staged, [(failed, output)]).
+
+        git add applies all pathspecs or none, so a failing batch is split in
+        half until the offending items are isolated. A single bad path costs
+        O(log n) extra invocations instead of one per file.
+        """
+        if not items:
+            return [], []
+        
+        paths = [path for item in items for path in item['paths']]
+        success, output = self._stage_pathspecs(repo_path, paths)
+        if success:
+            return items, []
+        if len(items) == 1 or self.is_lock_contention(output):
+            # Splitting cannot help while another process holds index.lock
+            return [], [(item, output) for item in items]
+        
+        middle = len(items) // 2
+        staged_left, failed_left = self._stage_items(repo_path, items[:middle])
+        staged_right, failed_right = self._stage_items(repo_path, items[middle:])
+        return staged_left + staged_right, failed_left + failed_right
+    
+    def stage_files(self, repo_path: str, raw_git_status: StatusList, 
+                   selected_indices: List[int], log_func: Callable) -> Tuple[int, List[str]]:
+        """Stage selected files"""
+        items = self._collect_stage_items(repo_path, raw_git_status, selected_indices)
+        with self.repo_lock(repo_path).write():
+            staged, failed = self._stage_items(repo_path, items)
         
-        success_count = 0
+        success_count = len(staged)
         error_messages = []
         
-        # Handle deleted files
-        for filename in deleted_files:
-            success_rm, output_rm = self.run_git_command(
-                ["git", "rm", filename],
-                cwd=repo_path
-            )
-            if success_rm:
-                success_count += 1
+        for item in staged:
+            filename = display_path(item['filename'])
+            if item['kind'] == 'renamed':
+                log_func(f"🔄 Staged rename: {display_path(item['old_filename'])} → {filename}", "success")
+            elif item['kind'] == 'deleted':
                 log_func(f"🗑️ Staged deletion: {filename}", "success")
             else:
-                # Fallback to add for deleted files
-                success_add, _ = self.run_git_command(
-                    ["git", "add", "--", filename],
-                    cwd=repo_path
-                )
-                if success_add:
-                    success_count += 1
-                    log_func(f"✅ Staged: {filename}", "success")
-                else:
-                    error_messages.append(f"Failed to stage {filename}")
-                    log_func(f"❌ Failed to stage: {filename}", "error")
+                log_func(f"✅ Staged: {filename}", "success")
         
-        # Handle renamed files
-        for old_file, new_file in renamed_files:
-            success_rm, _ = self.run_git_command(
-                ["git", "rm", "--", old_file],
-                cwd=repo_path
-            )
-            success_add, _ = self.run_git_command(
-                ["git", "add", "--", new_file],
-                cwd=repo_path
-            )
-            if success_rm and success_add:
-                success_count += 1
-                log_func(f"🔄 Staged rename: {old_file} → {new_file}", "success")
+        for item, output in failed:
+            filename = display_path(item['filename'])
+            if item['kind'] == 'renamed':
+                error_messages.append(f"Failed to stage rename: {display_path(item['old_filename'])} → {filename}")
+                log_func(f"❌ Failed rename: {display_path(item['old_filename'])} → {filename}", "error")
+            elif item['kind'] == 'deleted':
+                error_messages.append(f"Failed to stage {filename}")
+                log_func(f"❌ Failed to stage: {filename}", "error")
+            elif item['kind'] == 'regular':
+                error_messages.append(f"Failed to add {filename}")
+                log_func(f"❌ Failed to add: {filename}\n{output}", "error")
             else:
-                error_messages.append(f"Failed to stage rename: {old_file} → {new_file}")
-                log_func(f"❌ Failed rename: {old_file} → {new_file}", "error")
-        
-        # Handle other files
-        for filename in files_to_add:
-            actual_file = self.find_exact_file(repo_path, filename, raw_git_status)
-            
-            if actual_file:
-                success_add, output_add = self.run_git_command(
-                    ["git", "add", "--", actual_file],
-                    cwd=repo_path
-                )
-                
-                if success_add:
-                    success_count += 1
-                    log_func(f"✅ Staged: {actual_file}", "success")
-                else:
-                    error_messages.append(f"Failed to add {actual_file}")
-                    log_func(f"❌ Failed to add: {actual_file}\n{output_add}", "error")
-            else:
-                # Try adding as-is
-                success_add, output_add = self.run_git_command(
-                    ["git", "add", "--", filename],
-                    cwd=repo_path
-                )
-                if success_add:
-                    success_count += 1
-                    log_func(f"✅ Staged: {filename}", "success")
-                else:
-                    log_func(f"❌ File not found: {filename}", "error")
-                    error_messages.append(f"File not found: {filename}")
+                log_func(f"❌ File not found: {filename}", "error")
+                error_messages.append(f"File not found: {filename}")
         
         return success_count, error_messages
     
-    def auto_stage_files(self, repo_path: str, raw_git_status: List[Dict],
+    def auto_stage_files(self, repo_path: str, raw_git_status: StatusList,
                         selected_indices: List[int], log_func: Callable) -> int:
         """Auto stage files for AI generation"""
-        files_to_add = []
-        deleted_files = []
-        renamed_files = []
+        items = self._collect_stage_items(repo_path, raw_git_status, selected_indices)
+        with self.repo_lock(repo_path).write():
+            staged, _ = self._stage_items(repo_path, items)
         
-        for i in selected_indices:
-            if i < len(raw_git_status):
-                file_info = raw_git_status[i]
-                status_code = file_info['status']
-                filename = file_info['filename']
-                file_type = file_info.get('type', 'regular')
-                
-                if file_type == 'renamed':
-                    old_filename = file_info.get('old_filename')
-                    if old_filename:
-                        renamed_files.append((old_filename, filename))
-                elif 'D' in status_code:
-                    deleted_files.append(filename)
-                else:
-                    files_to_add.append(filename)
-        
-        # Handle deleted files
-        for filename in deleted_files:
-            success_rm, _ = self.run_git_command(["git", "rm", filename], cwd=repo_path)
-            if success_rm:
+        for item in staged:
+            filename = display_path(item['filename'])
+            if item['kind'] == 'renamed':
+                log_func(f"🔄 Staged rename: {display_path(item['old_filename'])} → {filename}")
+            elif item['kind'] == 'deleted':
                 log_func(f"🗑️ Staged deletion: {filename}")
+            elif item['kind'] == 'regular':
+                log_func(f"✅ Staged: {filename}")
         
-        # Handle renamed files
-        for old_file, new_file in renamed_files:
-            self.run_git_command(["git", "rm", "--", old_file], cwd=repo_path)
-            self.run_git_command(["git", "add", "--", new_file], cwd=repo_path)
-            log_func(f"🔄 Staged rename: {old_file} → {new_file}")
-        
-        # Handle other files
-        for filename in files_to_add:
-            actual_file = self.find_exact_file(repo_path, filename, raw_git_status)
-            if actual_file:
-                success_add, _ = self.run_git_command(["git", "add", "--", actual_file], cwd=repo_path)
-                if success_add:
-                    log_func(f"✅ Staged: {actual_file}")
-            else:
-                self.run_git_command(["git", "add", "--", filename], cwd=repo_path)
-        
-        return len(files_to_add) + len(deleted_files) + len(renamed_files)
+        return len(items)
     
-    def get_staged_diff(self, repo_path: str) -> Tuple[bool, Optional[str]]:
-        """Get staged diff for AI analysis"""
-        success, diff = self.run_git_command(["git", "diff", "--cached"], cwd=repo_path)
+    def stream_git_command(self, command: List[str], cwd: Optional[str] = None,
+                           chunk_size: int = 64 * 1024, timeout: float = 30) -> Iterator[bytes]:
+        """Yield raw stdout chunks of a git command as they are produced.
+
+        Closing the generator early (or ``timeout`` expiring) kills git, so
+        callers can stop reading once they have enough output. Raises
+        ``RuntimeError`` if git exits with an error. The command must be
+        read-only: the repository's read lock is held until the generator
+        finishes or is closed.
+        """
+        with self.repo_lock(cwd).read():
+            yield from self._stream_output(command, cwd, chunk_size, timeout)
+    
+    def _stream_output(self, command: List[str], cwd: Optional[str],
+                       chunk_size: int, timeout: float) -> Iterator[bytes]:
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            stdin=subprocess.DEVNULL,
+            cwd=cwd,
+            **self._console_kwargs()
+        )
+        timer = threading.Timer(timeout, process.kill)
+        timer.daemon = True
+        timer.start()
+        finished = False
+        try:
+            while True:
+                chunk = process.stdout.read1(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+            finished = True
+        finally:
+            timer.cancel()
+            if not finished:
+                process.kill()
+            process.stdout.close()
+            stderr = process.stderr.read() if finished else b""
+            process.stderr.close()
+            returncode = process.wait()
         
-        if not success:
+        if returncode != 0:
+            raise RuntimeError(stderr.decode('utf-8', errors='replace').strip()
+                               or f"git exited with status {returncode}")
+    
+    def read_staged_diff(self, repo_path: str, max_bytes: Optional[int] = None) -> Tuple[bool, Optional[StagedDiff]]:
+        """Read the staged diff incrementally, stopping at ``max_bytes``.
+
+        Once the budget is reached git is killed instead of producing the
+        rest of the diff, and the result records which files were cut or
+        left out.
+        """
+        chunks = []
+        total = 0
+        truncated = False
+        stream = self.stream_git_command(["git", "diff", "--cached"], cwd=repo_path)
+        try:
+            for chunk in stream:
+                if max_bytes is not None and total + len(chunk) > max_bytes:
+                    chunks.append(chunk[:max_bytes - total])
+                    total = max_bytes
+                    truncated = True
+                    break
+                chunks.append(chunk)
+                total += len(chunk)
+        except (OSError, RuntimeError):
             return False, None
+        finally:
+            stream.close()
         
-        # Handle case where diff might be None or empty
-        if diff is None:
-            return False, None
-            
-        diff = diff.strip()
-        if not diff:
-            return True, ""  # Return empty string instead of None
+        data = b"".join(chunks)
+        if truncated:
+            # Cut back to a line boundary so the model does not see half a line
+            newline = data.rfind(b"\n")
+            if newline > 0:
+                data = data[:newline + 1]
+        
+        staged = StagedDiff(
+            text=data.decode('utf-8', errors='replace').strip(),
+            truncated=truncated,
+            bytes_read=len(data)
+        )
+        
+        success, names = self.run_git_read_bytes(["git", "diff", "--cached", "--name-only", "-z"], cwd=repo_path)
+        if success:
+            staged.files = list(split_z(names))
+        
+        if truncated and staged.files:
+            # Name order matches diff order, so count the file headers we kept
+            shown = data.count(b"\ndiff --git ") + (1 if data.startswith(b"diff --git ") else 0)
+            if shown:
+                staged.partial_files = [staged.files[min(shown, len(staged.files)) - 1]]
+            staged.omitted_files = staged.files[shown:]
         
-        return True, diff
+        return True, staged
     
     def commit_changes(self, repo_path: str, message: str) -> Tuple[bool, str]:
         """Commit staged changes"""
-        return self.run_git_command(["git", "commit", "-m", message], cwd=repo_path)
+        return self.run_git_write(["git", "commit", "-m", message], cwd=repo_path)
     
     def push_changes(self, repo_path: str, github_username: str, 
-                    github_token: str, log_func: Callable) -> Tuple[bool, str]:
-        """Push changes to remote"""
+                    github_token: str, log_func: Callable,
+                    cancel_event: Optional[threading.Event] = None) -> Tuple[bool, str]:
+        """Push changes to remote; setting ``cancel_event`` aborts the push"""
         # Configure GitHub credentials if provided
         if github_username:
-            self.run_git_command(["git", "config", "user.name", github_username], cwd=repo_path)
+            self.run_git_write(["git", "config", "user.name", github_username], cwd=repo_path)
         
         # Get current branch
-        success, branch = self.run_git_command(["git", "branch", "--show-current"], cwd=repo_path)
+        success, branch = self.run_git_read(["git", "branch", "--show-current"], cwd=repo_path)
         if not success:
             return False, "Failed to get branch name"
         
         branch = branch.strip()
         log_func(f"🚀 Pushing to origin/{branch}...")
         
-        # Push to remote
-        return self.run_git_command(["git", "push", "origin", branch], cwd=repo_path)
\ No newline at end of file
+        # Push never touches the index, so staging may go on meanwhile; the
+        # read lock only keeps a commit from moving the branch mid-push
+        return self.run_git_read(["git", "push", "origin", branch], cwd=repo_path, cancel_event=cancel_event)
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""
+Parser for `git status --porcelain=v2 -z` output
+"""
+
+import os
+from typing import Optional, Dict, Iterator, Iterable, Union
+
+
+class StatusEntry:
+    """One changed path from porcelain v2 status.
+
+    ``kind`` is the record type: ``1`` (ordinary change), ``2`` (rename or
+    copy), ``u`` (unmerged), ``?`` (untracked) or ``!`` (ignored). ``xy``
+    holds the index and worktree status letters with ``.`` for unmodified.
+    """
+
+    __slots__ = (
+        'kind', 'xy', 'path', 'orig_path', 'submodule',
+        'mode_head', 'mode_index', 'mode_worktree', 'score'
+    )
+
+    def __init__(self, kind: str, xy: str, path: str, orig_path: Optional[str] = None,
+                 submodule: str = "N...", mode_head: str = "", mode_index: str = "",
+                 mode_worktree: str = "", score: int = 0):
+        self.kind = kind
+        self.xy = xy
+        self.path = path
+        self.orig_path = orig_path
+        self.submodule = submodule
+        self.mode_head = mode_head
+        self.mode_index = mode_index
+        self.mode_worktree = mode_worktree
+        self.score = score
+
+    @property
+    def index_status(self) -> str:
+        return self.xy[0]
+
+    @property
+    def worktree_status(self) -> str:
+        return self.xy[1]
+
+    @property
+    def status(self) -> str:
+        """Short status code in the style of porcelain v1 (e.g. ``M``, ``??``)"""
+        return self.xy.replace('.', ' ').strip()
+
+    @property
+    def filename(self) -> str:
+        return self.path
+
+    @property
+    def old_filename(self) -> Optional[str]:
+        return self.orig_path
+
+    @property
+    def type(self) -> str:
+        """``renamed``, ``copied`` or ``regular``"""
+        if self.kind == '2':
+            return 'copied' if 'C' in self.xy else 'renamed'
+        return 'regular'
+
+    def __repr__(self) -> str:
+        if self.orig_path is not None:
+            return f"StatusEntry({self.xy!r}, {self.orig_path!r} -> {self.path!r})"
+        return f"StatusEntry({self.xy!r}, {self.path!r})"
+
+
+class StatusList(list):
+    """List of status entries with a path index for O(1) lookups"""
+
+    def __init__(self, entries: Iterable[StatusEntry] = ()):
+        super().__init__()
+        self.by_path: Dict[str, StatusEntry] = {}
+        for entry in entries:
+            self.append(entry)
+
+    def append(self, entry: StatusEntry):
+        super().append(entry)
+        self.by_path[entry.path] = entry
+
+    def get(self, path: str) -> Optional[StatusEntry]:
+        return self.by_path.get(path)
+
+
+def _iter_fields(output: bytes) -> Iterator[bytes]:
+    """Yield NUL-terminated fields without splitting the whole output up front"""
+    start = 0
+    length = len(output)
+    while start < length:
+        end = output.find(b'\0', start)
+        if end == -1:
+            end = length
+        yield output[start:end]
+        start = end + 1
+
+
+def split_z(output: bytes) -> Iterator[str]:
+    """Decode the non-empty NUL-terminated paths of a ``-z`` listing.
+
+    Paths are decoded with ``os.fsdecode``, so names that are not valid
+    UTF-8 survive the round trip back to git (``os.fsencode`` or a command
+    line argument) instead of being replaced.
+    """
+    for field in _iter_fields(output):
+        if field:
+            yield os.fsdecode(field)
+
+
+def display_path(path: str) -> str:
+    """Printable form of a decoded path; undecodable bytes become U+FFFD"""
+    return os.fsencode(path).decode('utf-8', errors='replace')
+
+
+def _ascii(field: bytes) -> str:
+    return field.decode('ascii', errors='replace')
+
+
+def iter_porcelain_v2(output: Union[bytes, str]) -> Iterator[StatusEntry]:
+    """Parse `git status --porcelain=v2 -z` output into status entries.
+
+    Paths are taken verbatim from NUL-terminated fields, so names with
+    spaces, quotes, arrows or non-ASCII characters need no unquoting.
+    Raw bytes from ``git`` are preferred: only the status letters, modes
+    and paths of each record are decoded, and object names are skipped.
+    Header lines (``#``) are skipped.
+    """
+    if isinstance(output, str):
+        output = output.encode('utf-8', errors='surrogateescape')
+
+    fields = _iter_fields(output)
+    for field in fields:
+        if not field:
+            continue
+
+        kind = field[:1]
+        if kind == b'1':
+            # 1 XY sub mH mI mW hH hI path
+            parts = field.split(b' ', 8)
+            if len(parts) < 9:
+                continue
+            yield StatusEntry(
+                '1', _ascii(parts[1]), os.fsdecode(parts[8]), submodule=_ascii(parts[2]),
+                mode_head=_ascii(parts[3]), mode_index=_ascii(parts[4]), mode_worktree=_ascii(parts[5])
+            )
+        elif kind == b'2':
+            # 2 XY sub mH mI mW hH hI Xscore path, followed by origPath field
+            parts = field.split(b' ', 9)
+            if len(parts) < 10:
+                continue
+            orig_path = next(fields, None)
+            score_field = parts[8]
+            score = int(score_field[1:]) if score_field[1:].isdigit() else 0
+            yield StatusEntry(
+                '2', _ascii(parts[1]), os.fsdecode(parts[9]),
+                orig_path=os.fsdecode(orig_path) if orig_path is not None else None,
+                submodule=_ascii(parts[2]),
+                mode_head=_ascii(parts[3]), mode_index=_ascii(parts[4]), mode_worktree=_ascii(parts[5]),
+                score=score
+            )
+        elif kind == b'u':
+            # u XY sub m1 m2 m3 mW h1 h2 h3 path
+            parts = field.split(b' ', 10)
+            if len(parts) < 11:
+                continue
+            yield StatusEntry(
+                'u', _ascii(parts[1]), os.fsdecode(parts[10]), submodule=_ascii(parts[2]),
+                mode_head=_ascii(parts[3]), mode_index=_ascii(parts[5]), mode_worktree=_ascii(parts[6])
+            )
+        elif kind == b'?':
+            yield StatusEntry('?', '??', os.fsdecode(field[2:]))
+        elif kind == b'!':
+            yield StatusEntry('!', '!!', os.fsdecode(field[2:]))
+
+
+def parse_porcelain_v2(output: Union[bytes, str]) -> StatusList:
+    """Parse porcelain v2 output into an indexed status list"""
+    return StatusList(iter_porcelain_v2(output))
@@ -0,0 +1,207 @@
+"""
+Offline commit message generator based on file paths and line counts
+"""
+
+import posixpath
+from collections import Counter
+from typing import Optional, List
+
+from src.core.git_status import StatusList
+from src.core.prompt_builder import LOCKFILE_NAMES
+from src.core.staged_diff import FileStat
+
+TEST_DIRS = {"test", "tests", "__tests__", "spec", "specs", "testing"}
+
+DOC_DIRS = {"doc", "docs", "documentation"}
+
+DOC_SUFFIXES = (".md", ".rst", ".adoc", ".txt")
+
+DOC_NAMES = {"README", "LICENSE", "CHANGELOG", "CONTRIBUTING", "AUTHORS", "NOTICE", "COPYING"}
+
+CONFIG_DIRS = {".github", ".circleci", ".gitlab", ".devcontainer", ".vscode"}
+
+CONFIG_SUFFIXES = (".yml", ".yaml", ".toml", ".cfg", ".ini", ".json", ".conf", ".lock", ".spec")
+
+CONFIG_NAMES = LOCKFILE_NAMES | {
+    "Dockerfile",
+    "Makefile",
+    "setup.py",
+    "requirements.txt",
+    "requirements-dev.txt",
+    "package.json",
+    "tsconfig.json",
+    "noxfile.py",
+    ".gitignore",
+    ".gitattributes",
+    ".editorconfig",
+    ".dockerignore",
+    ".pre-commit-config.yaml"
+}
+
+# Directory names too generic to use as a commit scope
+GENERIC_DIRS = {"src", "lib", "app", "pkg", "source", "sources"} | TEST_DIRS | DOC_DIRS
+
+# Total changed lines up to which a modification is treated as a fix
+SMALL_CHANGE_LINES = 10
+
+# Files listed in the message body
+MAX_BODY_FILES = 10
+
+MAX_SUBJECT_LENGTH = 72
+
+CHANGE_VERBS = {
+    "added": "add",
+    "deleted": "remove",
+    "renamed": "rename",
+    "copied": "copy",
+    "modified": "update",
+    "type changed": "update"
+}
+
+
+def classify_role(path: str) -> str:
+    """Classify a path as test, docs, config or source"""
+    parts = path.replace('\\', '/').split('/')
+    name = parts[-1]
+    stem = name.split('.')[0]
+    dirs = parts[:-1]
+
+    if (any(part in TEST_DIRS for part in dirs) or stem.startswith("test_")
+            or stem.endswith(("_test", "_spec")) or ".test." in name or ".spec." in name):
+        return "test"
+    if name in CONFIG_NAMES or any(part in CONFIG_DIRS for part in dirs):
+        return "config"
+    if any(part in DOC_DIRS for part in dirs) or stem.upper() in DOC_NAMES or name.endswith(DOC_SUFFIXES):
+        return "docs"
+    if name.endswith(CONFIG_SUFFIXES):
+        return "config"
+    return "source"
+
+
+def stats_from_status(status: StatusList) -> List[FileStat]:
+    """Line-count-free file stats from porcelain status entries"""
+    stats = []
+    for entry in status:
+        if entry.kind == '?' or 'A' in entry.xy:
+            change = "added"
+        elif 'D' in entry.xy:
+            change = "deleted"
+        elif entry.kind == '2':
+            change = entry.type
+        else:
+            change = "modified"
+        stats.append(FileStat(path=entry.path, old_path=entry.orig_path, change=change))
+    return stats
+
+
+def _commit_type(stats: List[FileStat], roles: List[str]) -> str:
+    role_set = set(roles)
+    if role_set == {"test"}:
+        return "test"
+    if role_set == {"docs"}:
+        return "docs"
+    if role_set <= {"config", "docs"}:
+        return "chore"
+
+    changes = Counter(stat.change for stat in stats)
+    if set(changes) <= {"renamed", "deleted"}:
+        return "refactor"
+    added = sum(stat.added for stat in stats)
+    deleted = sum(stat.deleted for stat in stats)
+    if changes["added"] or added > 2 * deleted:
+        return "feat"
+    if added + deleted <= SMALL_CHANGE_LINES:
+        return "fix"
+    return "refactor"
+
+
+def _scope(paths: List[str]) -> Optional[str]:
+    """Last meaningful directory shared by all paths, or the file stem for one file"""
+    dirs = [posixpath.dirname(path.replace('\\', '/')) for path in paths]
+    try:
+        common = posixpath.commonpath(dirs) if all(dirs) else ""
+    except ValueError:
+        common = ""
+
+    for part in reversed(common.split('/')):
+        if part and part not in GENERIC_DIRS and not part.startswith('.'):
+            return part
+    if len(paths) == 1:
+        stem = posixpath.basename(paths[0]).split('.')[0]
+        if stem.startswith("test_"):
+            stem = stem[len("test_"):]
+        elif stem.endswith(("_test", "_spec")):
+            stem = stem[:-len("_test")]
+        return stem or None
+    return None
+
+
+def _subject(stats: List[FileStat]) -> str:
+    changes = Counter(stat.change for stat in stats)
+    # Most common change kind, ties broken by the order of CHANGE_VERBS
+    change = max(CHANGE_VERBS, key=lambda kind: (changes[kind], -list(CHANGE_VERBS).index(kind)))
+    verb = CHANGE_VERBS[change]
+    if change == "renamed" and all(
+        posixpath.basename(stat.path) == posixpath.basename(stat.old_path or "")
+        for stat in stats if stat.change == "renamed"
+    ):
+        verb = "move"
+
+    matching = [stat for stat in stats if stat.change == change]
+    names = [posixpath.basename(stat.path) for stat in matching]
+    if len(stats) == 1:
+        target = names[0]
+    elif len(stats) == 2 and len(matching) == 2:
+        target = f"{names[0]} and {names[1]}"
+    elif len(matching) == len(stats):
+        target = f"{len(stats)} files"
+    elif len(matching) == 1:
+        more = len(stats) - 1
+        target = f"{names[0]} and {more} more file{'s' if more > 1 else ''}"
+    else:
+        target = f"{len(stats)} files"
+    return f"{verb} {target}"
+
+
+def generate_heuristic_message(stats: List[FileStat], status: Optional[StatusList] = None) -> str:
+    """Derive a conventional commit message from staged file stats.
+
+    The type comes from the kind of files touched (tests, docs, config) and
+    how they changed, the scope from their common directory and the subject
+    from the dominant change. When ``stats`` is empty the porcelain
+    ``status`` is used instead. Deterministic and local, so it returns
+    instantly without a network or API key.
+    """
+    if not stats and status:
+        stats = stats_from_status(status)
+    if not stats:
+        return ""
+
+    # Most significant changes first; path order keeps the result stable
+    stats = sorted(stats, key=lambda stat: (-stat.churn, stat.path))
+    roles = [classify_role(stat.path) for stat in stats]
+    commit_type = _commit_type(stats, roles)
+
+    # Scope and subject follow the source files when there are any
+    focus = [stat for stat, role in zip(stats, roles) if role == "source"]
+    if commit_type in ("test", "docs", "chore") or not focus:
+        focus = stats
+
+    scope = _scope([stat.path for stat in focus])
+    header = f"{commit_type}({scope})" if scope else commit_type
+    subject = f"{header}: {_subject(focus)}"
+    if len(subject) > MAX_SUBJECT_LENGTH:
+        subject = subject[:MAX_SUBJECT_LENGTH - 3].rstrip() + "..."
+
+    if len(stats) == 1:
+        return subject
+
+    lines = []
+    for stat in stats[:MAX_BODY_FILES]:
+        verb = CHANGE_VERBS.get(stat.change, "update")
+        name = f"{stat.old_path} → {stat.path}" if stat.old_path else stat.path
+        counts = "" if stat.binary or not stat.churn else f" (+{stat.added} -{stat.deleted})"
+        lines.append(f"- {verb} {name}{counts}")
+    if len(stats) > MAX_BODY_FILES:
+        lines.append(f"- ... and {len(stats) - MAX_BODY_FILES} more")
+    return subject + "\n\n" + "\n".join(lines)
@@ -0,0 +1,162 @@
+"""
+Instrumentation of AI requests with rolling percentiles and a JSONL log
+"""
+
+import os
+import json
+import math
+import time
+import threading
+from collections import deque
+from dataclasses import dataclass, asdict, field
+from typing import Optional, Dict, List, Tuple, Deque
+
+# Requests per model kept in memory for percentiles
+DEFAULT_WINDOW = 200
+
+# Rotate the JSONL file once it grows past this size, keeping this many old files
+DEFAULT_MAX_BYTES = 1024 * 1024
+DEFAULT_BACKUP_COUNT = 3
+
+
+@dataclass
+class RequestRecord:
+    """One AI request or cache hit.
+
+    ``kind`` is message, summary (a map-reduce chunk) or candidates;
+    ``status`` is ok, error or cancelled. Token counts are local estimates.
+    ``ttft`` (time to first token) is only known for streamed requests, and
+    ``latency`` includes time spent queued behind rate limits.
+    """
+
+    provider: str
+    model: str
+    kind: str = "message"
+    prompt_bytes: int = 0
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    ttft: Optional[float] = None
+    latency: float = 0.0
+    retries: int = 0
+    cache_hit: bool = False
+    status: str = "ok"
+    error: str = ""
+    timestamp: float = field(default_factory=time.time)
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of ``values`` (``fraction`` between 0 and 1)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = min(max(1, math.ceil(fraction * len(ordered))), len(ordered))
+    return ordered[rank - 1]
+
+
+class _ModelWindow:
+    """Recent samples for one provider, model and request kind"""
+
+    def __init__(self, window: int):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.ttfts: Deque[float] = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.cache_hits = 0
+
+
+class MetricsRecorder:
+    """Collect request records in memory and append them to a JSONL file.
+
+    Percentiles are computed over the last ``window`` successful provider
+    requests per provider, model and kind; cache hits only count towards the
+    hit rate. The log
+    file is rotated like a logging ``RotatingFileHandler``: once it exceeds
+    ``max_bytes`` it becomes ``<name>.1`` and at most ``backup_count`` old
+    files are kept. Without a ``log_file`` nothing is written to disk.
+    """
+
+    def __init__(self, log_file: Optional[str] = None, window: int = DEFAULT_WINDOW,
+                 max_bytes: int = DEFAULT_MAX_BYTES, backup_count: int = DEFAULT_BACKUP_COUNT):
+        self.log_file = log_file
+        self.window = window
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+        self._models: Dict[Tuple[str, str, str], _ModelWindow] = {}
+
+    def record(self, record: RequestRecord):
+        """Add a record to the rolling windows and the log file"""
+        with self._lock:
+            key = (record.provider, record.model, record.kind)
+            stats = self._models.get(key)
+            if stats is None:
+                stats = self._models[key] = _ModelWindow(self.window)
+
+            if record.cache_hit:
+                stats.cache_hits += 1
+            else:
+                stats.requests += 1
+                stats.retries += record.retries
+                if record.status == "error":
+                    stats.errors += 1
+                elif record.status == "ok":
+                    stats.latencies.append(record.latency)
+                    if record.ttft is not None:
+                        stats.ttfts.append(record.ttft)
+
+            if self.log_file:
+                self._write(record)
+
+    def summary(self) -> Dict[Tuple[str, str, str], Dict[str, Optional[float]]]:
+        """Latency percentiles (seconds) and counters per (provider, model, kind)"""
+        with self._lock:
+            snapshot = {
+                key: (list(stats.latencies), list(stats.ttfts), stats.requests,
+                      stats.errors, stats.retries, stats.cache_hits)
+                for key, stats in self._models.items()
+            }
+
+        summary = {}
+        for key, (latencies, ttfts, requests, errors, retries, cache_hits) in snapshot.items():
+            summary[key] = {
+                "requests": requests,
+                "errors": errors,
+                "retries": retries,
+                "cache_hits": cache_hits,
+                "p50": percentile(latencies, 0.5),
+                "p95": percentile(latencies, 0.95),
+                "ttft_p50": percentile(ttfts, 0.5),
+                "ttft_p95": percentile(ttfts, 0.95)
+            }
+        return summary
+
+    def reset(self):
+        """Forget the in-memory windows; the log file is kept"""
+        with self._lock:
+            self._models.clear()
+
+    def _write(self, record: RequestRecord):
+        """Append one JSON line, rotating first if the file is full (lock held)"""
+        line = json.dumps(asdict(record), ensure_ascii=False) + "\n"
+        try:
+            directory = os.path.dirname(self.log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if self.max_bytes and os.path.exists(self.log_file) \
+                    and os.path.getsize(self.log_file) + len(line) > self.max_bytes:
+                self._rotate()
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+        except OSError as e:
+            print(f"Error writing AI metrics: {e}")
+
+    def _rotate(self):
+        if self.backup_count <= 0:
+            os.remove(self.log_file)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.log_file}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.log_file}.{index + 1}")
+        os.replace(self.log_file, f"{self.log_file}.1")
@@ -0,0 +1,142 @@
+"""
+Model capabilities, token estimation and prompt budget planning
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict
+
+
+@dataclass(frozen=True)
+class ModelCapabilities:
+    """Limits and relative speed of one model.
+
+    ``tier`` is lite, standard or large; ``latency`` is relative to a
+    typical standard model (1.0). Reasoning models spend output tokens on
+    hidden reasoning and take ``max_completion_tokens`` instead of
+    ``max_tokens`` on the OpenAI API.
+    """
+
+    context_tokens: int
+    max_output_tokens: int
+    tier: str = "standard"
+    latency: float = 1.0
+    reasoning: bool = False
+
+
+MODEL_CAPABILITIES: Dict[str, ModelCapabilities] = {
+    # Gemini
+    "gemini-2.5-pro": ModelCapabilities(1_048_576, 65_536, "large", 3.0, True),
+    "gemini-2.5-flash": ModelCapabilities(1_048_576, 65_536, "standard", 1.0, True),
+    "gemini-2.5-flash-lite": ModelCapabilities(1_048_576, 65_536, "lite", 0.5),
+    "gemini-2.0-flash": ModelCapabilities(1_048_576, 8_192, "standard", 0.8),
+    "gemini-2.0-flash-lite": ModelCapabilities(1_048_576, 8_192, "lite", 0.5),
+    "gemini-1.5-pro": ModelCapabilities(2_097_152, 8_192, "large", 2.0),
+    "gemini-1.5-flash": ModelCapabilities(1_048_576, 8_192, "standard", 0.8),
+    "gemini-1.0-ultra": ModelCapabilities(32_768, 2_048, "large", 3.0),
+    "gemini-1.0-pro": ModelCapabilities(32_760, 8_192, "standard", 1.0),
+    "gemini-1.0-nano": ModelCapabilities(32_768, 2_048, "lite", 0.5),
+    # OpenAI
+    "gpt-5": ModelCapabilities(400_000, 128_000, "large", 3.0, True),
+    "gpt-5-mini": ModelCapabilities(400_000, 128_000, "standard", 1.5, True),
+    "gpt-5-nano": ModelCapabilities(400_000, 128_000, "lite", 1.0, True),
+    "gpt-5-chat": ModelCapabilities(128_000, 16_384, "standard", 1.0),
+    "gpt-5-codex": ModelCapabilities(400_000, 128_000, "large", 3.0, True),
+    "gpt-4.1": ModelCapabilities(1_047_576, 32_768, "large", 1.5),
+    "gpt-4.1-mini": ModelCapabilities(1_047_576, 32_768, "standard", 0.8),
+    "gpt-4.1-nano": ModelCapabilities(1_047_576, 32_768, "lite", 0.5),
+    "gpt-4.5": ModelCapabilities(128_000, 16_384, "large", 3.0),
+    "gpt-4o": ModelCapabilities(128_000, 16_384, "standard", 1.0),
+    "gpt-4o-mini": ModelCapabilities(128_000, 16_384, "lite", 0.7),
+    "gpt-4": ModelCapabilities(8_192, 8_192, "large", 2.0),
+    "gpt-3.5-turbo": ModelCapabilities(16_385, 4_096, "lite", 0.6),
+    "o1": ModelCapabilities(200_000, 100_000, "large", 4.0, True),
+    "o1-mini": ModelCapabilities(128_000, 65_536, "standard", 2.0, True),
+    "o1-pro": ModelCapabilities(200_000, 100_000, "large", 8.0, True),
+    "o3": ModelCapabilities(200_000, 100_000, "large", 4.0, True),
+    "o3-mini": ModelCapabilities(200_000, 100_000, "standard", 2.0, True),
+    "o3-mini-high": ModelCapabilities(200_000, 100_000, "standard", 3.0, True),
+    "o3-pro": ModelCapabilities(200_000, 100_000, "large", 8.0, True),
+    "o4-mini": ModelCapabilities(200_000, 100_000, "standard", 2.0, True),
+    "o4-mini-high": ModelCapabilities(200_000, 100_000, "standard", 3.0, True),
+    "gpt-oss-120b": ModelCapabilities(131_072, 32_768, "standard", 1.5, True),
+    "gpt-oss-20b": ModelCapabilities(131_072, 32_768, "lite", 1.0, True),
+}
+
+# Used for models missing from the table (e.g. custom OpenAI-compatible endpoints)
+DEFAULT_CAPABILITIES = ModelCapabilities(32_768, 4_096, "standard", 1.0)
+
+# Upper bound on prompt tokens per tier, so huge windows do not mean huge prompts
+TIER_PROMPT_TOKENS = {"lite": 4_000, "standard": 16_000, "large": 48_000}
+
+# Output tokens requested for a commit message, and for reasoning models,
+# which also spend output tokens on hidden reasoning
+MESSAGE_OUTPUT_TOKENS = 200
+REASONING_OUTPUT_TOKENS = 4_000
+
+# Conservative bytes per token for code diffs, used to turn token budgets
+# into byte budgets for the prompt builder
+BYTES_PER_TOKEN = 3
+
+# Roughly one token per short word piece, number group, punctuation run or line break
+_TOKEN_PIECES = re.compile(r"[^\W\d_]{1,6}|\d{1,3}|_+|[^\w\s]{1,2}|\n")
+
+
+def get_capabilities(model_name: str) -> ModelCapabilities:
+    """Capabilities of a model, matching dated or suffixed names by their longest known prefix"""
+    capabilities = MODEL_CAPABILITIES.get(model_name)
+    if capabilities is not None:
+        return capabilities
+    for name in sorted(MODEL_CAPABILITIES, key=len, reverse=True):
+        if model_name.startswith(name):
+            return MODEL_CAPABILITIES[name]
+    return DEFAULT_CAPABILITIES
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast local token estimate that errs on the high side.
+
+    Approximates BPE tokenizers by splitting words into pieces of up to six
+    letters and counting digits, punctuation and line breaks separately;
+    non-ASCII text adds one token per two extra UTF-8 bytes.
+    """
+    if not text:
+        return 0
+    tokens = len(_TOKEN_PIECES.findall(text))
+    if not text.isascii():
+        tokens += (len(text.encode('utf-8', errors='replace')) - len(text)) // 2
+    return tokens
+
+
+@dataclass(frozen=True)
+class PromptBudget:
+    """Prompt and output sizes planned for one model"""
+
+    model: str
+    prompt_tokens: int
+    max_bytes: int
+    max_output_tokens: int
+
+
+def plan_prompt_budget(model_name: str, fraction: float = 0.1, overhead_tokens: int = 0,
+                       max_prompt_tokens: int = 0) -> PromptBudget:
+    """Plan how much diff to send to ``model_name``.
+
+    The diff may use ``fraction`` of the context window after the output
+    reservation and ``overhead_tokens`` for the fixed prompt text, capped by
+    the model's tier (or by ``max_prompt_tokens`` when set), so lite models
+    get small fast prompts and large models richer context.
+    """
+    capabilities = get_capabilities(model_name)
+    wanted = REASONING_OUTPUT_TOKENS if capabilities.reasoning else MESSAGE_OUTPUT_TOKENS
+    output_tokens = min(capabilities.max_output_tokens, wanted)
+
+    available = capabilities.context_tokens - output_tokens - overhead_tokens
+    cap = max_prompt_tokens or TIER_PROMPT_TOKENS.get(capabilities.tier, TIER_PROMPT_TOKENS["standard"])
+    prompt_tokens = max(256, min(int(available * fraction), cap))
+    return PromptBudget(
+        model=model_name,
+        prompt_tokens=prompt_tokens,
+        max_bytes=prompt_tokens * BYTES_PER_TOKEN,
+        max_output_tokens=output_tokens
+    )
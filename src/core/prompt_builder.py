@@ -0,0 +1,439 @@
+"""
+Prompt Builder that fits the staged diff into a byte budget
+"""
+
+import os
+from typing import Optional, List, Tuple, Dict, Iterator, Iterable, Union
+
+from src.core.git_manager import GitManager
+from src.core.model_catalog import estimate_tokens
+from src.core.staged_diff import StagedDiff, FileStat
+
+# Files whose hunks are summarized instead of shown
+LOCKFILE_NAMES = {
+    "package-lock.json",
+    "npm-shrinkwrap.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "bun.lockb",
+    "poetry.lock",
+    "Pipfile.lock",
+    "uv.lock",
+    "Cargo.lock",
+    "Gemfile.lock",
+    "composer.lock",
+    "go.sum",
+    "mix.lock",
+    "pubspec.lock",
+    "flake.lock",
+    "packages.lock.json"
+}
+
+GENERATED_SUFFIXES = (
+    ".min.js",
+    ".min.css",
+    ".map",
+    "_pb2.py",
+    "_pb2_grpc.py",
+    ".pb.go",
+    ".g.dart",
+    ".generated.cs",
+    ".designer.cs",
+    ".snap"
+)
+
+GENERATED_DIRS = {"dist", "generated", "__generated__", "__snapshots__"}
+
+VENDORED_DIRS = {"vendor", "vendors", "node_modules", "third_party", "third-party", "bower_components"}
+
+# Bytes reserved for a file's diff header (diff --git, index, ---, +++)
+FILE_HEADER_BYTES = 256
+
+# Rough size of one changed line plus its share of context lines
+BYTES_PER_CHANGED_LINE = 64
+
+# Smallest allocation worth showing a file for
+MIN_FILE_BYTES = 384
+
+# Summary lines listed for files whose hunks are not shown
+MAX_SUMMARY_LINES = 30
+
+# Keep pathspec command lines well below the Windows limit
+MAX_PATHSPEC_CHARS = 24000
+
+# Longest piece of a single line buffered while splitting the stream
+MAX_LINE_BYTES = 1024 * 1024
+
+# Escapes git uses when quoting paths in diff headers
+C_ESCAPES = {
+    0x07: b"\\a", 0x08: b"\\b", 0x09: b"\\t", 0x0A: b"\\n", 0x0B: b"\\v",
+    0x0C: b"\\f", 0x0D: b"\\r", 0x22: b'\\"', 0x5C: b"\\\\"
+}
+
+# Per-file chunk size and chunk count for map-reduce summarization
+DEFAULT_CHUNK_BYTES = 6000
+DEFAULT_MAX_CHUNKS = 40
+
+
+def classify_file(path: str, binary: bool = False) -> str:
+    """Classify a changed file as binary, lockfile, vendored, generated or source"""
+    if binary:
+        return "binary"
+
+    parts = path.replace('\\', '/').split('/')
+    name = parts[-1]
+    if name in LOCKFILE_NAMES:
+        return "lockfile"
+    if any(part in VENDORED_DIRS for part in parts[:-1]):
+        return "vendored"
+    if name.endswith(GENERATED_SUFFIXES) or any(part in GENERATED_DIRS for part in parts[:-1]):
+        return "generated"
+    return "source"
+
+
+# Change kinds for the status letters of `git diff --raw`
+RAW_CHANGES = {
+    "A": "added",
+    "M": "modified",
+    "D": "deleted",
+    "R": "renamed",
+    "C": "copied",
+    "T": "type changed"
+}
+
+
+def parse_numstat(output: Union[bytes, str]) -> List[FileStat]:
+    """Parse `git diff --numstat -z` output, optionally combined with ``--raw``.
+
+    Regular entries are ``added<TAB>deleted<TAB>path<NUL>``; renames leave the
+    path empty and are followed by ``old<NUL>new<NUL>``. Binary files report
+    ``-`` for both counts. Raw records (``:modes shas STATUS<NUL>path<NUL>``,
+    with a second path for renames and copies) come first and only supply
+    each file's change kind. Raw bytes are preferred; paths are decoded with
+    ``os.fsdecode`` so they can be passed back to git unchanged.
+    """
+    if isinstance(output, str):
+        output = output.encode('utf-8', errors='surrogateescape')
+
+    stats = []
+    changes = {}
+    fields = iter(output.split(b'\0'))
+    for field in fields:
+        if not field:
+            continue
+        if field[:1] == b':':
+            letter = field.rsplit(b' ', 1)[-1][:1].decode('ascii', errors='replace')
+            path = next(fields, b"")
+            if letter in "RC":
+                path = next(fields, b"")
+            changes[os.fsdecode(path)] = RAW_CHANGES.get(letter, "modified")
+            continue
+
+        parts = field.split(b'\t', 2)
+        if len(parts) < 3:
+            continue
+
+        added, deleted, raw_path = parts
+        old_path = None
+        if not raw_path:
+            old_path = os.fsdecode(next(fields, b""))
+            raw_path = next(fields, b"")
+        path = os.fsdecode(raw_path)
+
+        binary = added == b'-' and deleted == b'-'
+        stat = FileStat(
+            path=path,
+            added=int(added) if added.isdigit() else 0,
+            deleted=int(deleted) if deleted.isdigit() else 0,
+            old_path=old_path,
+            binary=binary,
+            category=classify_file(path, binary),
+            change=changes.get(path, "renamed" if old_path else "modified")
+        )
+        stats.append(stat)
+    return stats
+
+
+def allocate_budget(stats: List[FileStat], budget: int) -> Dict[str, int]:
+    """Split ``budget`` bytes across files in proportion to their churn.
+
+    A file never gets more than its estimated diff size; what small files do
+    not need is handed to the remaining files. If the budget cannot give
+    every file ``MIN_FILE_BYTES``, the files with the least churn are left
+    out entirely.
+    """
+    if budget <= 0 or not stats:
+        return {}
+
+    # Most significant changes first, so they survive when files are dropped
+    ranked = sorted(stats, key=lambda stat: stat.churn, reverse=True)
+    max_files = max(1, budget // MIN_FILE_BYTES)
+    pending = ranked[:max_files]
+
+    needs = {stat.path: FILE_HEADER_BYTES + stat.churn * BYTES_PER_CHANGED_LINE for stat in pending}
+    allocation = {}
+    remaining = budget
+
+    while pending and remaining > 0:
+        total_weight = sum(stat.churn + 1 for stat in pending)
+        satisfied = [
+            stat for stat in pending
+            if needs[stat.path] <= remaining * (stat.churn + 1) / total_weight
+        ]
+        if not satisfied:
+            for stat in pending:
+                allocation[stat.path] = int(remaining * (stat.churn + 1) / total_weight)
+            break
+        for stat in satisfied:
+            allocation[stat.path] = needs[stat.path]
+            remaining -= needs[stat.path]
+        pending = [stat for stat in pending if stat.path not in allocation]
+
+    return allocation
+
+
+def _iter_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Split a stream of chunks into lines, keeping line endings"""
+    pending = b""
+    for chunk in chunks:
+        pending += chunk
+        start = 0
+        while True:
+            end = pending.find(b"\n", start)
+            if end == -1:
+                break
+            yield pending[start:end + 1]
+            start = end + 1
+        pending = pending[start:]
+        if len(pending) > MAX_LINE_BYTES:
+            # Minified or binary-like content: hand over long lines in pieces
+            yield pending
+            pending = b""
+    if pending:
+        yield pending
+
+
+def _quote_path(path: bytes) -> bytes:
+    """Quote a path the way git does in diff headers with core.quotepath off"""
+    if not any(byte < 0x20 or byte in (0x22, 0x5C, 0x7F) for byte in path):
+        return path
+    quoted = bytearray(b'"')
+    for byte in path:
+        if byte in C_ESCAPES:
+            quoted += C_ESCAPES[byte]
+        elif byte < 0x20 or byte == 0x7F:
+            quoted += b"\\%03o" % byte
+        else:
+            quoted.append(byte)
+    quoted += b'"'
+    return bytes(quoted)
+
+
+def _diff_header(stat: FileStat) -> bytes:
+    """The ``diff --git`` line git prints for a file, without the newline"""
+    old = os.fsencode(stat.old_path or stat.path)
+    new = os.fsencode(stat.path)
+    return b"diff --git " + _quote_path(b"a/" + old) + b" " + _quote_path(b"b/" + new)
+
+
+class PromptBuilder:
+    """Build the diff context sent to the AI provider.
+
+    A cheap ``git diff --cached --raw --numstat -z`` decides which files get hunks
+    and how many bytes each may use. Lockfiles, binary, generated and
+    vendored files are only summarized. Hunks are then streamed in a single
+    ``git diff`` per group of paths and cut per file at its allocation.
+    """
+
+    def __init__(self, git_manager: GitManager):
+        self.git_manager = git_manager
+
+    def get_numstat(self, repo_path: str) -> Tuple[bool, List[FileStat]]:
+        """Get per-file line counts and change kinds of the staged changes"""
+        success, output = self.git_manager.run_git_read_bytes(
+            ["git", "diff", "--cached", "--raw", "--numstat", "-z"],
+            cwd=repo_path
+        )
+        if not success:
+            return False, []
+        return True, parse_numstat(output)
+
+    def build(self, repo_path: str, max_bytes: int, map_reduce_threshold: float = 0,
+              chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+              max_chunks: int = DEFAULT_MAX_CHUNKS) -> Tuple[bool, Optional[StagedDiff]]:
+        """Build a staged diff that fits in ``max_bytes``.
+
+        If ``map_reduce_threshold`` is set and the estimated full diff is
+        more than that many times ``max_bytes``, the diff is instead split
+        into one chunk per file (each up to ``chunk_bytes``) for map-reduce
+        summarization.
+        """
+        success, stats = self.get_numstat(repo_path)
+        if not success:
+            # Fall back to plain truncation of the whole diff
+            return self.git_manager.read_staged_diff(repo_path, max_bytes)
+        if not stats:
+            return True, StagedDiff()
+
+        source = [stat for stat in stats if stat.category == "source"]
+        summarized = [stat for stat in stats if stat.category != "source"]
+
+        summary = ""
+        if summarized:
+            lines = [f"- {stat.describe()}" for stat in summarized[:MAX_SUMMARY_LINES]]
+            if len(summarized) > MAX_SUMMARY_LINES:
+                lines.append(f"- ... and {len(summarized) - MAX_SUMMARY_LINES} more")
+            summary = "Other changed files (diff not shown):\n" + "\n".join(lines)
+
+        estimated = sum(FILE_HEADER_BYTES + stat.churn * BYTES_PER_CHANGED_LINE for stat in source)
+        chunked = bool(map_reduce_threshold) and len(source) > 1 and estimated > max_bytes * map_reduce_threshold
+        if chunked:
+            # Largest changes first when there are more files than chunks
+            ranked = sorted(source, key=lambda stat: stat.churn, reverse=True)[:max_chunks]
+            allocation = {stat.path: chunk_bytes for stat in ranked}
+        else:
+            allocation = allocate_budget(source, max_bytes - len(summary.encode('utf-8')))
+        shown = [stat for stat in source if stat.path in allocation]
+
+        try:
+            sections, partial_files = self._read_sections(repo_path, shown, allocation)
+        except (OSError, RuntimeError):
+            return False, None
+
+        chunks = [
+            section.decode('utf-8', errors='replace').strip()
+            for section in sections.values()
+        ]
+        diff_bytes = sum(len(section) for section in sections.values())
+        text = "\n".join(chunks)
+        if summary:
+            text = f"{text}\n\n{summary}" if text else summary
+
+        omitted_files = [stat.path for stat in source if stat.path not in allocation]
+        return True, StagedDiff(
+            text=text,
+            truncated=bool(partial_files or omitted_files),
+            bytes_read=diff_bytes,
+            files=[stat.path for stat in stats],
+            partial_files=partial_files,
+            omitted_files=omitted_files,
+            stats=stats,
+            chunks=chunks if chunked else [],
+            summary=summary
+        )
+
+    def build_with_settings(self, repo_path: str, settings_manager, max_bytes: Optional[int] = None,
+                            max_tokens: int = 0) -> Tuple[bool, Optional[StagedDiff]]:
+        """Build the staged diff using the budget and map-reduce settings.
+
+        ``max_bytes`` defaults to ``diff_max_bytes``. With ``max_tokens`` the
+        result is checked with the token estimator and rebuilt smaller once
+        if the diff turned out denser than expected.
+        """
+        if max_bytes is None:
+            max_bytes = settings_manager.get("diff_max_bytes", 3000)
+        map_reduce = settings_manager.get("map_reduce_enabled", False)
+
+        def build(budget: int) -> Tuple[bool, Optional[StagedDiff]]:
+            return self.build(
+                repo_path,
+                max_bytes=budget,
+                map_reduce_threshold=settings_manager.get("map_reduce_threshold", 4) if map_reduce else 0,
+                chunk_bytes=settings_manager.get("map_chunk_bytes", DEFAULT_CHUNK_BYTES),
+                max_chunks=settings_manager.get("map_max_chunks", DEFAULT_MAX_CHUNKS)
+            )
+
+        success, diff = build(max_bytes)
+        if success and diff is not None and max_tokens and not diff.chunks:
+            tokens = estimate_tokens(diff.text)
+            if tokens > max_tokens:
+                success, diff = build(int(max_bytes * max_tokens / tokens * 0.95))
+        return success, diff
+
+    def _read_sections(self, repo_path: str, shown: List[FileStat],
+                       allocation: Dict[str, int]) -> Tuple[Dict[str, bytes], List[str]]:
+        """Stream hunks for the shown files, cutting each at its allocation.
+
+        Returns the diff section of each file keyed by path, in diff order,
+        and the files that were cut short. Sections are matched to files by
+        their ``diff --git`` header; a file with several headers (a type
+        change is shown as a deletion and an addition) gets one section.
+        """
+        sections = {}
+        partial_files = []
+
+        for group in self._group_pathspecs(shown):
+            paths = []
+            for stat in group:
+                # Both sides of a rename keep git's rename pairing intact
+                if stat.old_path:
+                    paths.append(stat.old_path)
+                paths.append(stat.path)
+
+            command = ["git", "-c", "core.quotepath=off", "--literal-pathspecs",
+                       "diff", "--cached", "--src-prefix=a/", "--dst-prefix=b/", "--"] + paths
+            headers = {_diff_header(stat): stat for stat in group}
+            # Lines, bytes used and lines dropped per file, in diff order
+            collected: Dict[str, Tuple[FileStat, List[bytes]]] = {}
+            used: Dict[str, int] = {}
+            dropped: Dict[str, int] = {}
+            current = None
+            stopped_early = False
+            stream = self.git_manager.stream_git_command(command, cwd=repo_path)
+            try:
+                for line in _iter_lines(stream):
+                    if line.startswith(b"diff --git "):
+                        current = headers.get(line.rstrip(b"\r\n"))
+                        if current is not None and current.path not in collected:
+                            collected[current.path] = (current, [])
+                            used[current.path] = 0
+                            dropped[current.path] = 0
+
+                    if current is None:
+                        continue
+                    path = current.path
+                    if dropped[path] or used[path] + len(line) > allocation[path]:
+                        dropped[path] += 1
+                        if len(collected) == len(group):
+                            # Every file has started and the last one is full
+                            stopped_early = True
+                            break
+                        continue
+                    collected[path][1].append(line)
+                    used[path] += len(line)
+            finally:
+                stream.close()
+
+            for path, (stat, lines) in collected.items():
+                self._close_section(sections, partial_files, stat, lines, dropped[path],
+                                    exact=not (stopped_early and stat is current))
+
+        return sections, partial_files
+
+    def _close_section(self, sections: Dict[str, bytes], partial_files: List[str],
+                       stat: FileStat, lines: List[bytes], dropped: int, exact: bool = True):
+        """Store a finished file section, marking lines left out"""
+        if dropped:
+            if exact:
+                lines.append(f"... [{dropped} more line(s) not shown]\n".encode())
+            else:
+                lines.append(b"... [more lines not shown]\n")
+            partial_files.append(stat.path)
+        sections[stat.path] = b"".join(lines)
+
+    def _group_pathspecs(self, shown: List[FileStat]) -> List[List[FileStat]]:
+        """Split files into groups whose pathspecs fit on one command line"""
+        groups = []
+        current = []
+        length = 0
+        for stat in shown:
+            size = len(stat.path) + len(stat.old_path or "") + 2
+            if current and length + size > MAX_PATHSPEC_CHARS:
+                groups.append(current)
+                current = []
+                length = 0
+            current.append(stat)
+            length += size
+        if current:
+            groups.append(current)
+        return groups
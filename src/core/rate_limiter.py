@@ -0,0 +1,257 @@
+"""
+Rate-limit aware scheduling of AI provider requests
+"""
+
+import time
+import random
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Callable, TypeVar
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying: rate limited, timeouts and transient server errors
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+# SDK exceptions that carry no status code but are transient
+RETRYABLE_ERROR_NAMES = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "RateLimitError",
+    "InternalServerError",
+    "ResourceExhausted",
+    "ServiceUnavailable",
+    "DeadlineExceeded",
+    "TooManyRequests",
+    "ConnectionError",
+    "TimeoutError"
+}
+
+# Defaults for retries with jittered exponential backoff
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 30.0
+
+# Longest single wait between checks for cancellation
+POLL_INTERVAL = 0.25
+
+
+class RequestCancelled(Exception):
+    """Raised when a request is cancelled while queued or backing off"""
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Server-requested delay from a ``Retry-After`` style header, if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether a provider error is a rate limit or a transient failure"""
+    for attr in ("status_code", "code"):
+        status = getattr(error, attr, None)
+        if isinstance(status, int) and not isinstance(status, bool):
+            return status in RETRYABLE_STATUSES
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def backoff_delay(attempt: int, base: float = DEFAULT_BASE_DELAY, cap: float = DEFAULT_MAX_DELAY) -> float:
+    """Full-jitter exponential backoff for the given retry attempt (0-based)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class TokenBucket:
+    """Token bucket holding up to one minute's worth of ``per_minute``.
+
+    A limit of 0 means unlimited. A request larger than the bucket is let
+    through once the bucket is full, leaving it in debt.
+    """
+
+    def __init__(self, per_minute: float = 0):
+        self.per_minute = per_minute
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if self.per_minute:
+            elapsed = now - self.updated
+            self.tokens = min(float(self.per_minute), self.tokens + elapsed * self.per_minute / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` can be taken"""
+        if not self.per_minute:
+            return 0.0
+        self._refill(now)
+        needed = min(amount, self.per_minute)
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) * 60 / self.per_minute
+
+    def take(self, amount: float):
+        if self.per_minute:
+            self.tokens -= amount
+
+
+class _ProviderLimits:
+    """Buckets, pause deadline and FIFO queue for one provider"""
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.paused_until = 0.0
+        self.queue = deque()
+
+
+class RequestScheduler:
+    """Queue provider requests under per-provider rate limits and retry failures.
+
+    Each provider has a requests-per-minute and a tokens-per-minute bucket.
+    Requests are admitted strictly in arrival order, so a burst from bulk
+    generation drains at the configured rate instead of tripping the
+    provider's limits. Rate limited and transient errors are retried with
+    jittered exponential backoff; a ``Retry-After`` from the server pauses
+    every queued request for that provider, not just the failed one.
+    """
+
+    def __init__(self, max_retries: int = DEFAULT_MAX_RETRIES,
+                 base_delay: float = DEFAULT_BASE_DELAY, max_delay: float = DEFAULT_MAX_DELAY):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self.rate_limited = 0
+        self.queued_seconds = 0.0
+        self._limits: Dict[str, _ProviderLimits] = {}
+        self._cond = threading.Condition()
+
+    def set_limits(self, provider: str, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        """Set a provider's limits; 0 disables a limit"""
+        with self._cond:
+            limits = self._limits.get(provider)
+            if limits is None:
+                self._limits[provider] = _ProviderLimits(requests_per_minute, tokens_per_minute)
+            else:
+                limits.requests = TokenBucket(requests_per_minute)
+                limits.tokens = TokenBucket(tokens_per_minute)
+            self._cond.notify_all()
+
+    def acquire(self, provider: str, tokens: int = 0,
+                cancel_event: Optional[threading.Event] = None) -> bool:
+        """Wait for a turn under the provider's limits.
+
+        Returns False if ``cancel_event`` was set while waiting.
+        """
+        ticket = object()
+        start = time.monotonic()
+        with self._cond:
+            limits = self._limits.get(provider)
+            if limits is None:
+                limits = self._limits[provider] = _ProviderLimits(0, 0)
+            limits.queue.append(ticket)
+            try:
+                while True:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return False
+
+                    timeout = POLL_INTERVAL
+                    if limits.queue[0] is ticket:
+                        now = time.monotonic()
+                        wait = max(
+                            limits.paused_until - now,
+                            limits.requests.wait_time(1, now),
+                            limits.tokens.wait_time(tokens, now)
+                        )
+                        if wait <= 0:
+                            limits.requests.take(1)
+                            limits.tokens.take(tokens)
+                            self.queued_seconds += now - start
+                            return True
+                        timeout = min(wait, POLL_INTERVAL)
+                    self._cond.wait(timeout)
+            finally:
+                limits.queue.remove(ticket)
+                self._cond.notify_all()
+
+    def pause(self, provider: str, seconds: float):
+        """Hold back every request to ``provider`` for ``seconds``"""
+        with self._cond:
+            limits = self._limits.get(provider)
+            if limits is None:
+                limits = self._limits[provider] = _ProviderLimits(0, 0)
+            limits.paused_until = max(limits.paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def run(self, provider: str, call: Callable[[], T], tokens: int = 0,
+            cancel_event: Optional[threading.Event] = None,
+            can_retry: Optional[Callable[[], bool]] = None,
+            on_retry: Optional[Callable[[BaseException, float], None]] = None) -> T:
+        """Run ``call`` once admitted, retrying rate limits and transient errors.
+
+        ``can_retry`` lets the caller veto a retry (e.g. once streamed text
+        was shown); ``on_retry`` receives the error and the delay before
+        each retry. Raises ``RequestCancelled`` if ``cancel_event`` is set
+        while queued or backing off.
+        """
+        attempt = 0
+        while True:
+            if not self.acquire(provider, tokens, cancel_event):
+                raise RequestCancelled("Request cancelled")
+            try:
+                return call()
+            except Exception as e:
+                if (attempt >= self.max_retries or not is_retryable(e)
+                        or (can_retry is not None and not can_retry())
+                        or (cancel_event is not None and cancel_event.is_set())):
+                    raise
+
+                delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+                retry_after = retry_after_seconds(e)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                if retry_after is not None or 429 in (getattr(e, "status_code", None), getattr(e, "code", None)):
+                    # Hold back the whole queue, not just this request
+                    self.rate_limited += 1
+                    self.pause(provider, delay)
+                self.retries += 1
+                attempt += 1
+                if on_retry is not None:
+                    on_retry(e, delay)
+
+                if cancel_event is not None:
+                    if cancel_event.wait(delay):
+                        raise RequestCancelled("Request cancelled")
+                else:
+                    time.sleep(delay)
+
+    def stats(self) -> Dict[str, float]:
+        """Retry and throttling counters, for monitoring"""
+        with self._cond:
+            return {
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "queued_seconds": round(self.queued_seconds, 3),
+                "waiting": sum(len(limits.queue) for limits in self._limits.values())
+            }
@@ -0,0 +1,201 @@
+"""
+Per-repository read/write locks for git operations
+"""
+
+import os
+import asyncio
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from typing import Optional, Dict, Set, Hashable, Iterator, AsyncIterator
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class RepoLock:
+    """Readers-writer lock for one repository.
+
+    Any number of read-only git commands may run together, while a command
+    that writes the index or refs runs alone. Waiting writers block new
+    readers, so a steady stream of status refreshes cannot starve a commit.
+    An owner may nest read and write sections inside a write section it
+    holds, and reads inside reads, but cannot upgrade a read to a write.
+
+    Threads use ``read``/``write`` and own sections by thread id. Coroutines
+    use ``read_async``/``write_async``, which wait on the event loop and are
+    owned by the current task, so tasks sharing the loop thread still
+    exclude each other. Both kinds of owner share the same state.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers: Dict[Hashable, int] = {}
+        self._writer: Optional[Hashable] = None
+        self._write_depth = 0
+        self._waiting_writers = 0
+        # Coroutines waiting for a release, each on its own loop's future
+        self._async_waiters: Set[asyncio.Future] = set()
+
+    def _notify(self):
+        """Wake every waiting thread and coroutine; call with ``_cond`` held"""
+        self._cond.notify_all()
+        for waiter in self._async_waiters:
+            try:
+                waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                # Its loop is closed, so nobody is waiting any more
+                pass
+        self._async_waiters.clear()
+
+    def _async_waiter(self) -> asyncio.Future:
+        waiter = asyncio.get_running_loop().create_future()
+        self._async_waiters.add(waiter)
+        return waiter
+
+    def _enter_read(self, owner: Hashable) -> Optional[bool]:
+        """Take a read section under ``_cond`` if ``owner`` may have one now.
+
+        Returns True when it nests in the owner's write section, False for
+        a plain read and None when the owner has to wait.
+        """
+        if self._writer == owner:
+            self._write_depth += 1
+            return True
+        if owner not in self._readers and (self._writer is not None or self._waiting_writers):
+            return None
+        self._readers[owner] = self._readers.get(owner, 0) + 1
+        return False
+
+    def _exit_read(self, owner: Hashable, nested_in_write: bool):
+        with self._cond:
+            if nested_in_write:
+                self._write_depth -= 1
+            else:
+                self._readers[owner] -= 1
+                if not self._readers[owner]:
+                    del self._readers[owner]
+                    self._notify()
+
+    def _enter_write(self, owner: Hashable) -> bool:
+        """Start a write section under ``_cond``; False if ``owner`` has to wait first"""
+        if self._writer == owner:
+            self._write_depth += 1
+            return True
+        if owner in self._readers:
+            raise RuntimeError("Cannot take a repository write lock while holding its read lock")
+        return False
+
+    def _exit_write(self):
+        with self._cond:
+            self._write_depth -= 1
+            if not self._write_depth:
+                self._writer = None
+                self._notify()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        me = threading.get_ident()
+        with self._cond:
+            while True:
+                nested_in_write = self._enter_read(me)
+                if nested_in_write is not None:
+                    break
+                self._cond.wait()
+        try:
+            yield
+        finally:
+            self._exit_read(me, nested_in_write)
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        me = threading.get_ident()
+        with self._cond:
+            if not self._enter_write(me):
+                self._waiting_writers += 1
+                try:
+                    while self._writer is not None or self._readers:
+                        self._cond.wait()
+                finally:
+                    self._waiting_writers -= 1
+                self._writer = me
+                self._write_depth = 1
+        try:
+            yield
+        finally:
+            self._exit_write()
+
+    @asynccontextmanager
+    async def read_async(self) -> AsyncIterator[None]:
+        me = asyncio.current_task()
+        while True:
+            with self._cond:
+                nested_in_write = self._enter_read(me)
+                if nested_in_write is None:
+                    waiter = self._async_waiter()
+            if nested_in_write is not None:
+                break
+            try:
+                await waiter
+            finally:
+                with self._cond:
+                    self._async_waiters.discard(waiter)
+        try:
+            yield
+        finally:
+            self._exit_read(me, nested_in_write)
+
+    @asynccontextmanager
+    async def write_async(self) -> AsyncIterator[None]:
+        me = asyncio.current_task()
+        with self._cond:
+            acquired = self._enter_write(me)
+            if not acquired:
+                self._waiting_writers += 1
+        try:
+            while not acquired:
+                with self._cond:
+                    if self._writer is None and not self._readers:
+                        self._waiting_writers -= 1
+                        self._writer = me
+                        self._write_depth = 1
+                        acquired = True
+                        break
+                    waiter = self._async_waiter()
+                try:
+                    await waiter
+                finally:
+                    with self._cond:
+                        self._async_waiters.discard(waiter)
+        except BaseException:
+            # Cancelled while queued: stop holding back new readers
+            with self._cond:
+                self._waiting_writers -= 1
+                self._notify()
+            raise
+        try:
+            yield
+        finally:
+            self._exit_write()
+
+
+class RepoLockRegistry:
+    """One ``RepoLock`` per repository, keyed by its resolved path"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks: Dict[str, RepoLock] = {}
+
+    def get(self, repo_path: Optional[str]) -> RepoLock:
+        key = os.path.normcase(os.path.realpath(repo_path or os.getcwd()))
+        with self._lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = RepoLock()
+            return lock
+
+
+# Shared by every GitManager in the process, so separate instances
+# (main window, bulk dialog) still coordinate on the same repository
+REPO_LOCKS = RepoLockRegistry()
@@ -0,0 +1,159 @@
+"""
+On-disk cache of AI responses keyed by prompt content
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Optional, Dict, Any, Tuple
+
+# Defaults for size and age based eviction
+DEFAULT_MAX_ENTRIES = 500
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_MAX_AGE = 30 * 24 * 60 * 60
+
+
+def normalize_diff(diff: str) -> str:
+    """Normalize a diff so equivalent content maps to the same key"""
+    lines = diff.replace('\r\n', '\n').split('\n')
+    return '\n'.join(line.rstrip() for line in lines).strip()
+
+
+class ResponseCache:
+    """Content-addressed cache of generated messages.
+
+    Entries live as one JSON file per key in ``cache_dir``. The file mtime
+    is bumped on every hit, so eviction drops the least recently used
+    entries once ``max_entries`` or ``max_bytes`` is exceeded, and entries
+    older than ``max_age`` seconds are never returned.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES, max_age: float = DEFAULT_MAX_AGE):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # key -> (last access time, size in bytes)
+        self._index: Dict[str, Tuple[float, int]] = {}
+        self._load_index()
+
+    def make_key(self, diff: str, provider: str, model: str, template_version: str) -> str:
+        """Hash of everything that influences the response"""
+        digest = hashlib.sha256()
+        for part in (template_version, provider, model, normalize_diff(diff)):
+            digest.update(part.encode('utf-8', errors='replace'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for ``key`` or None"""
+        path = self._path(key)
+        now = time.time()
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            if self.max_age and now - entry.get("created", 0) > self.max_age:
+                self._remove(key)
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass
+            self._index[key] = (now, self._index[key][1])
+            self.hits += 1
+            return entry.get("value")
+
+    def put(self, key: str, value: Any):
+        """Store ``value`` under ``key`` and evict if over the limits"""
+        data = json.dumps({"created": time.time(), "value": value}, ensure_ascii=False)
+        path = self._path(key)
+        with self._lock:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"Error saving AI response cache: {e}")
+                return
+            self._index[key] = (time.time(), len(data.encode('utf-8')))
+            self._evict()
+
+    def clear(self):
+        """Remove every cached response"""
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size, for monitoring"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._index),
+                "bytes": sum(size for _, size in self._index.values())
+            }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_index(self):
+        try:
+            with os.scandir(self.cache_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".json") and entry.is_file():
+                        st = entry.stat()
+                        self._index[entry.name[:-5]] = (st.st_mtime, st.st_size)
+        except OSError:
+            pass
+        with self._lock:
+            self._evict()
+
+    def _remove(self, key: str):
+        self._index.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones until within limits (lock held)"""
+        if self.max_age:
+            cutoff = time.time() - self.max_age
+            for key, (accessed, _) in list(self._index.items()):
+                if accessed < cutoff:
+                    self._remove(key)
+                    self.evictions += 1
+
+        total = sum(size for _, size in self._index.values())
+        if len(self._index) <= self.max_entries and total <= self.max_bytes:
+            return
+
+        for key in sorted(self._index, key=lambda k: self._index[k][0]):
+            if len(self._index) <= self.max_entries and total <= self.max_bytes:
+                break
+            total -= self._index[key][1]
+            self._remove(key)
+            self.evictions += 1
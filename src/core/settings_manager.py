@@ -6,7 +6,21 @@ import os
 import sys
 import json
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List
+
+# Directories never descended into during recursive discovery
+DEFAULT_SCAN_IGNORE_DIRS = [
+    "node_modules",
+    "venv",
+    "env",
+    "__pycache__",
+    "site-packages",
+    "build",
+    "dist",
+    "target",
+    "vendor",
+    "bower_components"
+]
 
 # Default values
 DEFAULT_SETTINGS = {
@@ -19,7 +33,45 @@ DEFAULT_SETTINGS = {
     "parent_folder": str(Path.home()),
     "recent_repos": [],
     "auto_push": True,
-    "dark_mode": False
+    "dark_mode": False,
+    "scan_max_workers": 8,
+    "scan_recursive": False,
+    "scan_max_depth": 3,
+    "scan_ignore_dirs": list(DEFAULT_SCAN_IGNORE_DIRS),
+    "status_cache_enabled": True,
+    "status_cache_max_age": 10 * 60,
+    "openai_base_url": "",
+    "diff_max_bytes": 3000,
+    "stream_output": True,
+    "ai_cache_enabled": True,
+    "ai_cache_max_entries": 500,
+    "ai_cache_max_age": 30 * 24 * 60 * 60,
+    "map_reduce_enabled": False,
+    "map_reduce_threshold": 4,
+    "map_chunk_bytes": 6000,
+    "map_max_chunks": 40,
+    "map_concurrency": 4,
+    "hedge_mode": "off",
+    "hedge_delay": 2.0,
+    "gemini_rpm": 10,
+    "gemini_tpm": 250000,
+    "openai_rpm": 500,
+    "openai_tpm": 200000,
+    "ai_max_retries": 4,
+    "bulk_ai_concurrency": 4,
+    "offline_placeholder": True,
+    "prompt_budget_mode": "fixed",
+    "context_fraction": 0.1,
+    "max_prompt_tokens": 0,
+    "speculative_generation": False,
+    "speculative_debounce_ms": 800,
+    "candidate_count": 1,
+    "metrics_log_enabled": True,
+    "metrics_log_max_bytes": 1024 * 1024,
+    "metrics_log_backups": 3,
+    "sdk_warmup": True,
+    "async_git_backend": False,
+    "index_fast_status": False
 }
 
 GEMINI_MODELS = [
@@ -79,7 +131,8 @@ class SettingsManager:
             self.settings_file = os.path.join(base_dir, 'settings.json')
         else:
             self.settings_file = settings_file
-            
+        
+        self._listeners: List[Callable[[str, Any], None]] = []
         self.settings = self.load_settings()
     
     def get_app_data_directory(self):
@@ -111,6 +164,10 @@ class SettingsManager:
         # Fallback to current directory
         return os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else os.getcwd()
     
+    def get_data_dir(self) -> str:
+        """Get directory holding settings.json and other app data files"""
+        return os.path.dirname(os.path.abspath(self.settings_file))
+    
     def load_settings(self) -> Dict[str, Any]:
         """Load settings from JSON file"""
         try:
@@ -153,8 +210,17 @@ class SettingsManager:
     
     def set(self, key: str, value: Any):
         """Set setting value"""
+        changed = self.settings.get(key) != value
         self.settings[key] = value
         self.save_settings()
+        
+        if changed:
+            for listener in list(self._listeners):
+                listener(key, value)
+    
+    def add_listener(self, callback: Callable[[str, Any], None]):
+        """Call ``callback(key, value)`` whenever a setting changes"""
+        self._listeners.append(callback)
     
     def add_recent_repo(self, repo_path: str):
         """Add repository to recent list"""
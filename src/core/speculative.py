@@ -0,0 +1,146 @@
+"""
+Speculative background generation of commit messages
+"""
+
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import Optional, Tuple, Callable, List
+
+from src.core.ai_provider import AIProvider, OFFLINE_PROVIDER
+from src.core.git_manager import GitManager
+from src.core.git_status import StatusList
+from src.core.prompt_builder import PromptBuilder
+
+# Delay after the last staging change before a speculative request starts
+DEFAULT_DEBOUNCE_SECONDS = 0.8
+
+# Blob names, modes and paths of every staged change, compared against HEAD
+STAGED_RAW_COMMAND = ["git", "diff", "--cached", "--raw", "-z", "--no-abbrev", "--no-renames"]
+
+
+def staged_signature(status: StatusList) -> Tuple[Tuple[str, str, Optional[str], str], ...]:
+    """Staged entries of a status read, for noticing when the staged set changed.
+
+    The worktree letter is kept so that re-staging a file (``MM`` back to
+    ``M.``) counts as a change even though the index letter stays the same.
+    """
+    return tuple(
+        (entry.xy, entry.path, entry.orig_path, entry.mode_index)
+        for entry in status
+        if entry.index_status not in ".?!"
+    )
+
+
+class SpeculativeGenerator:
+    """Start generating as soon as the staged set changes.
+
+    The staged content is identified by a hash of the raw staged diff
+    (blob names, modes and paths against HEAD), so a request is keyed on
+    exactly what would be committed without writing to the repository. ``schedule`` is debounced; when it fires for a new key the
+    previous speculative request is cancelled. Finished messages also land
+    in the response cache, and ``take`` hands out the in-flight or finished
+    result for the current staged content.
+    """
+
+    def __init__(self, git_manager: GitManager, prompt_builder: PromptBuilder,
+                 ai_provider: AIProvider, settings_manager):
+        self.git_manager = git_manager
+        self.prompt_builder = prompt_builder
+        self.ai_provider = ai_provider
+        self.settings_manager = settings_manager
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._key: Optional[Tuple[str, str, str, str, int]] = None
+        self._future: Optional[Future] = None
+        self._cancel_event: Optional[threading.Event] = None
+
+    def staged_key(self, repo_path: str) -> Optional[str]:
+        """Hash identifying the staged changes, or None if nothing is staged or git failed"""
+        success, output = self.git_manager.run_git_read_bytes(STAGED_RAW_COMMAND, cwd=repo_path)
+        if not success or not output:
+            return None
+        return hashlib.sha1(output).hexdigest()
+
+    def _make_key(self, repo_path: str, provider: str, staged: str) -> Tuple[str, str, str, str, int]:
+        return (repo_path, provider, self.ai_provider.get_model_name(provider), staged,
+                self.settings_manager.get("candidate_count", 1))
+
+    def schedule(self, repo_path: str, provider: str,
+                 on_ready: Optional[Callable[[str, List[str]], None]] = None):
+        """Speculate for ``repo_path`` after the debounce delay.
+
+        ``on_ready(repo_path, messages)`` is called from a worker thread when
+        the speculative candidates (``candidate_count`` of them) are ready.
+        """
+        if provider == OFFLINE_PROVIDER or not self.ai_provider.is_provider_ready(provider):
+            return
+        delay = self.settings_manager.get("speculative_debounce_ms", DEFAULT_DEBOUNCE_SECONDS * 1000) / 1000
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(delay, self._speculate, args=(repo_path, provider, on_ready))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _speculate(self, repo_path: str, provider: str, on_ready: Optional[Callable[[str, List[str]], None]]):
+        staged = self.staged_key(repo_path)
+        if staged is None:
+            return
+        key = self._make_key(repo_path, provider, staged)
+
+        with self._lock:
+            if key == self._key:
+                # Already running or done for exactly this staged content
+                return
+            if self._cancel_event is not None:
+                self._cancel_event.set()
+            cancel_event = threading.Event()
+            future = Future()
+            future.set_running_or_notify_cancel()
+            self._key = key
+            self._future = future
+            self._cancel_event = cancel_event
+
+        try:
+            budget = self.ai_provider.plan_budget(provider)
+            success, diff = self.prompt_builder.build_with_settings(
+                repo_path, self.settings_manager, max_bytes=budget.max_bytes, max_tokens=budget.prompt_tokens
+            )
+            if not success or diff is None or diff.is_empty():
+                raise ValueError("No staged changes")
+            messages = self.ai_provider.generate_candidates(diff, provider, cancel_event=cancel_event)
+        except Exception as e:
+            future.set_exception(e)
+            with self._lock:
+                # Let a later schedule retry the same content
+                if self._future is future:
+                    self._key = None
+            return
+
+        future.set_result(messages)
+        if on_ready is not None and not cancel_event.is_set():
+            on_ready(repo_path, messages)
+
+    def take(self, repo_path: str, provider: str) -> Optional[Future]:
+        """Future for the current staged content of ``repo_path``, if one was started"""
+        with self._lock:
+            if self._key is None or self._key[:3] != (repo_path, provider, self.ai_provider.get_model_name(provider)):
+                return None
+        staged = self.staged_key(repo_path)
+        with self._lock:
+            if staged is not None and self._key == self._make_key(repo_path, provider, staged):
+                return self._future
+        return None
+
+    def cancel(self):
+        """Stop any pending or running speculative request"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._cancel_event is not None:
+                self._cancel_event.set()
+            self._key = None
+            self._future = None
+            self._cancel_event = None
@@ -0,0 +1,77 @@
+"""
+Staged diff container passed from GitManager to AIProvider
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from src.core.git_status import display_path
+
+
+@dataclass
+class FileStat:
+    """One entry of `git diff --numstat` with its budget category"""
+
+    path: str
+    added: int = 0
+    deleted: int = 0
+    old_path: Optional[str] = None
+    binary: bool = False
+    category: str = "source"
+    # added, modified, deleted, renamed, copied or type changed
+    change: str = "modified"
+
+    @property
+    def churn(self) -> int:
+        return self.added + self.deleted
+
+    def describe(self) -> str:
+        """Short one-line summary used in place of the file's hunks"""
+        name = display_path(self.path)
+        if self.old_path:
+            name = f"{display_path(self.old_path)} → {name}"
+        if self.binary:
+            return f"{name} (binary)"
+        return f"{name} ({self.category}, +{self.added} -{self.deleted})"
+
+
+@dataclass
+class StagedDiff:
+    """Staged diff text read under a byte budget.
+
+    ``files`` lists every staged path in diff order. When the budget cuts
+    the diff short, ``partial_files`` are the files whose sections were cut
+    and ``omitted_files`` the ones not shown at all.
+    """
+
+    text: str = ""
+    truncated: bool = False
+    bytes_read: int = 0
+    files: List[str] = field(default_factory=list)
+    partial_files: List[str] = field(default_factory=list)
+    omitted_files: List[str] = field(default_factory=list)
+    stats: List[FileStat] = field(default_factory=list)
+    # Per-file diff sections for map-reduce summarization, and the summary
+    # of files whose hunks are never shown
+    chunks: List[str] = field(default_factory=list)
+    summary: str = ""
+
+    def is_empty(self) -> bool:
+        return not self.text.strip()
+
+    def omitted_note(self, max_names: int = 20) -> str:
+        """Describe what the budget left out, for inclusion in the prompt"""
+        if not self.truncated:
+            return ""
+
+        lines = [f"Note: the diff was truncated after {self.bytes_read} bytes."]
+        if self.partial_files:
+            names = ", ".join(display_path(name) for name in self.partial_files[:max_names])
+            lines.append(f"Only the beginning of the diff is shown for: {names}")
+        if self.omitted_files:
+            names = ", ".join(display_path(name) for name in self.omitted_files[:max_names])
+            more = len(self.omitted_files) - max_names
+            if more > 0:
+                names += f" (+{more} more)"
+            lines.append(f"{len(self.omitted_files)} more changed file(s) not shown: {names}")
+        return "\n".join(lines)
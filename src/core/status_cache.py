@@ -0,0 +1,147 @@
+"""
+Persistent repository status cache for AI Commit
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Optional, List, Dict, Any
+
+from src.core.fast_status import resolve_git_dir
+
+# Drop entries that were not seen by a scan for this long (seconds)
+DEFAULT_RETENTION = 30 * 24 * 60 * 60
+
+# Maximum number of repositories kept in the cache file
+DEFAULT_MAX_ENTRIES = 2000
+
+
+class StatusCache:
+    """Remember ``has_changes`` per repository between scans.
+
+    Each entry stores a fingerprint built from the mtime/size of
+    ``.git/index``, ``HEAD`` and the working tree root. A cached result is
+    reused only while the fingerprint still matches and the entry is younger
+    than ``max_age`` seconds (0 disables the age check). Edits to tracked
+    files that do not touch the index are not visible in the fingerprint, so
+    ``GitManager`` confirms cached clean results from the index, and results
+    are refreshed whenever a repository is opened and on a forced rescan.
+    """
+
+    def __init__(self, cache_file: str, max_age: float = 0,
+                 retention: float = DEFAULT_RETENTION,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.cache_file = cache_file
+        self.max_age = max_age
+        self.retention = retention
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.entries = self.load()
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Load cache entries from JSON file"""
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                    if isinstance(data, dict):
+                        return data.get("repos", {})
+        except Exception as e:
+            print(f"Error loading status cache: {e}")
+        return {}
+
+    def save(self) -> bool:
+        """Save cache entries to JSON file if anything changed"""
+        with self._lock:
+            if not self._dirty:
+                return True
+            data = {"version": 1, "repos": dict(self.entries)}
+            self._dirty = False
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.cache_file)), exist_ok=True)
+            tmp_file = f"{self.cache_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+            return True
+        except Exception as e:
+            print(f"Error saving status cache: {e}")
+            return False
+
+    def fingerprint(self, repo_path: str) -> Optional[List[int]]:
+        """Build the fingerprint for a repository, or None if unreadable"""
+        git_dir = resolve_git_dir(repo_path)
+        if git_dir is None:
+            return None
+
+        fingerprint = []
+        for path in (os.path.join(git_dir, "index"), os.path.join(git_dir, "HEAD"), repo_path):
+            try:
+                st = os.stat(path)
+                fingerprint.extend((st.st_mtime_ns, st.st_size))
+            except OSError:
+                # A fresh repository has no index yet
+                fingerprint.extend((0, -1))
+        return fingerprint
+
+    def get(self, repo_path: str, fingerprint: Optional[List[int]]) -> Optional[bool]:
+        """Return cached ``has_changes`` if the fingerprint still matches"""
+        if fingerprint is None:
+            return None
+
+        key = self._key(repo_path)
+        now = time.time()
+        with self._lock:
+            entry = self.entries.get(key)
+            if not entry or entry.get("fingerprint") != fingerprint:
+                return None
+            if self.max_age and now - entry.get("checked", 0) > self.max_age:
+                return None
+            entry["seen"] = now
+            self._dirty = True
+            return entry.get("has_changes")
+
+    def put(self, repo_path: str, fingerprint: Optional[List[int]], has_changes: bool):
+        """Record the result of a status check"""
+        if fingerprint is None:
+            return
+
+        now = time.time()
+        with self._lock:
+            self.entries[self._key(repo_path)] = {
+                "fingerprint": fingerprint,
+                "has_changes": has_changes,
+                "checked": now,
+                "seen": now
+            }
+            self._dirty = True
+
+    def evict(self):
+        """Drop vanished repositories, stale entries and the oldest overflow"""
+        now = time.time()
+        with self._lock:
+            for key, entry in list(self.entries.items()):
+                vanished = not os.path.exists(os.path.join(key, ".git"))
+                expired = self.retention and now - entry.get("seen", 0) > self.retention
+                if vanished or expired:
+                    del self.entries[key]
+                    self._dirty = True
+
+            overflow = len(self.entries) - self.max_entries
+            if overflow > 0:
+                oldest = sorted(self.entries, key=lambda k: self.entries[k].get("seen", 0))
+                for key in oldest[:overflow]:
+                    del self.entries[key]
+                self._dirty = True
+
+    def clear(self):
+        """Forget every cached status"""
+        with self._lock:
+            self.entries.clear()
+            self._dirty = True
+
+    def _key(self, repo_path: str) -> str:
+        return os.path.abspath(repo_path)
@@ -0,0 +1,134 @@
+"""
+Background task executor with results delivered through a queue
+"""
+
+import queue
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Callable
+
+
+class Task:
+    """One unit of background work.
+
+    ``state`` moves from queued to running and ends as done, failed or
+    cancelled. The work function receives the task and should pass
+    ``cancel_event`` on to anything that can stop early and call
+    ``report`` to publish progress messages.
+    """
+
+    def __init__(self, task_id: int, name: str, group: str, results: "queue.Queue"):
+        self.id = task_id
+        self.name = name
+        self.group = group
+        self.state = "queued"
+        self.progress = ""
+        self.cancel_event = threading.Event()
+        self._results = results
+        self.on_done: Optional[Callable[[Any], None]] = None
+        self.on_error: Optional[Callable[[Exception], None]] = None
+        self.on_progress: Optional[Callable[[str, str], None]] = None
+        self.on_cancelled: Optional[Callable[[], None]] = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.state in ("queued", "running")
+
+    def cancel(self):
+        """Ask the task to stop; a queued task will not start at all"""
+        self.cancel_event.set()
+
+    def report(self, message: str, level: str = "info"):
+        """Publish a progress message (safe to call from the worker thread)"""
+        self._results.put(("progress", self, (message, level)))
+
+
+class TaskExecutor:
+    """Run blocking work off the UI thread.
+
+    Work runs in a pool of ``max_workers`` threads (one worker keeps tasks in
+    submission order). Workers never call back into the UI: completion,
+    errors and progress go through a queue, and ``poll`` runs the callbacks
+    on whichever thread calls it, normally the Tk main thread via
+    ``root.after``.
+    """
+
+    def __init__(self, max_workers: int = 1, thread_name_prefix: str = "task"):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers),
+                                            thread_name_prefix=thread_name_prefix)
+        self._results: "queue.Queue" = queue.Queue()
+        self._ids = itertools.count(1)
+        self._tasks: Dict[int, Task] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, name: str, fn: Callable[[Task], Any], group: str = "default",
+               on_done: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[Exception], None]] = None,
+               on_progress: Optional[Callable[[str, str], None]] = None,
+               on_cancelled: Optional[Callable[[], None]] = None) -> Task:
+        """Queue ``fn(task)``; the callbacks run later from ``poll``"""
+        task = Task(next(self._ids), name, group, self._results)
+        task.on_done = on_done
+        task.on_error = on_error
+        task.on_progress = on_progress
+        task.on_cancelled = on_cancelled
+        with self._lock:
+            self._tasks[task.id] = task
+        self._executor.submit(self._run, task, fn)
+        return task
+
+    def _run(self, task: Task, fn: Callable[[Task], Any]):
+        if task.cancel_event.is_set():
+            self._results.put(("cancelled", task, None))
+            return
+        task.state = "running"
+        self._results.put(("started", task, None))
+        try:
+            result = fn(task)
+        except Exception as e:
+            self._results.put(("cancelled" if task.cancel_event.is_set() else "failed", task, e))
+            return
+        self._results.put(("done", task, result))
+
+    def poll(self) -> bool:
+        """Run callbacks for everything finished since the last poll; returns True if any state changed"""
+        changed = False
+        while True:
+            try:
+                kind, task, payload = self._results.get_nowait()
+            except queue.Empty:
+                return changed
+            changed = True
+
+            if kind == "progress":
+                task.progress = payload[0]
+                if task.on_progress is not None:
+                    task.on_progress(*payload)
+                continue
+            if kind == "started":
+                continue
+
+            task.state = kind
+            with self._lock:
+                self._tasks.pop(task.id, None)
+            if kind == "done" and task.on_done is not None:
+                task.on_done(payload)
+            elif kind == "failed" and task.on_error is not None:
+                task.on_error(payload)
+            elif kind == "cancelled" and task.on_cancelled is not None:
+                task.on_cancelled()
+
+    def active(self, group: Optional[str] = None) -> List[Task]:
+        """Queued and running tasks, optionally only those in ``group``"""
+        with self._lock:
+            return [task for task in self._tasks.values() if group is None or task.group == group]
+
+    def cancel_all(self, group: Optional[str] = None):
+        for task in self.active(group):
+            task.cancel()
+
+    def shutdown(self):
+        """Cancel everything and stop the workers without waiting"""
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,329 @@
+"""
+Bulk Generation Dialog for AI Commit
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Callable
+import tkinter as tk
+from tkinter import ttk, scrolledtext, messagebox
+
+from src.core.bulk_generator import BulkGenerator, BulkItem
+
+STATE_ICONS = {
+    "pending": "⏳",
+    "staging": "➕",
+    "queued": "⏳",
+    "generating": "🤖",
+    "ready": "✅",
+    "skipped": "⚪",
+    "failed": "❌",
+    "cancelled": "⏹️",
+    "committed": "💾",
+    "pushed": "🚀"
+}
+
+
+class BulkDialog:
+    """Review table for messages generated across all dirty repositories"""
+
+    def __init__(self, parent, bulk_generator: BulkGenerator, items: List[BulkItem], provider: str,
+                 auto_push: bool = False, log_func: Optional[Callable] = None,
+                 on_close: Optional[Callable[[int], None]] = None):
+        self.parent = parent
+        self.bulk_generator = bulk_generator
+        self.items = items
+        self.provider = provider
+        self.log = log_func or (lambda message, level="info": None)
+        self.on_close = on_close
+        self.committed = 0
+        self._cancel_event = None
+        self._running = False
+        self._closed = False
+        self._selected: Optional[BulkItem] = None
+
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("📦 Bulk Commit Messages")
+        self.dialog.geometry("900x620")
+        self.dialog.resizable(True, True)
+        self.dialog.transient(parent)
+        self.dialog.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.stage_all = tk.BooleanVar(value=False)
+        self.push = tk.BooleanVar(value=auto_push)
+
+        # Center the dialog
+        self.dialog.update_idletasks()
+        x = parent.winfo_x() + (parent.winfo_width() - self.dialog.winfo_width()) // 2
+        y = parent.winfo_y() + (parent.winfo_height() - self.dialog.winfo_height()) // 2
+        self.dialog.geometry(f"+{x}+{y}")
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        main_frame = ttk.Frame(self.dialog, padding="15")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        # Run controls
+        top_frame = ttk.Frame(main_frame)
+        top_frame.pack(fill=tk.X, pady=(0, 5))
+
+        ttk.Label(top_frame, text=f"{len(self.items)} repositories with changes ({self.provider})").pack(side=tk.LEFT)
+        self.stop_button = ttk.Button(top_frame, text="⏹️ Stop", command=self.stop, state='disabled')
+        self.stop_button.pack(side=tk.RIGHT, padx=2)
+        self.generate_button = ttk.Button(top_frame, text="🤖 Generate All", command=self.generate_all)
+        self.generate_button.pack(side=tk.RIGHT, padx=2)
+        ttk.Checkbutton(top_frame, text="Stage all changes first", variable=self.stage_all).pack(side=tk.RIGHT, padx=10)
+
+        # Review table
+        table_frame = ttk.Frame(main_frame)
+        table_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+
+        columns = ("accept", "repo", "files", "state", "message")
+        self.tree = ttk.Treeview(table_frame, columns=columns, show="headings", selectmode="browse")
+        self.tree.heading("accept", text="✔")
+        self.tree.heading("repo", text="Repository")
+        self.tree.heading("files", text="Files")
+        self.tree.heading("state", text="Status")
+        self.tree.heading("message", text="Message")
+        self.tree.column("accept", width=40, stretch=False, anchor=tk.CENTER)
+        self.tree.column("repo", width=180, stretch=False)
+        self.tree.column("files", width=50, stretch=False, anchor=tk.E)
+        self.tree.column("state", width=120, stretch=False)
+        self.tree.column("message", width=400)
+
+        scrollbar = ttk.Scrollbar(table_frame, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        for index, item in enumerate(self.items):
+            self.tree.insert("", tk.END, iid=str(index), values=self._row_values(item))
+        self.tree.bind("<<TreeviewSelect>>", self.on_item_selected)
+        self.tree.bind("<Double-1>", lambda event: self.toggle_accept())
+
+        # Message editor for the selected repository
+        editor_frame = ttk.LabelFrame(main_frame, text="💬 Message", padding="5")
+        editor_frame.pack(fill=tk.X, pady=5)
+
+        self.message_text = scrolledtext.ScrolledText(editor_frame, height=5, wrap=tk.WORD, font=('Courier', 9))
+        self.message_text.pack(fill=tk.X, expand=True)
+
+        editor_buttons = ttk.Frame(editor_frame)
+        editor_buttons.pack(fill=tk.X, pady=(5, 0))
+        ttk.Button(editor_buttons, text="💾 Apply Edit", command=self.apply_edit).pack(side=tk.LEFT, padx=2)
+        ttk.Button(editor_buttons, text="✔ Accept / Reject", command=self.toggle_accept).pack(side=tk.LEFT, padx=2)
+        ttk.Button(editor_buttons, text="🔁 Regenerate", command=self.regenerate_selected).pack(side=tk.LEFT, padx=2)
+
+        # Commit controls
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X, pady=(5, 0))
+
+        ttk.Button(button_frame, text="❌ Close", command=self.close).pack(side=tk.RIGHT, padx=5)
+        self.commit_button = ttk.Button(button_frame, text="✅ Commit Accepted", command=self.commit_accepted)
+        self.commit_button.pack(side=tk.RIGHT, padx=5)
+        ttk.Checkbutton(button_frame, text="Push after commit", variable=self.push).pack(side=tk.RIGHT, padx=10)
+
+        self.status_label = ttk.Label(main_frame, text="Ready", relief=tk.SUNKEN, anchor=tk.W)
+        self.status_label.pack(fill=tk.X, pady=(5, 0))
+
+    def _row_values(self, item: BulkItem):
+        first_line = item.message.split('\n')[0] if item.message else item.error
+        return (
+            "✔" if item.accepted else "",
+            item.name,
+            item.files or "",
+            f"{STATE_ICONS.get(item.state, '')} {item.state}",
+            first_line
+        )
+
+    def _post(self, callback: Callable, *args):
+        """Run ``callback`` on the main thread; usable from workers after the dialog closed"""
+        try:
+            # The parent outlives the dialog, so results still arrive after Close
+            self.parent.after(0, callback, *args)
+        except (tk.TclError, RuntimeError):
+            # Application is shutting down
+            pass
+
+    def _on_update(self, item: BulkItem):
+        """Called from worker threads whenever an item changes"""
+        if not self._closed:
+            self._post(self._refresh_item, item)
+
+    def _refresh_item(self, item: BulkItem):
+        """Redraw one row (called from main thread)"""
+        if self._closed:
+            return
+        self.tree.item(str(self.items.index(item)), values=self._row_values(item))
+        if item is self._selected and item.state == "ready":
+            self._show_message(item)
+
+        done = sum(1 for i in self.items if i.is_done)
+        ready = sum(1 for i in self.items if i.state == "ready")
+        self.status_label.config(text=f"{done}/{len(self.items)} done, {ready} ready to commit")
+
+    def _set_running(self, running: bool):
+        self._running = running
+        self.generate_button.configure(state='disabled' if running else 'normal')
+        self.commit_button.configure(state='disabled' if running else 'normal')
+        self.stop_button.configure(state='normal' if running else 'disabled')
+
+    def generate_all(self):
+        """Collect staged diffs (optionally staging first) and generate messages for every repository"""
+        if self._running:
+            return
+        pending = [item for item in self.items if item.state not in ("committed", "pushed")]
+        if not pending:
+            return
+        stage_all = self.stage_all.get()
+        if stage_all and not messagebox.askyesno(
+                "Stage All Changes",
+                f"Stage all changes, including untracked files, in {len(pending)} repositories?",
+                parent=self.dialog):
+            return
+
+        for item in pending:
+            item.state = "pending"
+            item.error = ""
+            self._refresh_item(item)
+
+        self._cancel_event = threading.Event()
+        self._set_running(True)
+        self.log(f"📦 Generating messages for {len(pending)} repositories...")
+
+        thread = threading.Thread(
+            target=self._generate_thread,
+            args=(pending, stage_all, self._cancel_event)
+        )
+        thread.daemon = True
+        thread.start()
+
+    def _generate_thread(self, items: List[BulkItem], stage_all: bool, cancel_event: threading.Event):
+        try:
+            self.bulk_generator.run(items, self.provider, stage_all=stage_all,
+                                    on_update=self._on_update, cancel_event=cancel_event)
+        except Exception as e:
+            self._post(self.log, f"❌ Bulk generation failed: {e}", "error")
+        self._post(self._finish_generation, items)
+
+    def _finish_generation(self, items: List[BulkItem]):
+        """Called from main thread once a bulk run completes"""
+        if self._closed:
+            return
+        self._set_running(False)
+        ready = sum(1 for item in items if item.state == "ready")
+        failed = sum(1 for item in items if item.state == "failed")
+        self.log(f"📦 {ready} message(s) ready, {failed} failed", "warning" if failed else "success")
+
+    def stop(self):
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+            self.status_label.config(text="Stopping...")
+
+    def on_item_selected(self, event):
+        selection = self.tree.selection()
+        if not selection:
+            return
+        self._selected = self.items[int(selection[0])]
+        self._show_message(self._selected)
+
+    def _show_message(self, item: BulkItem):
+        self.message_text.delete(1.0, tk.END)
+        self.message_text.insert(1.0, item.message or item.error)
+
+    def apply_edit(self):
+        """Store the edited message for the selected repository"""
+        item = self._selected
+        if item is None:
+            return
+        message = self.message_text.get(1.0, tk.END).strip()
+        if not message:
+            messagebox.showwarning("No Message", "The commit message cannot be empty!", parent=self.dialog)
+            return
+        item.message = message
+        item.error = ""
+        if item.state in ("failed", "cancelled", "skipped"):
+            item.state = "ready"
+        item.accepted = True
+        self._refresh_item(item)
+
+    def toggle_accept(self):
+        item = self._selected
+        if item is None:
+            return
+        item.accepted = not item.accepted
+        self._refresh_item(item)
+
+    def regenerate_selected(self):
+        """Ask for a fresh message for the selected repository"""
+        item = self._selected
+        if item is None or item.state in ("committed", "pushed", "queued", "generating"):
+            return
+        cancel_event = self._cancel_event if self._running else threading.Event()
+        thread = threading.Thread(
+            target=self.bulk_generator.regenerate,
+            args=(item, self.provider, self._on_update, cancel_event)
+        )
+        thread.daemon = True
+        thread.start()
+
+    def commit_accepted(self):
+        """Commit every accepted repository that has a message"""
+        # Keep edits made to the selected repository
+        if self._selected is not None and self._selected.state == "ready":
+            edited = self.message_text.get(1.0, tk.END).strip()
+            if edited:
+                self._selected.message = edited
+
+        items = [item for item in self.items if item.accepted and item.state == "ready" and item.message]
+        if not items:
+            messagebox.showinfo("Nothing to Commit", "No accepted messages are ready.", parent=self.dialog)
+            return
+        if not messagebox.askyesno("Commit", f"Commit {len(items)} repositories?", parent=self.dialog):
+            return
+
+        self._set_running(True)
+        self.stop_button.configure(state='disabled')
+        thread = threading.Thread(target=self._commit_thread, args=(items, self.push.get()))
+        thread.daemon = True
+        thread.start()
+
+    def _commit_thread(self, items: List[BulkItem], push: bool):
+        workers = self.bulk_generator.settings_manager.get("scan_max_workers", 8)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            results = list(executor.map(lambda item: self.bulk_generator.commit(item, push, self._on_update), items))
+        self._post(self._finish_commit, items, results)
+
+    def _finish_commit(self, items: List[BulkItem], results: List[bool]):
+        """Called from main thread once commits complete"""
+        committed = sum(results)
+        self.committed += committed
+        for item, success in zip(items, results):
+            if not success:
+                self.log(f"❌ {item.name}: commit failed: {item.error}", "error")
+            elif item.error:
+                self.log(f"⚠️ {item.name}: {item.error}", "warning")
+            else:
+                self.log(f"✅ {item.name}: {item.message.split(chr(10))[0]}", "success")
+
+        if self._closed:
+            # Closed while committing: the window was told about earlier commits only
+            if committed and self.on_close:
+                self.on_close(committed)
+            return
+        self._set_running(False)
+        if committed == len(items):
+            messagebox.showinfo("Success", f"Committed {committed} repositories.", parent=self.dialog)
+        else:
+            messagebox.showwarning("Partial Success",
+                                   f"Committed {committed} of {len(items)} repositories.\nCheck Activity Log for details.",
+                                   parent=self.dialog)
+
+    def close(self):
+        self._closed = True
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+        self.dialog.destroy()
+        if self.on_close:
+            self.on_close(self.committed)
@@ -0,0 +1,70 @@
+"""
+Candidate Picker Dialog for AI Commit
+"""
+
+from typing import List, Callable
+import tkinter as tk
+from tkinter import ttk, scrolledtext
+
+
+class CandidateDialog:
+    """Pick one of several generated commit messages"""
+
+    def __init__(self, parent, messages: List[str], on_select: Callable[[str], None]):
+        self.parent = parent
+        self.messages = messages
+        self.on_select = on_select
+
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("🎯 Choose a Commit Message")
+        self.dialog.geometry("640x420")
+        self.dialog.resizable(True, True)
+        self.dialog.transient(parent)
+
+        # Center the dialog
+        self.dialog.update_idletasks()
+        x = parent.winfo_x() + (parent.winfo_width() - self.dialog.winfo_width()) // 2
+        y = parent.winfo_y() + (parent.winfo_height() - self.dialog.winfo_height()) // 2
+        self.dialog.geometry(f"+{x}+{y}")
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        main_frame = ttk.Frame(self.dialog, padding="15")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(main_frame, text=f"{len(self.messages)} candidates generated in one request").pack(anchor=tk.W)
+
+        self.listbox = tk.Listbox(main_frame, height=min(len(self.messages), 8), exportselection=False)
+        self.listbox.pack(fill=tk.X, pady=5)
+        for index, message in enumerate(self.messages, 1):
+            self.listbox.insert(tk.END, f"{index}. {message.split(chr(10))[0]}")
+        self.listbox.bind("<<ListboxSelect>>", self.on_candidate_selected)
+        self.listbox.bind("<Double-1>", lambda event: self.use_selected())
+
+        preview_frame = ttk.LabelFrame(main_frame, text="💬 Preview", padding="5")
+        preview_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        self.preview_text = scrolledtext.ScrolledText(preview_frame, height=8, wrap=tk.WORD, font=('Courier', 9))
+        self.preview_text.pack(fill=tk.BOTH, expand=True)
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X, pady=(5, 0))
+        ttk.Button(button_frame, text="❌ Close", command=self.dialog.destroy).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(button_frame, text="✅ Use Message", command=self.use_selected).pack(side=tk.RIGHT, padx=5)
+
+        self.listbox.selection_set(0)
+        self.on_candidate_selected(None)
+
+    def on_candidate_selected(self, event):
+        selection = self.listbox.curselection()
+        if not selection:
+            return
+        self.preview_text.delete(1.0, tk.END)
+        self.preview_text.insert(1.0, self.messages[selection[0]])
+
+    def use_selected(self):
+        """Hand the previewed (possibly edited) message back and close"""
+        message = self.preview_text.get(1.0, tk.END).strip()
+        if message:
+            self.on_select(message)
+        self.dialog.destroy()
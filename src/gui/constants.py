@@ -3,6 +3,19 @@
 Constants for the GUI
 """
 
+# Interval for draining streamed tokens into the message box (ms)
+STREAM_FLUSH_MS = 50
+
+# Interval for refreshing the AI latency panel (ms)
+STATS_REFRESH_MS = 2000
+
+# Delay after startup before provider SDKs are imported in the background (ms)
+SDK_WARMUP_DELAY_MS = 1000
+
+# Interval for collecting results of background git tasks (ms)
+TASK_POLL_MS = 50
+
+
 class UI_STRINGS:
     TITLE = "AI Commit by RyuCode"
     GEOMETRY = "950x750"
@@ -18,13 +31,16 @@ class UI_STRINGS:
     AI_PROVIDER_LABEL = "AI Provider:"
     GEMINI_RADIO = "Gemini (Free)"
     CHATGPT_RADIO = "ChatGPT"
+    OFFLINE_RADIO = "Offline (Instant)"
     AUTO_PUSH_CHECKBOX = "Auto Push to Origin"
     
     # Repo Frame
     REPO_FRAME_TITLE = "📂 Select Repository"
     SCAN_BUTTON = "🔍 Scan"
+    FULL_SCAN_BUTTON = "♻️ Full Rescan"
     BROWSE_BUTTON = "📁 Browse"
     REFRESH_BUTTON = "🔄 Refresh"
+    BULK_BUTTON = "📦 Bulk Generate"
     
     # Files Frame
     FILES_FRAME_TITLE = "📝 Changed Files"
@@ -36,6 +52,8 @@ class UI_STRINGS:
     # Commit Message Frame
     COMMIT_FRAME_TITLE = "💬 Commit Message"
     GENERATE_BUTTON = "🤖 Generate with AI"
+    REGENERATE_BUTTON = "🔁 Regenerate"
+    STOP_BUTTON = "⏹️ Stop"
     CLEAR_BUTTON = "🗑️ Clear"
     
     # Action Buttons
@@ -46,5 +64,8 @@ class UI_STRINGS:
     # Log Frame
     LOG_FRAME_TITLE = "📋 Activity Log"
     
+    # Stats Frame
+    STATS_FRAME_TITLE = "📊 AI Latency"
+    
     # Status Bar
     STATUS_READY = "Ready"
@@ -4,22 +4,34 @@ Main Window GUI for AI Commit
 
 import os
 import sys
+import bisect
 import threading
 from pathlib import Path
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from typing import Optional, List
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
 
 from src.core.git_manager import GitManager
-from src.core.ai_provider import AIProvider
+from src.core.async_git import AsyncGitManager
+from src.core.git_status import StatusList, display_path
+from src.core.staged_diff import StagedDiff
+from src.core.ai_provider import AIProvider, GenerationCancelled, OFFLINE_PROVIDER
+from src.core.bulk_generator import BulkGenerator
+from src.core.metrics import MetricsRecorder
+from src.core.model_catalog import PromptBudget
+from src.core.prompt_builder import PromptBuilder
+from src.core.response_cache import ResponseCache
 from src.core.settings_manager import SettingsManager
+from src.core.speculative import SpeculativeGenerator, staged_signature
+from src.core.status_cache import StatusCache
+from src.core.task_executor import TaskExecutor, Task
+from src.gui.bulk_dialog import BulkDialog
+from src.gui.candidate_dialog import CandidateDialog
 from src.gui.settings_dialog import SettingsDialog
 from src.utils.theme import ThemeManager
 from src.utils.helpers import log_message
-from src.gui.constants import UI_STRINGS
-
-
-from src.gui.constants import UI_STRINGS
+from src.gui.constants import UI_STRINGS, STREAM_FLUSH_MS, STATS_REFRESH_MS, SDK_WARMUP_DELAY_MS, TASK_POLL_MS
 
 class AICommit:
     def __init__(self, root):
@@ -30,10 +42,40 @@ class AICommit:
         
         # Initialize managers
         self.settings_manager = SettingsManager()
-        self.git_manager = GitManager()
-        self.ai_provider = AIProvider(self.settings_manager)
+        status_cache = None
+        if self.settings_manager.get("status_cache_enabled", True):
+            status_cache = StatusCache(
+                os.path.join(self.settings_manager.get_data_dir(), "status_cache.json"),
+                max_age=self.settings_manager.get("status_cache_max_age", 10 * 60)
+            )
+        fast_status = self.settings_manager.get("index_fast_status", False)
+        if self.settings_manager.get("async_git_backend", False):
+            self.git_manager = AsyncGitManager(status_cache, fast_status=fast_status)
+        else:
+            self.git_manager = GitManager(status_cache, fast_status=fast_status)
+        self.prompt_builder = PromptBuilder(self.git_manager)
+        response_cache = None
+        if self.settings_manager.get("ai_cache_enabled", True):
+            response_cache = ResponseCache(
+                os.path.join(self.settings_manager.get_data_dir(), "ai_cache"),
+                max_entries=self.settings_manager.get("ai_cache_max_entries", 500),
+                max_age=self.settings_manager.get("ai_cache_max_age", 30 * 24 * 60 * 60)
+            )
+        metrics = MetricsRecorder(
+            os.path.join(self.settings_manager.get_data_dir(), "ai_metrics.jsonl")
+            if self.settings_manager.get("metrics_log_enabled", True) else None,
+            max_bytes=self.settings_manager.get("metrics_log_max_bytes", 1024 * 1024),
+            backup_count=self.settings_manager.get("metrics_log_backups", 3)
+        )
+        self.ai_provider = AIProvider(self.settings_manager, response_cache, metrics)
+        self.bulk_generator = BulkGenerator(self.git_manager, self.prompt_builder, self.ai_provider, self.settings_manager)
+        self.speculator = SpeculativeGenerator(self.git_manager, self.prompt_builder, self.ai_provider, self.settings_manager)
         self.theme_manager = ThemeManager()
         
+        # Git work for the selected repository runs here, one task at a time
+        self.git_tasks = TaskExecutor(max_workers=1, thread_name_prefix="git")
+        self._polling_tasks = False
+        
         # Variables
         self.selected_repo = tk.StringVar()
         self.ai_provider_var = tk.StringVar(value="gemini")
@@ -44,8 +86,15 @@ class AICommit:
         self.selected_files = []
         self.repos = []
         self.current_repo_path = None
-        self.raw_git_status = []
+        self.raw_git_status = StatusList()
         self._is_generating = False
+        self._scan_cancel = None
+        self._generation_cancel = None
+        self._stream_buffer = []
+        self._stream_lock = threading.Lock()
+        self._placeholder_shown = False
+        # Repository, provider and staged entries speculated on last
+        self._speculated_staged = None
         
         # Setup UI
         self.setup_ui()
@@ -55,6 +104,15 @@ class AICommit:
         
         # Auto scan on start
         self.root.after(500, self.scan_repositories)
+        
+        # Import provider SDKs in the background once the window is up
+        if self.settings_manager.get("sdk_warmup", True):
+            self.root.after(SDK_WARMUP_DELAY_MS, self._start_sdk_warmup)
+    
+    def _start_sdk_warmup(self):
+        thread = threading.Thread(target=self.ai_provider.warmup, name="sdk-warmup")
+        thread.daemon = True
+        thread.start()
     
     def setup_ui(self):
         """Setup user interface"""
@@ -111,6 +169,7 @@ class AICommit:
         ai_frame.grid(row=0, column=1, sticky=tk.W, padx=5)
         ttk.Radiobutton(ai_frame, text=UI_STRINGS.GEMINI_RADIO, variable=self.ai_provider_var, value="gemini").pack(side=tk.LEFT, padx=5)
         ttk.Radiobutton(ai_frame, text=UI_STRINGS.CHATGPT_RADIO, variable=self.ai_provider_var, value="chatgpt").pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(ai_frame, text=UI_STRINGS.OFFLINE_RADIO, variable=self.ai_provider_var, value=OFFLINE_PROVIDER).pack(side=tk.LEFT, padx=5)
         
         # Auto Push
         ttk.Checkbutton(settings_frame, text=UI_STRINGS.AUTO_PUSH_CHECKBOX, variable=self.auto_push).grid(row=0, column=2, padx=20, sticky=tk.E)
@@ -125,8 +184,11 @@ class AICommit:
         repo_buttons.grid(row=0, column=0, padx=5, sticky=tk.W)
         
         ttk.Button(repo_buttons, text=UI_STRINGS.SCAN_BUTTON, command=self.scan_repositories).pack(side=tk.LEFT, padx=2)
+        ttk.Button(repo_buttons, text=UI_STRINGS.FULL_SCAN_BUTTON, command=lambda: self.scan_repositories(force_refresh=True)).pack(side=tk.LEFT, padx=2)
         ttk.Button(repo_buttons, text=UI_STRINGS.BROWSE_BUTTON, command=self.browse_repository).pack(side=tk.LEFT, padx=2)
         ttk.Button(repo_buttons, text=UI_STRINGS.REFRESH_BUTTON, command=self.load_changed_files).pack(side=tk.LEFT, padx=2)
+        self.bulk_button = ttk.Button(repo_buttons, text=UI_STRINGS.BULK_BUTTON, command=self.open_bulk_dialog)
+        self.bulk_button.pack(side=tk.LEFT, padx=2)
         
         # Repository dropdown
         self.repo_combo = ttk.Combobox(repo_frame, textvariable=self.selected_repo, state="readonly")
@@ -142,7 +204,8 @@ class AICommit:
         file_buttons.pack(fill=tk.X, pady=(0, 5))
         ttk.Button(file_buttons, text=UI_STRINGS.SELECT_ALL_BUTTON, command=self.select_all_files, width=15).pack(side=tk.LEFT, padx=2)
         ttk.Button(file_buttons, text=UI_STRINGS.CLEAR_SELECTION_BUTTON, command=self.clear_file_selection, width=15).pack(side=tk.LEFT, padx=2)
-        ttk.Button(file_buttons, text=UI_STRINGS.ADD_TO_STAGE_BUTTON, command=self.add_selected_files, width=15).pack(side=tk.LEFT, padx=2)
+        self.add_button = ttk.Button(file_buttons, text=UI_STRINGS.ADD_TO_STAGE_BUTTON, command=self.add_selected_files, width=15)
+        self.add_button.pack(side=tk.LEFT, padx=2)
         
         # Info label
         self.info_label = ttk.Label(
@@ -192,20 +255,27 @@ class AICommit:
         # Message buttons
         msg_buttons = ttk.Frame(message_frame)
         msg_buttons.pack(fill=tk.X)
-        ttk.Button(msg_buttons, text=UI_STRINGS.GENERATE_BUTTON, command=self.auto_add_and_generate, width=20).pack(side=tk.LEFT, padx=2)
+        self.generate_button = ttk.Button(msg_buttons, text=UI_STRINGS.GENERATE_BUTTON, command=self.auto_add_and_generate, width=20)
+        self.generate_button.pack(side=tk.LEFT, padx=2)
+        self.regenerate_button = ttk.Button(msg_buttons, text=UI_STRINGS.REGENERATE_BUTTON, command=self.regenerate_commit_message, width=15)
+        self.regenerate_button.pack(side=tk.LEFT, padx=2)
+        self.stop_button = ttk.Button(msg_buttons, text=UI_STRINGS.STOP_BUTTON, command=self.cancel_generation, width=10, state='disabled')
+        self.stop_button.pack(side=tk.LEFT, padx=2)
         ttk.Button(msg_buttons, text=UI_STRINGS.CLEAR_BUTTON, command=self.clear_message, width=12).pack(side=tk.LEFT, padx=2)
         
         # Action Buttons
         action_frame = ttk.Frame(main_frame)
         action_frame.grid(row=5, column=0, columnspan=3, pady=10)
         
-        ttk.Button(action_frame, text=UI_STRINGS.COMMIT_PUSH_BUTTON, command=self.commit_and_push, width=18).pack(side=tk.LEFT, padx=5)
-        ttk.Button(action_frame, text=UI_STRINGS.COMMIT_ONLY_BUTTON, command=self.commit_only, width=15).pack(side=tk.LEFT, padx=5)
+        self.commit_push_button = ttk.Button(action_frame, text=UI_STRINGS.COMMIT_PUSH_BUTTON, command=self.commit_and_push, width=18)
+        self.commit_push_button.pack(side=tk.LEFT, padx=5)
+        self.commit_only_button = ttk.Button(action_frame, text=UI_STRINGS.COMMIT_ONLY_BUTTON, command=self.commit_only, width=15)
+        self.commit_only_button.pack(side=tk.LEFT, padx=5)
         ttk.Button(action_frame, text=UI_STRINGS.CANCEL_BUTTON, command=self.root.quit, width=12).pack(side=tk.LEFT, padx=5)
         
         # Log Frame
         log_frame = ttk.LabelFrame(main_frame, text=UI_STRINGS.LOG_FRAME_TITLE, padding="5")
-        log_frame.grid(row=6, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
+        log_frame.grid(row=6, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
         
         self.log_text = scrolledtext.ScrolledText(
             log_frame, 
@@ -218,10 +288,42 @@ class AICommit:
         )
         self.log_text.pack(fill=tk.BOTH, expand=True)
         
+        # Stats Frame
+        stats_frame = ttk.LabelFrame(main_frame, text=UI_STRINGS.STATS_FRAME_TITLE, padding="5")
+        stats_frame.grid(row=6, column=2, sticky=(tk.W, tk.E, tk.N, tk.S), padx=(5, 0), pady=5)
+        
+        columns = ("model", "requests", "p50", "p95", "ttft")
+        self.stats_tree = ttk.Treeview(stats_frame, columns=columns, show="headings", height=4)
+        for column, title, width in (("model", "Model", 110), ("requests", "n", 35), ("p50", "p50", 45),
+                                     ("p95", "p95", 45), ("ttft", "TTFT", 45)):
+            self.stats_tree.heading(column, text=title)
+            self.stats_tree.column(column, width=width, stretch=column == "model",
+                                   anchor=tk.W if column == "model" else tk.E)
+        self.stats_tree.pack(fill=tk.BOTH, expand=True)
+        self.root.after(STATS_REFRESH_MS, self._refresh_stats)
+        
         # Status bar
         self.status_label = ttk.Label(main_frame, text=UI_STRINGS.STATUS_READY, relief=tk.SUNKEN, anchor=tk.W)
         self.status_label.grid(row=7, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(5, 0))
 
+    def _refresh_stats(self):
+        """Redraw the latency panel from the rolling metrics (called from main thread)"""
+        def seconds(value):
+            return f"{value:.1f}s" if value is not None else "-"
+        
+        rows = []
+        for (provider, model, kind), stats in sorted(self.ai_provider.metrics_summary().items()):
+            if not stats["requests"]:
+                continue
+            name = model if kind == "message" else f"{model} ({kind})"
+            rows.append((name, stats["requests"], seconds(stats["p50"]), seconds(stats["p95"]),
+                         seconds(stats["ttft_p50"])))
+        
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        for row in rows:
+            self.stats_tree.insert("", tk.END, values=row)
+        self.root.after(STATS_REFRESH_MS, self._refresh_stats)
+    
     def set_app_icon(self):
         """Set application icon."""
         try:
@@ -250,12 +352,18 @@ class AICommit:
     
     def open_settings(self):
         """Open settings dialog"""
-        SettingsDialog(self.root, self.settings_manager)
+        SettingsDialog(self.root, self.settings_manager, on_save=self._on_settings_saved)
         # Update theme if changed in settings
         if self.dark_mode.get() != self.settings_manager.get("dark_mode", False):
             self.dark_mode.set(self.settings_manager.get("dark_mode", False))
             self.toggle_theme()
     
+    def _on_settings_saved(self, previous_settings: dict):
+        """Rescan when the parent folder or scan options changed in settings"""
+        scan_keys = ("parent_folder", "scan_recursive", "scan_max_depth", "scan_ignore_dirs")
+        if any(previous_settings.get(key) != self.settings_manager.get(key) for key in scan_keys):
+            self.scan_repositories()
+    
     def browse_repository(self):
         """Browse for specific repository folder"""
         folder = filedialog.askdirectory(
@@ -266,30 +374,36 @@ class AICommit:
             # Add to recent repos
             self.settings_manager.add_recent_repo(folder)
             
-            # Create repo entry
-            repo_name = Path(folder).name
-            has_changes = self.git_manager.check_has_changes(folder)
-            indicator = "🔴" if has_changes else "⚪"
-            
-            repo_entry = {
-                'name': repo_name,
-                'path': folder,
-                'has_changes': has_changes,
-                'display_name': f"{indicator} {repo_name} (browsed)"
-            }
-            
-            # Add to repos list and select
-            self.repos.append(repo_entry)
-            current_values = list(self.repo_combo['values'])
-            current_values.append(repo_entry['display_name'])
-            self.repo_combo['values'] = current_values
-            self.repo_combo.set(repo_entry['display_name'])
-            self.on_repo_selected(None)
-            
-            self.log(f"📂 Selected repository: {repo_name}")
+            self.run_git_task(
+                "Checking repository", lambda task: self.git_manager.check_has_changes(folder), group="read",
+                on_done=lambda has_changes: self._add_browsed_repo(folder, has_changes)
+            )
         elif folder:
             messagebox.showerror("Error", "Selected folder is not a Git repository!")
     
+    def _add_browsed_repo(self, folder: str, has_changes: bool):
+        """Add and select a browsed repository (called from main thread)"""
+        # Create repo entry
+        repo_name = Path(folder).name
+        indicator = "🔴" if has_changes else "⚪"
+        
+        repo_entry = {
+            'name': repo_name,
+            'path': folder,
+            'has_changes': has_changes,
+            'display_name': f"{indicator} {repo_name} (browsed)"
+        }
+        
+        # Add to repos list and select
+        self.repos.append(repo_entry)
+        current_values = list(self.repo_combo['values'])
+        current_values.append(repo_entry['display_name'])
+        self.repo_combo['values'] = current_values
+        self.repo_combo.set(repo_entry['display_name'])
+        self.on_repo_selected(None)
+        
+        self.log(f"📂 Selected repository: {repo_name}")
+    
     def toggle_theme(self):
         """Toggle between dark and light theme"""
         self.theme_manager.toggle_theme(self.root, self.dark_mode.get())
@@ -329,28 +443,140 @@ class AICommit:
         self.status_label.config(text=message)
         self.root.update_idletasks()
     
-    def scan_repositories(self):
-        """Scan for git repositories"""
+    def run_git_task(self, name: str, fn, group: str = "write", on_done=None,
+                     on_error=None, on_cancelled=None) -> Task:
+        """Run ``fn(task)`` on the git worker and deliver its result on the main thread.
+
+        Tasks run one at a time in submission order. ``write`` tasks change
+        the index or the remote, so conflicting actions are disabled until
+        they finish; ``diff`` tasks collect the staged changes for generation.
+        """
+        task = self.git_tasks.submit(
+            name, fn, group=group,
+            on_done=on_done,
+            on_error=on_error or (lambda error: self._on_git_task_error(name, error)),
+            on_progress=self.log,
+            on_cancelled=on_cancelled or (lambda: self._on_git_task_cancelled(name))
+        )
+        if group == "write":
+            self.set_status(f"{name}...")
+        self._update_action_state()
+        
+        if not self._polling_tasks:
+            self._polling_tasks = True
+            self.root.after(TASK_POLL_MS, self._poll_git_tasks)
+        return task
+    
+    def _poll_git_tasks(self):
+        """Deliver finished git task results (called from main thread)"""
+        if self.git_tasks.poll():
+            self._update_action_state()
+        if self.git_tasks.active():
+            self.root.after(TASK_POLL_MS, self._poll_git_tasks)
+        else:
+            self._polling_tasks = False
+    
+    def _on_git_task_error(self, name: str, error: Exception):
+        self.log(f"❌ {name} failed: {error}", "error")
+        self.set_status(UI_STRINGS.STATUS_READY)
+    
+    def _on_git_task_cancelled(self, name: str):
+        self.log(f"⏹️ {name} cancelled", "warning")
+        self.set_status(UI_STRINGS.STATUS_READY)
+    
+    def _update_action_state(self):
+        """Disable actions that conflict with running git tasks or generation"""
+        writing = bool(self.git_tasks.active("write"))
+        preparing = bool(self.git_tasks.active("diff"))
+        
+        state = 'disabled' if writing else 'normal'
+        for button in (self.add_button, self.commit_push_button, self.commit_only_button, self.bulk_button):
+            button.configure(state=state)
+        
+        state = 'disabled' if writing or preparing or self._is_generating else 'normal'
+        for button in (self.generate_button, self.regenerate_button):
+            button.configure(state=state)
+        
+        self.stop_button.configure(state='normal' if writing or preparing or self._is_generating else 'disabled')
+    
+    def scan_repositories(self, force_refresh: bool = False):
+        """Scan for git repositories in a background thread"""
+        # Cancel any scan still running for a previous parent folder
+        if self._scan_cancel is not None:
+            self._scan_cancel.set()
+        cancel_event = threading.Event()
+        self._scan_cancel = cancel_event
+        
         self.log("🔍 Scanning for repositories...")
         self.set_status("Scanning...")
         
         parent_folder = self.settings_manager.get("parent_folder", str(Path.home()))
         
-        self.repos = self.git_manager.scan_repositories(parent_folder)
+        self.repos = []
+        self.repo_combo['values'] = []
+        self.repo_combo.set('')
+        
+        thread = threading.Thread(
+            target=self._scan_repositories_thread,
+            args=(parent_folder, cancel_event, force_refresh)
+        )
+        thread.daemon = True
+        thread.start()
+    
+    def _scan_repositories_thread(self, parent_folder: str, cancel_event: threading.Event,
+                                  force_refresh: bool = False):
+        """Run repository scan in separate thread"""
+        try:
+            max_depth = 1
+            if self.settings_manager.get("scan_recursive", False):
+                max_depth = self.settings_manager.get("scan_max_depth", 3)
+            
+            repos = self.git_manager.scan_repositories(
+                parent_folder,
+                on_repo=lambda repo: self.root.after(0, self._add_scanned_repo, repo, cancel_event),
+                cancel_event=cancel_event,
+                max_workers=self.settings_manager.get("scan_max_workers", 8),
+                max_depth=max_depth,
+                ignore_dirs=self.settings_manager.get("scan_ignore_dirs"),
+                force_refresh=force_refresh
+            )
+        except Exception as e:
+            self.root.after(0, self.log, f"❌ Scan failed: {e}", "error")
+            repos = []
+        self.root.after(0, self._finish_scan, parent_folder, repos, cancel_event)
+    
+    def _add_scanned_repo(self, repo: dict, cancel_event: threading.Event):
+        """Insert a scanned repository into the dropdown (called from main thread)"""
+        if cancel_event.is_set():
+            return
+        
+        # Keep the dropdown sorted by name while results stream in
+        idx = bisect.bisect([r['name'] for r in self.repos], repo['name'])
+        self.repos.insert(idx, repo)
+        self.repo_combo['values'] = [r['display_name'] for r in self.repos]
+        self.set_status(f"Scanning... {len(self.repos)} found")
+    
+    def _finish_scan(self, parent_folder: str, repos: list, cancel_event: threading.Event):
+        """Finalize repository scan (called from main thread)"""
+        if cancel_event.is_set():
+            return
+        
+        self.repos = repos
         
         if self.repos:
             repo_names = [repo['display_name'] for repo in self.repos]
             self.repo_combo['values'] = repo_names
             self.log(f"✅ Found {len(self.repos)} repositories in {parent_folder}", "success")
             
-            # Auto-select first repo with changes
-            for idx, repo in enumerate(self.repos):
-                if repo['has_changes']:
-                    self.repo_combo.current(idx)
-                    self.on_repo_selected(None)
-                    break
-            else:  # Select first repo if no changes found
-                if self.repos:
+            # Auto-select first repo with changes, unless the user already
+            # picked one while the scan was running
+            if self.repo_combo.current() < 0:
+                for idx, repo in enumerate(self.repos):
+                    if repo['has_changes']:
+                        self.repo_combo.current(idx)
+                        self.on_repo_selected(None)
+                        break
+                else:  # Select first repo if no changes found
                     self.repo_combo.current(0)
                     self.on_repo_selected(None)
                     
@@ -364,6 +590,24 @@ class AICommit:
         
         self.set_status(UI_STRINGS.STATUS_READY)
     
+    def open_bulk_dialog(self):
+        """Open the bulk generation dialog for every repository with changes"""
+        items = BulkGenerator.items_for(self.repos)
+        if not items:
+            messagebox.showinfo("No Changes", "No scanned repositories have changes.\nScan first or pick another parent folder.")
+            return
+        
+        BulkDialog(
+            self.root, self.bulk_generator, items, self.ai_provider_var.get(),
+            auto_push=self.auto_push.get(), log_func=self.log,
+            on_close=self._on_bulk_closed
+        )
+    
+    def _on_bulk_closed(self, committed: int):
+        """Refresh repository indicators after bulk commits"""
+        if committed:
+            self.scan_repositories()
+    
     def on_repo_selected(self, event):
         """Handle repository selection"""
         selected_idx = self.repo_combo.current()
@@ -380,54 +624,103 @@ class AICommit:
         self.settings_manager.add_recent_repo(repo['path'])
     
     def load_changed_files(self):
-        """Load changed files from selected repository"""
+        """Load changed files from selected repository in the background"""
         if not self.current_repo_path:
             return
         
-        self.files_listbox.delete(0, tk.END)
+        repo_path = self.current_repo_path
+        # A newer refresh makes any queued one pointless
+        self.git_tasks.cancel_all("status")
+        
+        def read_status(task: Task):
+            success, output = self.git_manager.get_status_bytes(repo_path)
+            if not success:
+                return False, StatusList()
+            self.git_manager.update_status_cache(repo_path, bool(output.strip()))
+            return True, self.git_manager.parse_git_status(output)
+        
+        self.run_git_task(
+            "Refreshing changed files", read_status, group="status",
+            on_done=lambda result: self._show_changed_files(repo_path, *result),
+            on_cancelled=lambda: None
+        )
+    
+    def _show_changed_files(self, repo_path: str, success: bool, status: StatusList):
+        """Fill the file list from a status read (called from main thread)"""
+        if repo_path != self.current_repo_path:
+            return
         
-        success, output = self.git_manager.get_status(self.current_repo_path)
+        self.files_listbox.delete(0, tk.END)
         
         if not success:
             self.log("❌ Failed to get file status", "error")
             return
         
-        if not output.strip():
+        if not status:
             self.log("ℹ️ No changes detected")
-            self.raw_git_status = []
+            self.raw_git_status = StatusList()
+            self._speculated_staged = None
             return
         
-        # Parse git status
-        self.raw_git_status = self.git_manager.parse_git_status(output)
+        self._schedule_speculation(status)
+        
+        self.raw_git_status = status
         
-        for file_info in self.raw_git_status:
-            status = file_info['status']
-            filename = file_info['filename']
-            file_type = file_info.get('type', 'regular')
+        for entry in self.raw_git_status:
+            code = entry.status
+            filename = entry.filename
+            file_type = entry.type
             
             # Determine icon based on status
-            if "??" in status or "A" in status:
+            if "??" in code or "A" in code:
                 icon = "🆕"
-            elif "M" in status:
+            elif "M" in code:
                 icon = "✏️"
-            elif "D" in status:
+            elif "D" in code:
                 icon = "🗑️"
-            elif "R" in status:
+            elif "R" in code:
                 icon = "🔄"
             else:
                 icon = "📝"
             
             # For renamed files, show both names
             if file_type == 'renamed':
-                old_file = file_info.get('old_filename', '')
-                display_text = f"{icon} {old_file} → {filename}"
+                old_file = display_path(entry.old_filename or '')
+                display_text = f"{icon} {old_file} → {display_path(filename)}"
             else:
-                display_text = f"{icon} {filename}"
+                display_text = f"{icon} {display_path(filename)}"
             
             self.files_listbox.insert(tk.END, display_text)
         
         self.log(f"📝 Found {len(self.raw_git_status)} changed files")
     
+    def _schedule_speculation(self, status: StatusList):
+        """Start generating in the background once the staged set settles.
+
+        Refreshes that leave the staged entries as they were schedule
+        nothing, so rereading the status does not rerun git for the key.
+        """
+        if not self.settings_manager.get("speculative_generation", False) or not self.current_repo_path:
+            return
+        staged = staged_signature(status)
+        if not staged:
+            # Staging the same entries again after a commit is a change
+            self._speculated_staged = None
+            return
+        signature = (self.current_repo_path, self.ai_provider_var.get(), staged)
+        if signature == self._speculated_staged:
+            return
+        self._speculated_staged = signature
+        self.speculator.schedule(
+            self.current_repo_path, self.ai_provider_var.get(),
+            on_ready=lambda repo_path, messages: self.root.after(0, self._on_speculation_ready, repo_path)
+        )
+    
+    def _on_speculation_ready(self, repo_path: str):
+        """Note a finished speculative message (called from main thread)"""
+        if repo_path == self.current_repo_path:
+            self.log("💭 Commit message prepared in the background")
+    
     def select_all_files(self):
         """Select all files in listbox"""
         self.files_listbox.select_set(0, tk.END)
@@ -455,15 +748,17 @@ class AICommit:
             messagebox.showwarning("Please Try Again", "File list refreshed. Please select files and try again.")
             return
         
-        self.set_status("Adding files...")
         self.log(f"➕ Adding {len(selected_indices)} files to stage...")
         
-        # Stage files
-        success_count, error_messages = self.git_manager.stage_files(
-            self.current_repo_path, self.raw_git_status, selected_indices, self.log
+        repo_path, status, indices = self.current_repo_path, self.raw_git_status, list(selected_indices)
+        self.run_git_task(
+            "Adding files",
+            lambda task: self.git_manager.stage_files(repo_path, status, indices, task.report),
+            on_done=lambda result: self._on_files_staged(*result)
         )
-        
-        # Show results
+    
+    def _on_files_staged(self, success_count: int, error_messages: List[str]):
+        """Report staging results (called from main thread)"""
         if success_count > 0:
             self.log(f"✅ Successfully staged {success_count} file(s)", "success")
             if not error_messages:
@@ -479,7 +774,7 @@ class AICommit:
                 messagebox.showerror("Error", "Failed to stage files. Check Activity Log for details.")
         
         self.set_status(UI_STRINGS.STATUS_READY)
-        self.root.after(500, self.load_changed_files)
+        self.load_changed_files()
     
     def auto_add_and_generate(self):
         """Auto add selected files then generate commit message"""
@@ -507,74 +802,340 @@ class AICommit:
             return
         
         # Auto stage files
-        total_staged = self.git_manager.auto_stage_files(
-            self.current_repo_path, self.raw_git_status, selected_indices, self.log
+        repo_path, status, indices = self.current_repo_path, self.raw_git_status, list(selected_indices)
+        self.run_git_task(
+            "Adding files",
+            lambda task: self.git_manager.auto_stage_files(repo_path, status, indices, task.report),
+            on_done=self._on_auto_staged
         )
-        
+    
+    def _on_auto_staged(self, total_staged: int):
+        """Generate once staging finished (called from main thread)"""
         if total_staged > 0:
             self.log(f"✅ Total {total_staged} files staged", "success")
-            self.root.after(200, self.generate_commit_message)
+            self.generate_commit_message()
         else:
             messagebox.showwarning("No Files", "No files were staged")
             self.set_status(UI_STRINGS.STATUS_READY)
     
-    def generate_commit_message(self):
-        """Generate commit message using AI"""
-        if self._is_generating:
+    def regenerate_commit_message(self):
+        """Generate a fresh commit message, bypassing the response cache"""
+        self.generate_commit_message(use_cache=False)
+    
+    def generate_commit_message(self, use_cache: bool = True, speculate: bool = True):
+        """Generate commit message using AI.
+
+        With ``speculate`` the message generated in the background for the
+        same staged changes is used when there is one.
+        """
+        if self._is_generating or self.git_tasks.active("diff"):
             return
     
         if not self.current_repo_path:
             messagebox.showwarning("No Repository", "Please select a repository first!")
             return
     
-        success, diff = self.git_manager.get_staged_diff(self.current_repo_path)
+        provider = self.ai_provider_var.get()
+        repo_path = self.current_repo_path
+        speculate = speculate and use_cache and self.settings_manager.get("speculative_generation", False)
+        
+        def collect(task: Task):
+            if speculate:
+                future = self.speculator.take(repo_path, provider)
+                if future is not None and not (future.done() and future.exception() is not None):
+                    return future, None, True, None
+            budget = self.ai_provider.plan_budget(provider)
+            success, diff = self.prompt_builder.build_with_settings(
+                repo_path, self.settings_manager,
+                max_bytes=budget.max_bytes, max_tokens=budget.prompt_tokens
+            )
+            return None, budget, success, diff
+        
+        self.set_status("Collecting staged changes...")
+        self.run_git_task(
+            "Collecting staged changes", collect, group="diff",
+            on_done=lambda result: self._start_generation(repo_path, provider, use_cache, *result)
+        )
+    
+    def _start_generation(self, repo_path: str, provider: str, use_cache: bool,
+                          future: Optional[Future], budget: Optional[PromptBudget],
+                          success: bool, diff: Optional[StagedDiff]):
+        """Generate for the collected diff (called from main thread)"""
+        self.set_status(UI_STRINGS.STATUS_READY)
+        if repo_path != self.current_repo_path or self._is_generating:
+            return
+        
+        if future is not None:
+            self._use_speculation(future, provider)
+            return
     
         # More defensive check
         if not success:
             messagebox.showwarning("Error", "Failed to get staged changes.")
             return
         
-        # Handle both None and empty string cases
-        if diff is None or (isinstance(diff, str) and not diff.strip()):
+        # Handle both None and empty diff cases
+        if diff is None or diff.is_empty():
             messagebox.showwarning("No Staged Changes", "No staged changes found. Please stage files first.")
             return
-    
-        provider = self.ai_provider_var.get()
+        
+        if provider == OFFLINE_PROVIDER:
+            self._update_message(self.ai_provider.generate_offline_message(diff))
+            return
+        
+        if diff.chunks:
+            self.log(f"🧩 Large diff: summarizing {len(diff.chunks)} file(s) before writing the message")
+        elif diff.truncated:
+            self.log(f"✂️ Diff budgeted for {budget.model} to {diff.bytes_read} bytes: {len(diff.partial_files)} file(s) cut, "
+                     f"{len(diff.omitted_files)} file(s) omitted from the prompt", "warning")
+        
+        count = self.settings_manager.get("candidate_count", 1)
+        if use_cache:
+            cached = self.ai_provider.get_cached_candidates(diff, provider, count)
+            if cached is not None:
+                stats = self.ai_provider.cache_stats()
+                self.log(f"⚡ Loaded cached message (cache hits {stats['hits']}, misses {stats['misses']})")
+                self._show_candidates(cached)
+                return
+        
         self.set_status(f"Generating message with {provider}...")
         self.log(f"🤖 Generating commit message with {provider}...")
     
         self._is_generating = True
+        cancel_event = threading.Event()
+        self._generation_cancel = cancel_event
+        self._update_action_state()
+        
+        # Instant local draft, replaced as soon as the model answers
+        self._placeholder_shown = False
+        if self.settings_manager.get("offline_placeholder", True):
+            draft = self.ai_provider.generate_offline_message(diff)
+            if draft:
+                self.message_text.delete(1.0, tk.END)
+                self.message_text.insert(1.0, draft)
+                self._placeholder_shown = True
+        
+        # Candidates arrive together, so only a single message is streamed
+        stream = self.settings_manager.get("stream_output", True) and count <= 1
+        if stream:
+            if not self._placeholder_shown:
+                self.message_text.delete(1.0, tk.END)
+            with self._stream_lock:
+                self._stream_buffer = []
+            self.root.after(STREAM_FLUSH_MS, self._flush_stream_text, cancel_event)
     
-        thread = threading.Thread(target=self._generate_message_thread, args=(diff, provider))
+        thread = threading.Thread(target=self._generate_message_thread,
+                                  args=(diff, provider, cancel_event, stream, count))
         thread.daemon = True
         thread.start()
     
-    def _generate_message_thread(self, diff: str, provider: str):
+    def _use_speculation(self, future: Future, provider: str):
+        """Show the speculative message for the staged changes, waiting if still running"""
+        if future.done():
+            try:
+                messages = future.result()
+            except Exception as e:
+                self._on_speculation_failed(e)
+                return
+            self.log("⚡ Loaded message generated in the background")
+            self._show_candidates(messages)
+            return
+        
+        self.set_status(f"Finishing background generation with {provider}...")
+        self.log("⏳ Waiting for the message already being generated in the background...")
+        self._is_generating = True
+        cancel_event = threading.Event()
+        self._generation_cancel = cancel_event
+        self._update_action_state()
+        
+        thread = threading.Thread(target=self._await_speculation_thread, args=(future, cancel_event))
+        thread.daemon = True
+        thread.start()
+    
+    def _await_speculation_thread(self, future: Future, cancel_event: threading.Event):
+        """Wait for a speculative request in a separate thread"""
+        while not cancel_event.is_set():
+            try:
+                messages = future.result(timeout=0.1)
+            except FutureTimeoutError:
+                continue
+            except Exception as e:
+                self.root.after(0, self._on_speculation_failed, e, cancel_event)
+                return
+            self.root.after(0, self._show_candidates, messages, cancel_event)
+            return
+        
+        self.speculator.cancel()
+        self.root.after(0, self._on_generation_cancelled, cancel_event)
+    
+    def _on_speculation_failed(self, error: Exception, cancel_event: Optional[threading.Event] = None):
+        """Report a failed background generation and generate afresh (called from main thread)"""
+        if cancel_event is not None:
+            if cancel_event is not self._generation_cancel or cancel_event.is_set():
+                return
+            self._finish_generation()
+        
+        # Let the next refresh speculate on the same staged entries again
+        self._speculated_staged = None
+        if isinstance(error, GenerationCancelled):
+            self.log("⏹️ Background generation was cancelled, generating again", "warning")
+        else:
+            self.log(f"❌ Background generation failed: {error}", "error")
+        self.generate_commit_message(speculate=False)
+    
+    def _generate_message_thread(self, diff: StagedDiff, provider: str,
+                                 cancel_event: threading.Event, stream: bool = False, count: int = 1):
         """Generate message in separate thread"""
+        on_token = None
+        if stream:
+            def on_token(text: str):
+                # Only buffer here; the main thread drains the buffer on a
+                # timer so bursts of tokens do not flood the Tk event loop
+                with self._stream_lock:
+                    if not cancel_event.is_set():
+                        self._stream_buffer.append(text)
+        
+        def on_progress(done: int, total: int):
+            self.root.after(0, self._show_summary_progress, done, total, cancel_event)
+        
+        def on_hedge_result(winner: str, report: dict):
+            self.root.after(0, self._log_hedge_result, winner, report)
+        
         try:
-            message = self.ai_provider.generate_commit_message(diff, provider)
-            self.root.after(0, self._update_message, message)
+            # The cache was already checked on the main thread
+            if count > 1:
+                messages = self.ai_provider.generate_candidates(
+                    diff, provider, count, use_cache=False,
+                    cancel_event=cancel_event, on_progress=on_progress
+                )
+                self.root.after(0, self._show_candidates, messages, cancel_event)
+                return
             
+            message = self.ai_provider.generate_commit_message(
+                diff, provider, use_cache=False, on_token=on_token,
+                cancel_event=cancel_event, on_progress=on_progress,
+                on_hedge_result=on_hedge_result
+            )
+            self.root.after(0, self._update_message, message, cancel_event)
+            
+        except GenerationCancelled:
+            self.root.after(0, self._on_generation_cancelled, cancel_event)
         except Exception as e:
-            self.root.after(0, self._show_error, str(e))
-        finally:
-            self.root.after(0, lambda: setattr(self, '_is_generating', False))
-            self.root.after(0, lambda: self.set_status(UI_STRINGS.STATUS_READY))
+            self.root.after(0, self._show_error, str(e), cancel_event)
+    
+    def _show_summary_progress(self, done: int, total: int, cancel_event: threading.Event):
+        """Show map-reduce progress in the status bar (called from main thread)"""
+        if cancel_event is not self._generation_cancel or cancel_event.is_set():
+            return
+        if done < total:
+            self.set_status(f"Summarizing changes... {done}/{total} files")
+        else:
+            self.set_status("Writing commit message from summaries...")
+    
+    def _log_hedge_result(self, winner: str, report: dict):
+        """Log which provider answered first and how long each took (called from main thread)"""
+        parts = []
+        for name, result in report.items():
+            timings = []
+            if result["first_token"] is not None:
+                timings.append(f"first token {result['first_token']:.2f}s")
+            if result["total"] is not None:
+                timings.append(f"{'done' if result['status'] == 'won' else 'stopped'} {result['total']:.2f}s")
+            detail = f" ({', '.join(timings)})" if timings else ""
+            parts.append(f"{name} {result['status']}{detail}")
+        
+        if winner:
+            self.log(f"🏁 {winner} answered first: " + "; ".join(parts))
+        else:
+            self.log("🏁 No provider answered: " + "; ".join(parts), "warning")
+    
+    def _flush_stream_text(self, cancel_event: threading.Event):
+        """Append buffered stream tokens to the message box (called from main thread)"""
+        if cancel_event is not self._generation_cancel or cancel_event.is_set():
+            return
+        
+        with self._stream_lock:
+            text = "".join(self._stream_buffer)
+            self._stream_buffer = []
+        
+        if text:
+            if self._placeholder_shown:
+                self.message_text.delete(1.0, tk.END)
+                self._placeholder_shown = False
+            if self.message_text.get(1.0, tk.END).strip() == "":
+                self.log("✍️ Receiving response...")
+            self.message_text.insert(tk.END, text)
+            self.message_text.see(tk.END)
+        
+        if self._is_generating:
+            self.root.after(STREAM_FLUSH_MS, self._flush_stream_text, cancel_event)
+    
+    def cancel_generation(self):
+        """Abort the in-flight AI request, or else the pending git tasks"""
+        if self._is_generating and self._generation_cancel is not None:
+            self._generation_cancel.set()
+            self.log("⏹️ Cancelling generation...", "warning")
+            return
+        
+        tasks = self.git_tasks.active("write") + self.git_tasks.active("diff")
+        if tasks:
+            for task in tasks:
+                task.cancel()
+            self.log(f"⏹️ Cancelling {tasks[0].name.lower()}...", "warning")
+    
+    def _finish_generation(self):
+        """Reset generation state (called from main thread)"""
+        if self._placeholder_shown:
+            self.log("💡 Kept the offline draft message", "warning")
+            self._placeholder_shown = False
+        self._is_generating = False
+        self._generation_cancel = None
+        self._update_action_state()
+        self.set_status(UI_STRINGS.STATUS_READY)
     
-    def _update_message(self, message: str):
+    def _on_generation_cancelled(self, cancel_event: threading.Event):
+        """Handle a cancelled generation (called from main thread)"""
+        if cancel_event is not self._generation_cancel:
+            return
+        self.log("⏹️ Generation cancelled", "warning")
+        self._finish_generation()
+    
+    def _update_message(self, message: str, cancel_event: Optional[threading.Event] = None):
         """Update commit message (called from main thread)"""
+        if cancel_event is not None and (cancel_event is not self._generation_cancel or cancel_event.is_set()):
+            return
+        
+        self._placeholder_shown = False
         self.message_text.delete(1.0, tk.END)
         self.message_text.insert(1.0, message)
         self.log("✅ Commit message generated successfully", "success")
-        self._is_generating = False
-        self.set_status(UI_STRINGS.STATUS_READY)
+        if cancel_event is not None:
+            self._finish_generation()
+    
+    def _show_candidates(self, messages: List[str], cancel_event: Optional[threading.Event] = None):
+        """Show the first candidate and let the user pick another (called from main thread)"""
+        if cancel_event is not None and (cancel_event is not self._generation_cancel or cancel_event.is_set()):
+            return
+        
+        self._update_message(messages[0], cancel_event)
+        if len(messages) > 1:
+            self.log(f"🎯 {len(messages)} candidate messages to choose from")
+            CandidateDialog(self.root, messages, on_select=self._use_candidate)
+    
+    def _use_candidate(self, message: str):
+        """Replace the commit message with the picked candidate"""
+        self.message_text.delete(1.0, tk.END)
+        self.message_text.insert(1.0, message)
+        self.log("🎯 Using the selected candidate message")
     
-    def _show_error(self, error: str):
+    def _show_error(self, error: str, cancel_event: Optional[threading.Event] = None):
         """Show error message (called from main thread)"""
+        if cancel_event is not None and cancel_event is not self._generation_cancel:
+            return
+        
         self.log(f"❌ Error: {error}", "error")
         messagebox.showerror("Error", f"Failed to generate message:\n{error}")
-        self._is_generating = False
-        self.set_status(UI_STRINGS.STATUS_READY)
+        self._finish_generation()
     
     def clear_message(self):
         """Clear commit message"""
@@ -609,39 +1170,48 @@ class AICommit:
             if not response:
                 return
         
-        self.set_status("Committing...")
         self.log(f"📝 Committing with message: {first_line[:50]}...")
         
-        # Commit changes
-        success, output = self.git_manager.commit_changes(self.current_repo_path, message)
+        repo_path = self.current_repo_path
+        push = push and self.auto_push.get()
+        
+        # Configure GitHub credentials if provided
+        github_username = self.settings_manager.get("github_username")
+        github_token = self.settings_manager.get("github_token")
+        
+        def commit(task: Task):
+            success, output = self.git_manager.commit_changes(repo_path, message)
+            if not success or not push:
+                return success, output, None, ""
+            task.report("✅ Commit successful!", "success")
+            # The push can be cancelled; the commit above cannot
+            pushed, push_output = self.git_manager.push_changes(
+                repo_path, github_username, github_token, task.report, task.cancel_event
+            )
+            return success, output, pushed, push_output
         
+        self.run_git_task(
+            "Pushing" if push else "Committing", commit,
+            on_done=lambda result: self._on_committed(*result)
+        )
+    
+    def _on_committed(self, success: bool, output: str, pushed: Optional[bool], push_output: str):
+        """Report commit and push results (called from main thread)"""
         if not success:
             self.log(f"❌ Commit failed: {output}", "error")
             messagebox.showerror("Commit Failed", f"Failed to commit:\n{output}")
             self.set_status(UI_STRINGS.STATUS_READY)
             return
         
-        self.log("✅ Commit successful!", "success")
-        
-        if push and self.auto_push.get():
-            self.set_status("Pushing...")
-            
-            # Configure GitHub credentials if provided
-            github_username = self.settings_manager.get("github_username")
-            github_token = self.settings_manager.get("github_token")
-            
-            # Push changes
-            success, output = self.git_manager.push_changes(
-                self.current_repo_path, github_username, github_token, self.log
-            )
-            
-            if success:
+        if pushed is not None:
+            if pushed:
                 self.log("✅ Push successful!", "success")
                 messagebox.showinfo("Success", "Commit and push completed successfully!")
             else:
-                self.log(f"❌ Push failed: {output}", "error")
-                messagebox.showerror("Push Failed", f"Commit successful but push failed:\n{output}")
+                self.log(f"❌ Push failed: {push_output}", "error")
+                messagebox.showerror("Push Failed", f"Commit successful but push failed:\n{push_output}")
         else:
+            self.log("✅ Commit successful!", "success")
             messagebox.showinfo("Success", "Commit completed successfully!")
         
         self.set_status(UI_STRINGS.STATUS_READY)
@@ -6,15 +6,17 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from pathlib import Path
 
+from src.core.ai_provider import HEDGE_MODES
 from src.core.settings_manager import GEMINI_MODELS, OPENAI_MODELS
 
 
 class SettingsDialog:
-    def __init__(self, parent, settings_manager):
+    def __init__(self, parent, settings_manager, on_save=None):
         self.settings_manager = settings_manager
+        self.on_save = on_save
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("⚙️ Settings")
-        self.dialog.geometry("600x500")
+        self.dialog.geometry("600x820")
         self.dialog.resizable(True, True)
         self.dialog.transient(parent)
         self.dialog.grab_set()
@@ -68,6 +70,40 @@ class SettingsDialog:
         self.openai_model.grid(row=1, column=1, padx=5, pady=2, sticky=tk.W)
         self.openai_model.set(self.settings_manager.get("openai_model", "gpt-4o-mini"))
         
+        ttk.Label(openai_frame, text="Base URL:").grid(row=2, column=0, sticky=tk.W, pady=2)
+        self.openai_base_url = ttk.Entry(openai_frame, width=50)
+        self.openai_base_url.grid(row=2, column=1, padx=5, pady=2, sticky=(tk.W, tk.E))
+        self.openai_base_url.insert(0, self.settings_manager.get("openai_base_url", ""))
+        
+        # Hedged requests across both providers
+        hedge_frame = ttk.LabelFrame(ai_frame, text="Hedging", padding="10")
+        hedge_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(hedge_frame, text="Mode:").grid(row=0, column=0, sticky=tk.W, pady=2)
+        self.hedge_mode = ttk.Combobox(hedge_frame, width=10, values=HEDGE_MODES, state="readonly")
+        self.hedge_mode.grid(row=0, column=1, padx=5, pady=2, sticky=tk.W)
+        self.hedge_mode.set(self.settings_manager.get("hedge_mode", "off"))
+        
+        ttk.Label(hedge_frame, text="Delay (s):").grid(row=1, column=0, sticky=tk.W, pady=2)
+        self.hedge_delay = tk.DoubleVar(value=self.settings_manager.get("hedge_delay", 2.0))
+        ttk.Spinbox(hedge_frame, from_=0, to=30, increment=0.5, width=5, textvariable=self.hedge_delay).grid(row=1, column=1, padx=5, pady=2, sticky=tk.W)
+        
+        ttk.Label(hedge_frame, text="hedge: ask the other provider too if no answer after the delay\n"
+                                    "race: ask both at once; the first answer wins",
+                  justify=tk.LEFT, foreground="gray").grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=2)
+        
+        # Generation
+        generation_frame = ttk.LabelFrame(ai_frame, text="Generation", padding="10")
+        generation_frame.pack(fill=tk.X, pady=5)
+        
+        self.speculative_generation = tk.BooleanVar(value=self.settings_manager.get("speculative_generation", False))
+        ttk.Checkbutton(generation_frame, text="Start generating as soon as the staged files change",
+                        variable=self.speculative_generation).grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=2)
+        
+        ttk.Label(generation_frame, text="Candidates per request:").grid(row=1, column=0, sticky=tk.W, pady=2)
+        self.candidate_count = tk.IntVar(value=self.settings_manager.get("candidate_count", 1))
+        ttk.Spinbox(generation_frame, from_=1, to=5, width=5, textvariable=self.candidate_count).grid(row=1, column=1, padx=5, pady=2, sticky=tk.W)
+        
         # GitHub Settings Tab
         github_frame = ttk.Frame(notebook, padding="10")
         notebook.add(github_frame, text="🐙 GitHub")
@@ -123,6 +159,23 @@ class SettingsDialog:
         ttk.Button(recent_buttons, text="Remove", command=self.remove_recent).pack(side=tk.LEFT, padx=2)
         ttk.Button(recent_buttons, text="Clear All", command=self.clear_recent).pack(side=tk.LEFT, padx=2)
         
+        # Recursive scan options
+        scan_frame = ttk.LabelFrame(repo_frame, text="Scan", padding="10")
+        scan_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+        scan_frame.columnconfigure(1, weight=1)
+        
+        self.scan_recursive = tk.BooleanVar(value=self.settings_manager.get("scan_recursive", False))
+        ttk.Checkbutton(scan_frame, text="Scan subfolders recursively", variable=self.scan_recursive).grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=2)
+        
+        ttk.Label(scan_frame, text="Max Depth:").grid(row=1, column=0, sticky=tk.W, pady=2)
+        self.scan_max_depth = tk.IntVar(value=self.settings_manager.get("scan_max_depth", 3))
+        ttk.Spinbox(scan_frame, from_=1, to=10, width=5, textvariable=self.scan_max_depth).grid(row=1, column=1, padx=5, pady=2, sticky=tk.W)
+        
+        ttk.Label(scan_frame, text="Ignore Folders:").grid(row=2, column=0, sticky=tk.W, pady=2)
+        self.scan_ignore_dirs = ttk.Entry(scan_frame, width=50)
+        self.scan_ignore_dirs.grid(row=2, column=1, padx=5, pady=2, sticky=(tk.W, tk.E))
+        self.scan_ignore_dirs.insert(0, ", ".join(self.settings_manager.get("scan_ignore_dirs", [])))
+        
         # Configure grid weights
         repo_frame.columnconfigure(1, weight=1)
         repo_frame.rowconfigure(1, weight=1)
@@ -160,11 +213,18 @@ class SettingsDialog:
     def save_settings(self):
         """Save all settings"""
         try:
+            previous_settings = dict(self.settings_manager.settings)
+            
             # Save AI settings
             self.settings_manager.set("gemini_api_key", self.gemini_key.get().strip())
             self.settings_manager.set("openai_api_key", self.openai_key.get().strip())
             self.settings_manager.set("gemini_model", self.gemini_model.get())
             self.settings_manager.set("openai_model", self.openai_model.get())
+            self.settings_manager.set("openai_base_url", self.openai_base_url.get().strip())
+            self.settings_manager.set("hedge_mode", self.hedge_mode.get())
+            self.settings_manager.set("hedge_delay", max(0.0, self.hedge_delay.get()))
+            self.settings_manager.set("speculative_generation", self.speculative_generation.get())
+            self.settings_manager.set("candidate_count", min(5, max(1, self.candidate_count.get())))
             
             # Save GitHub settings
             self.settings_manager.set("github_username", self.github_username.get().strip())
@@ -172,6 +232,10 @@ class SettingsDialog:
             
             # Save repository settings
             self.settings_manager.set("parent_folder", self.parent_folder.get())
+            self.settings_manager.set("scan_recursive", self.scan_recursive.get())
+            self.settings_manager.set("scan_max_depth", max(1, self.scan_max_depth.get()))
+            ignore_dirs = [name.strip() for name in self.scan_ignore_dirs.get().split(",") if name.strip()]
+            self.settings_manager.set("scan_ignore_dirs", ignore_dirs)
             
             # Save recent repositories from listbox
             recent_repos = []
@@ -182,6 +246,8 @@ class SettingsDialog:
             if self.settings_manager.save_settings():
                 messagebox.showinfo("Success", "Settings saved successfully!")
                 self.dialog.destroy()
+                if self.on_save:
+                    self.on_save(previous_settings)
             else:
                 messagebox.showerror("Error", "Failed to save settings!")
                 
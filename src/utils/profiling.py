@@ -0,0 +1,49 @@
+"""
+Startup phase timing for AI Commit
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Tuple, Iterator
+
+# Provider SDK modules that should not be imported before the window shows
+SDK_MODULE_NAMES = ("openai", "google.generativeai")
+
+
+class StartupProfiler:
+    """Record how long each startup phase takes.
+
+    Phases are timed with ``phase`` as a context manager and reported in
+    the order they ran, together with the total since the profiler was
+    created (roughly process start for ``main.py``).
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def report(self, title: str = "Startup profile") -> str:
+        """Phase timings in milliseconds as a plain text table"""
+        width = max([len(name) for name, _ in self.phases] + [len("total")])
+        lines = [title]
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<{width}}  {seconds * 1000:8.1f} ms")
+        lines.append(f"  {'total':<{width}}  {self.elapsed() * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+
+def loaded_sdk_modules() -> List[str]:
+    """Provider SDK modules already imported in this process"""
+    return [name for name in SDK_MODULE_NAMES if name in sys.modules]
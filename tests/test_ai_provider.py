@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+from src.core.ai_provider import AIProvider, GenerationCancelled
+from src.core.response_cache import ResponseCache
+from src.core.settings_manager import SettingsManager
+from src.core.staged_diff import StagedDiff
+
+
+class FakeProvider(AIProvider):
+    """Answers from ``replies`` after ``delays`` seconds instead of calling an API"""
+
+    def __init__(self, settings_manager, replies, delays=None, **kwargs):
+        super().__init__(settings_manager, **kwargs)
+        self.replies = replies
+        self.delays = delays or {}
+        self.calls = []
+
+    def is_provider_ready(self, provider):
+        return provider in self.replies
+
+    def _complete(self, provider, prompt, max_tokens=None, on_token=None, cancel_event=None,
+                  kind="message"):
+        self.calls.append(provider)
+        if cancel_event is not None and cancel_event.wait(self.delays.get(provider, 0)):
+            raise GenerationCancelled("Generation cancelled")
+        reply = self.replies[provider]
+        if isinstance(reply, Exception):
+            raise reply
+        if on_token is not None:
+            on_token(reply)
+        return reply
+
+
+@pytest.fixture
+def settings(tmp_path):
+    return SettingsManager(str(tmp_path / "settings.json"))
+
+
+def hedge_results():
+    results = {}
+
+    def record(winner, report):
+        results["winner"] = winner
+        results["report"] = report
+
+    return results, record
+
+
+def test_hedging_is_off_by_default(settings):
+    ai = FakeProvider(settings, {"gemini": "feat: gemini", "chatgpt": "feat: openai"})
+    assert ai._complete_hedged("gemini", "prompt") == ("gemini", "feat: gemini")
+    assert ai.calls == ["gemini"]
+
+
+def test_fastest_provider_wins_the_race(settings):
+    settings.set("hedge_mode", "race")
+    ai = FakeProvider(settings, {"gemini": "feat: gemini", "chatgpt": "feat: openai"},
+                      delays={"gemini": 5})
+    results, record = hedge_results()
+
+    start = time.monotonic()
+    assert ai._complete_hedged("gemini", "prompt", on_hedge_result=record) == ("chatgpt", "feat: openai")
+    assert time.monotonic() - start < 2
+    assert results["winner"] == "chatgpt"
+    assert results["report"]["chatgpt"]["status"] == "won"
+    assert results["report"]["gemini"]["status"] == "cancelled"
+
+
+def test_hedge_waits_for_the_delay(settings):
+    settings.set("hedge_mode", "hedge")
+    settings.set("hedge_delay", 5.0)
+    ai = FakeProvider(settings, {"gemini": "feat: gemini", "chatgpt": "feat: openai"})
+    results, record = hedge_results()
+
+    assert ai._complete_hedged("gemini", "prompt", on_hedge_result=record) == ("gemini", "feat: gemini")
+    assert ai.calls == ["gemini"]
+    assert results["report"]["chatgpt"]["status"] == "not started"
+
+
+def test_failure_starts_the_partner_at_once(settings):
+    settings.set("hedge_mode", "hedge")
+    settings.set("hedge_delay", 30.0)
+    ai = FakeProvider(settings, {"gemini": ValueError("quota"), "chatgpt": "feat: openai"})
+    results, record = hedge_results()
+
+    start = time.monotonic()
+    assert ai._complete_hedged("gemini", "prompt", on_hedge_result=record) == ("chatgpt", "feat: openai")
+    assert time.monotonic() - start < 5
+    assert results["report"]["gemini"]["status"] == "failed"
+
+
+def test_every_attempt_failing_raises_the_primary_error(settings):
+    settings.set("hedge_mode", "race")
+    ai = FakeProvider(settings, {"gemini": ValueError("gemini down"), "chatgpt": ValueError("openai down")})
+    with pytest.raises(ValueError, match="gemini down"):
+        ai._complete_hedged("gemini", "prompt")
+
+
+def test_cancel_stops_both_attempts(settings):
+    settings.set("hedge_mode", "race")
+    ai = FakeProvider(settings, {"gemini": "feat: gemini", "chatgpt": "feat: openai"},
+                      delays={"gemini": 30, "chatgpt": 30})
+    cancel_event = threading.Event()
+    threading.Timer(0.05, cancel_event.set).start()
+    with pytest.raises(GenerationCancelled):
+        ai._complete_hedged("gemini", "prompt", cancel_event=cancel_event)
+
+
+def test_hedged_message_is_cached_for_the_winner(settings, tmp_path):
+    settings.set("hedge_mode", "race")
+    ai = FakeProvider(settings, {"gemini": "feat: gemini", "chatgpt": "feat: openai"},
+                      delays={"gemini": 5}, response_cache=ResponseCache(str(tmp_path / "cache")))
+    diff = StagedDiff(text="diff --git a/a.txt b/a.txt\n+x\n", files=["a.txt"])
+
+    assert ai.generate_commit_message(diff, "gemini") == "feat: openai"
+    assert ai.get_cached_message(diff, "gemini") is None
+    assert ai.get_cached_message(diff, "chatgpt") == "feat: openai"
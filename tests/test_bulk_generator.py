@@ -0,0 +1,161 @@
+import os
+import subprocess
+import threading
+import time
+
+import pytest
+
+from src.core.ai_provider import AIProvider
+from src.core.async_git import AsyncGitManager
+from src.core.bulk_generator import BulkGenerator, BulkItem
+from src.core.git_manager import GitManager
+from src.core.prompt_builder import PromptBuilder
+from src.core.settings_manager import SettingsManager
+
+
+def git(repo, *args) -> str:
+    result = subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                            cwd=repo, check=True, capture_output=True)
+    return result.stdout.decode()
+
+
+def write(repo, name, text="x\n"):
+    with open(os.path.join(repo, name), "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+class FakeProvider(AIProvider):
+    """Names the changed files instead of calling an API, tracking concurrency"""
+
+    def __init__(self, settings_manager, delay=0.0, fail=()):
+        super().__init__(settings_manager)
+        self.delay = delay
+        self.fail = fail
+        self.running = 0
+        self.peak = 0
+        self._count_lock = threading.Lock()
+
+    def _complete(self, provider, prompt, max_tokens=None, on_token=None, cancel_event=None,
+                  kind="message"):
+        with self._count_lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(self.delay)
+            for name in self.fail:
+                if name in prompt:
+                    raise ValueError(f"rejected {name}")
+            names = sorted(set(line.split(" b/")[-1] for line in prompt.splitlines()
+                               if line.startswith("diff --git ")))
+            return f"chore: update {', '.join(names)}"
+        finally:
+            with self._count_lock:
+                self.running -= 1
+
+
+def make_repo(parent, name):
+    path = os.path.join(parent, name)
+    os.makedirs(path)
+    git(path, "init", "-q")
+    # BulkGenerator.commit runs plain git commit
+    git(path, "config", "user.name", "test")
+    git(path, "config", "user.email", "test@example.com")
+    write(path, "seed.txt", "seed\n")
+    git(path, "add", "-A")
+    git(path, "commit", "-q", "-m", "initial")
+    return path
+
+
+@pytest.fixture
+def settings(tmp_path):
+    return SettingsManager(str(tmp_path / "settings.json"))
+
+
+@pytest.fixture
+def repos(tmp_path):
+    parent = str(tmp_path / "work")
+    paths = {}
+    for index in range(4):
+        name = f"repo{index}"
+        paths[name] = make_repo(parent, name)
+        write(paths[name], f"{name}.txt")
+    return paths
+
+
+def generator(settings, ai, git_manager=None):
+    git_manager = git_manager or GitManager()
+    return BulkGenerator(git_manager, PromptBuilder(git_manager), ai, settings)
+
+
+def items(repos):
+    return [BulkItem(name, path) for name, path in repos.items()]
+
+
+def test_only_staged_changes_are_used_by_default(settings, repos):
+    git(repos["repo0"], "add", "-A")
+    bulk_items = items(repos)
+    generator(settings, FakeProvider(settings)).run(bulk_items, "gemini")
+
+    states = {item.name: item.state for item in bulk_items}
+    assert states == {"repo0": "ready", "repo1": "skipped", "repo2": "skipped", "repo3": "skipped"}
+    assert bulk_items[0].message == "chore: update repo0.txt"
+    assert bulk_items[0].files == 1
+    assert not bulk_items[1].accepted
+    assert git(repos["repo1"], "diff", "--cached", "--name-only") == ""
+
+
+@pytest.mark.parametrize("git_manager", [GitManager, AsyncGitManager])
+def test_stage_all_stages_untracked_files(settings, repos, git_manager):
+    bulk_items = items(repos)
+    updates = []
+    generator(settings, FakeProvider(settings), git_manager()).run(
+        bulk_items, "gemini", stage_all=True, on_update=lambda item: updates.append((item.name, item.state))
+    )
+
+    assert [item.state for item in bulk_items] == ["ready"] * 4
+    assert [item.message for item in bulk_items] == [f"chore: update repo{index}.txt" for index in range(4)]
+    assert ("repo2", "staging") in updates
+    assert updates.index(("repo2", "queued")) < updates.index(("repo2", "ready"))
+
+
+def test_ai_requests_are_bounded(settings, repos):
+    settings.set("bulk_ai_concurrency", 2)
+    ai = FakeProvider(settings, delay=0.1)
+    bulk_items = items(repos)
+    generator(settings, ai).run(bulk_items, "gemini", stage_all=True)
+
+    assert [item.state for item in bulk_items] == ["ready"] * 4
+    assert 1 <= ai.peak <= 2
+
+
+def test_failures_stay_with_their_repository(settings, repos):
+    bulk_items = items(repos)
+    generator(settings, FakeProvider(settings, fail=("repo1.txt",))).run(bulk_items, "gemini", stage_all=True)
+
+    assert [item.state for item in bulk_items] == ["ready", "failed", "ready", "ready"]
+    assert bulk_items[1].error == "rejected repo1.txt"
+
+
+def test_cancelled_run_generates_nothing(settings, repos):
+    cancel_event = threading.Event()
+    cancel_event.set()
+    bulk_items = items(repos)
+    generator(settings, FakeProvider(settings)).run(bulk_items, "gemini", stage_all=True,
+                                                    cancel_event=cancel_event)
+    assert [item.state for item in bulk_items] == ["cancelled"] * 4
+    assert git(repos["repo0"], "diff", "--cached", "--name-only") == ""
+
+
+def test_commit_uses_the_message(settings, repos):
+    bulk_items = items(repos)[:1]
+    bulk = generator(settings, FakeProvider(settings))
+    bulk.run(bulk_items, "gemini", stage_all=True)
+
+    assert bulk.commit(bulk_items[0])
+    assert bulk_items[0].state == "committed"
+    assert git(repos["repo0"], "log", "-1", "--format=%s").strip() == "chore: update repo0.txt"
+
+
+def test_items_for_changed_repositories():
+    repos = [{"name": "a", "path": "/a", "has_changes": True}, {"name": "b", "path": "/b", "has_changes": False}]
+    assert [item.name for item in BulkGenerator.items_for(repos)] == ["a"]
@@ -0,0 +1,184 @@
+import os
+import subprocess
+import time
+
+import pytest
+
+from src.core.fast_status import _IgnoreRules, _Undecided, check_worktree
+from src.core.git_index import IndexFormatError, index_entry_count, parse_index, read_index
+
+
+def git(repo, *args) -> str:
+    result = subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                            cwd=repo, check=True, capture_output=True)
+    return result.stdout.decode()
+
+
+def write(repo, name, text="x\n"):
+    path = os.path.join(repo, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def settle(repo):
+    """Move file times into the past and refresh the index, out of the racy-git window"""
+    past = time.time() - 60
+    for root, dirs, files in os.walk(repo):
+        dirs[:] = [d for d in dirs if d != ".git"]
+        for name in files:
+            os.utime(os.path.join(root, name), (past, past))
+    git(repo, "update-index", "-q", "--refresh")
+
+
+@pytest.fixture
+def repo(tmp_path):
+    path = str(tmp_path)
+    git(path, "init", "-q")
+    write(path, "a.txt")
+    write(path, "src/b.py")
+    write(path, ".gitignore", "*.log\nbuild/\n")
+    git(path, "add", "-A")
+    git(path, "commit", "-q", "-m", "initial")
+    settle(path)
+    return path
+
+
+def git_has_changes(repo) -> bool:
+    return bool(git(repo, "status", "--porcelain").strip())
+
+
+def test_clean_repository(repo):
+    assert check_worktree(repo).has_changes is False
+    assert git_has_changes(repo) is False
+
+
+@pytest.mark.parametrize("change,decided", [
+    ("modify", False),
+    ("delete", True),
+    ("stage", False),
+    ("ignored", True),
+    ("untracked", False),
+])
+def test_agrees_with_git_status(repo, change, decided):
+    if change == "modify":
+        write(repo, "a.txt", "changed\n")
+    elif change == "delete":
+        os.remove(os.path.join(repo, "src", "b.py"))
+    elif change == "stage":
+        write(repo, "a.txt", "staged\n")
+        git(repo, "add", "a.txt")
+        settle(repo)
+    elif change == "ignored":
+        write(repo, "debug.log")
+        write(repo, "build/out.o")
+    elif change == "untracked":
+        write(repo, "notes.txt")
+
+    # Changed stat data, an invalidated cache-tree and untracked files
+    # are left to git, which reads contents and the global excludes file
+    result = check_worktree(repo)
+    if decided:
+        assert result.has_changes is git_has_changes(repo)
+    else:
+        assert result.has_changes is None
+
+
+def test_large_index_is_left_to_git(repo):
+    result = check_worktree(repo, max_entries=1)
+    assert result.has_changes is None
+    assert result.reason == "large index"
+
+
+@pytest.mark.parametrize("version", [2, 3, 4])
+def test_index_reader_matches_ls_files(repo, version):
+    write(repo, "deep/ä path/with spaces.txt")
+    git(repo, "add", "-A")
+    if version == 3:
+        # git only writes version 3 while an entry needs extended flags
+        write(repo, "later.txt")
+        git(repo, "add", "-N", "later.txt")
+    else:
+        git(repo, "update-index", "--index-version", str(version))
+    index = read_index(os.path.join(repo, ".git", "index"))
+
+    assert index.version == version
+    assert [entry.path for entry in index.entries if entry.intent_to_add] == \
+        ([b"later.txt"] if version == 3 else [])
+    assert [entry.path for entry in index.entries] == git(repo, "ls-files", "-z").encode().split(b"\0")[:-1]
+    assert index_entry_count(os.path.join(repo, ".git", "index")) == len(index.entries)
+
+
+def test_cache_tree_tracks_head(repo):
+    index_path = os.path.join(repo, ".git", "index")
+    tree = git(repo, "rev-parse", "HEAD^{tree}").strip()
+    assert read_index(index_path).cached_root_tree().hex() == tree
+
+    write(repo, "a.txt", "staged\n")
+    git(repo, "add", "a.txt")
+    assert read_index(index_path).cached_root_tree() is None
+
+
+def test_corrupt_index_is_rejected(repo):
+    with open(os.path.join(repo, ".git", "index"), "rb") as f:
+        data = f.read()
+    with pytest.raises(IndexFormatError):
+        parse_index(b"NOPE" + data[4:])
+    with pytest.raises(IndexFormatError):
+        parse_index(data[:40] + data[-20:])
+    with pytest.raises(IndexFormatError):
+        parse_index(data[:-20] + b"junk" + data[-20:])
+
+
+IGNORE_CASES = [
+    ("x.log", False, True),
+    ("sub/x.log", False, True),
+    ("keep.log", False, False),
+    ("build", True, True),
+    ("sub/build", True, False),
+    ("node_modules", True, True),
+    ("node_modules", False, False),
+    ("sub/node_modules", True, True),
+    ("docs/a.md", False, True),
+    ("docs/sub/a.md", False, False),
+    ("cache", True, True),
+    ("x/y/cache", True, True),
+    ("logs/l.txt", False, True),
+    ("logs/a/b/l.txt", False, True),
+    ("abc", False, True),
+    ("a/c", False, False),
+    ("cat", False, True),
+    ("dat", False, False),
+]
+
+
+@pytest.mark.parametrize("path,is_dir,expected", IGNORE_CASES)
+def test_ignore_rules(tmp_path, path, is_dir, expected):
+    patterns = tmp_path / "gitignore"
+    patterns.write_text("*.log\n!keep.log\n/build\nnode_modules/\ndocs/*.md\n**/cache\n"
+                        "logs/**/*.txt\na?c\n[bc]at\n# comment\n\n")
+    rules = _IgnoreRules()
+    rules.stack.append(("", _IgnoreRules.parse(str(patterns))))
+    assert rules.ignored(path, is_dir) is expected
+
+
+def test_nested_ignore_rules(tmp_path):
+    (tmp_path / "root").write_text("*.tmp\n")
+    (tmp_path / "src").write_text("*.pyc\n/gen\n!keep.tmp\n")
+    rules = _IgnoreRules()
+    rules.stack.append(("", _IgnoreRules.parse(str(tmp_path / "root"))))
+    rules.stack.append(("src", _IgnoreRules.parse(str(tmp_path / "src"))))
+
+    assert rules.ignored("src/m.pyc", False)
+    assert rules.ignored("src/gen", True)
+    assert not rules.ignored("gen", True)
+    assert not rules.ignored("m.pyc", False)
+    assert rules.ignored("src/x.tmp", False)
+    assert not rules.ignored("src/keep.tmp", False)
+
+
+def test_escaped_patterns_are_undecided(tmp_path):
+    patterns = tmp_path / "gitignore"
+    patterns.write_text("\\#literal\n")
+    with pytest.raises(_Undecided):
+        _IgnoreRules.parse(str(patterns))
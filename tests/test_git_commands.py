@@ -0,0 +1,98 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from src.core.async_git import AsyncGitManager
+from src.core.git_manager import GitManager
+from src.core.git_status import display_path
+
+# Stands in for a git command that hangs (a slow remote, a huge diff)
+SLOW_COMMAND = [sys.executable, "-c", "import time; time.sleep(30)"]
+
+RAW_NAME = b"caf\xe9 menu.txt"
+
+
+def git(repo, *args) -> bytes:
+    result = subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                            cwd=repo, check=True, capture_output=True)
+    return result.stdout
+
+
+@pytest.fixture
+def repo(tmp_path):
+    path = str(tmp_path)
+    git(path, "init", "-q")
+    with open(os.path.join(path, "a.txt"), "w", encoding="utf-8") as f:
+        f.write("alpha\n")
+    git(path, "add", "-A")
+    git(path, "commit", "-q", "-m", "initial")
+    return path
+
+
+def test_output_is_returned_unchanged(repo):
+    success, output = GitManager().run_git_command_bytes(["git", "ls-files", "-z"], cwd=repo)
+    assert success
+    assert output == b"a.txt\0"
+
+
+def test_failure_returns_stderr(repo):
+    success, output = GitManager().run_git_command_bytes(["git", "rev-parse", "no-such-ref"], cwd=repo)
+    assert not success
+    assert b"no-such-ref" in output
+    assert GitManager().run_git_command(["git", "no-such-command"], cwd=repo)[0] is False
+
+
+def test_cancel_event_kills_the_command(repo):
+    cancel_event = threading.Event()
+    threading.Timer(0.1, cancel_event.set).start()
+    start = time.monotonic()
+    assert GitManager().run_git_command_bytes(SLOW_COMMAND, cwd=repo, cancel_event=cancel_event) == \
+        (False, b"Cancelled")
+    assert time.monotonic() - start < 5
+
+
+def test_input_is_passed_on_stdin(repo):
+    success, output = GitManager().run_git_command_bytes(["git", "hash-object", "--stdin"], cwd=repo,
+                                                          input=b"alpha\n")
+    assert success
+    assert output.strip() == git(repo, "rev-parse", "HEAD:a.txt").strip()
+
+
+@pytest.mark.skipif(sys.platform in ("win32", "darwin"), reason="needs byte file names")
+def test_undecodable_paths_are_staged(repo):
+    with open(os.path.join(os.fsencode(repo), RAW_NAME), "w", encoding="utf-8") as f:
+        f.write("menu\n")
+    manager = GitManager()
+    success, output = manager.get_status_bytes(repo)
+    assert success and RAW_NAME in output
+    status = manager.parse_git_status(output)
+    assert display_path(status[0].path) == "caf� menu.txt"
+
+    count, errors = manager.stage_files(repo, status, [0], lambda *args: None)
+    assert (count, errors) == (1, [])
+    assert git(repo, "diff", "--cached", "--name-only", "-z") == RAW_NAME + b"\0"
+
+
+def test_async_cancel_kills_the_command(repo):
+    async def cancel_soon():
+        task = asyncio.ensure_future(AsyncGitManager().run_git_command_bytes_async(SLOW_COMMAND, cwd=repo))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    start = time.monotonic()
+    asyncio.run(cancel_soon())
+    assert time.monotonic() - start < 5
+
+
+def test_async_timeout(repo):
+    success, output = asyncio.run(AsyncGitManager().run_git_command_bytes_async(SLOW_COMMAND, cwd=repo,
+                                                                                timeout=0.1))
+    assert not success
+    assert output == b"Command timed out after 0.1 seconds"
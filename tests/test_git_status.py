@@ -0,0 +1,86 @@
+import os
+import subprocess
+
+import pytest
+
+from src.core.git_manager import GitManager
+from src.core.git_status import display_path, parse_porcelain_v2, split_z
+
+SAMPLE = (
+    b"# branch.oid 0123456789abcdef0123456789abcdef01234567\0"
+    b"# branch.head main\0"
+    b"1 .M N... 100644 100644 100644 aaaaaaa bbbbbbb with space -> arrow.txt\0"
+    b"1 A. N... 000000 100644 100644 0000000 ccccccc caf\xc3\xa9.py\0"
+    b"2 R. N... 100644 100644 100644 ddddddd ddddddd R87 new name.py\0old \"name\".py\0"
+    b"u UU N... 100644 100644 100644 100644 e1 e2 e3 both.txt\0"
+    b"? untracked dir/\0"
+    b"? raw\xffname\0"
+    b"! ignored.log\0"
+)
+
+
+def test_parse_records():
+    status = parse_porcelain_v2(SAMPLE)
+    assert [(entry.kind, entry.xy, entry.path) for entry in status] == [
+        ("1", ".M", "with space -> arrow.txt"),
+        ("1", "A.", "café.py"),
+        ("2", "R.", "new name.py"),
+        ("u", "UU", "both.txt"),
+        ("?", "??", "untracked dir/"),
+        ("?", "??", os.fsdecode(b"raw\xffname")),
+        ("!", "!!", "ignored.log"),
+    ]
+
+    rename = status.get("new name.py")
+    assert rename.orig_path == 'old "name".py'
+    assert rename.score == 87 and rename.type == "renamed"
+    assert status.get("with space -> arrow.txt").status == "M"
+    assert status.get("both.txt").mode_index == "100644"
+
+
+def test_text_and_bytes_agree():
+    as_text = SAMPLE.decode("utf-8", errors="surrogateescape")
+    assert [repr(entry) for entry in parse_porcelain_v2(as_text)] == \
+        [repr(entry) for entry in parse_porcelain_v2(SAMPLE)]
+
+
+def test_truncated_records_are_skipped():
+    assert [entry.path for entry in parse_porcelain_v2(b"1 .M N... 100644\0? ok.txt")] == ["ok.txt"]
+
+
+def test_undecodable_paths_round_trip():
+    raw = b"dir/\xe9t\xe9.txt"
+    path, = split_z(raw + b"\0\0")
+    assert os.fsencode(path) == raw
+    assert display_path(path) == "dir/�t�.txt"
+
+
+@pytest.fixture
+def repo(tmp_path):
+    path = str(tmp_path)
+
+    def git(*args):
+        subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                       cwd=path, check=True, stdout=subprocess.DEVNULL)
+
+    for name in ("keep.txt", "old name.txt"):
+        with open(os.path.join(path, name), "w", encoding="utf-8") as f:
+            f.write("".join(f"line {i}\n" for i in range(20)))
+    git("init", "-q")
+    git("add", "-A")
+    git("commit", "-q", "-m", "initial")
+    git("mv", "old name.txt", "new -> name.txt")
+    with open(os.path.join(path, "keep.txt"), "a", encoding="utf-8") as f:
+        f.write("more\n")
+    with open(os.path.join(path, 'quote "me".txt'), "w", encoding="utf-8") as f:
+        f.write("x\n")
+    return path
+
+
+def test_get_status_from_git(repo):
+    success, output = GitManager().get_status_bytes(repo)
+    assert success
+    status = parse_porcelain_v2(output)
+    assert status.get("new -> name.txt").orig_path == "old name.txt"
+    assert status.get("keep.txt").xy == ".M"
+    assert status.get('quote "me".txt').kind == "?"
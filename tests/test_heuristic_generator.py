@@ -0,0 +1,110 @@
+import os
+import subprocess
+
+import pytest
+
+from src.core.git_manager import GitManager
+from src.core.git_status import parse_porcelain_v2
+from src.core.heuristic_generator import classify_role, generate_heuristic_message
+from src.core.prompt_builder import PromptBuilder
+from src.core.staged_diff import FileStat
+
+
+def git(repo, *args):
+    subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   cwd=repo, check=True, stdout=subprocess.DEVNULL)
+
+
+def write(repo, name, text):
+    path = os.path.join(repo, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(text)
+
+
+def lines(count, prefix="line"):
+    return "".join(f"{prefix} {i}\n" for i in range(count))
+
+
+@pytest.fixture
+def repo(tmp_path):
+    path = str(tmp_path)
+    git(path, "init", "-q")
+    write(path, "src/parser/lexer.py", lines(30))
+    write(path, "src/parser/tokens.py", lines(30, "token"))
+    write(path, "README.md", "# Project\n")
+    git(path, "add", "-A")
+    git(path, "commit", "-q", "-m", "initial")
+    return path
+
+
+def message(repo):
+    git(repo, "add", "-A")
+    success, diff = PromptBuilder(GitManager()).build(repo, 20000)
+    assert success
+    return generate_heuristic_message(diff.stats)
+
+
+def test_added_file(repo):
+    write(repo, "src/parser/ast.py", lines(40))
+    assert message(repo) == "feat(parser): add ast.py"
+
+
+def test_small_modification(repo):
+    write(repo, "src/parser/lexer.py", lines(30).replace("line 3\n", "line three\n"))
+    assert message(repo) == "fix(parser): update lexer.py"
+
+
+def test_deleted_file(repo):
+    os.remove(os.path.join(repo, "src", "parser", "tokens.py"))
+    assert message(repo) == "refactor(parser): remove tokens.py"
+
+
+def test_mixed_changes_list_every_file(repo):
+    write(repo, "src/parser/ast.py", lines(40))
+    os.remove(os.path.join(repo, "src", "parser", "tokens.py"))
+    write(repo, "README.md", "# Project\n\nUsage\n")
+    assert message(repo) == (
+        "feat(parser): add ast.py and 1 more file\n\n"
+        "- add src/parser/ast.py (+40 -0)\n"
+        "- remove src/parser/tokens.py (+0 -30)\n"
+        "- update README.md (+2 -0)"
+    )
+
+
+def test_docs_and_tests_set_the_type(repo):
+    write(repo, "README.md", "# Project\n\nUsage\n")
+    assert message(repo) == "docs(README): update README.md"
+    git(repo, "commit", "-q", "-m", "docs")
+    write(repo, "tests/test_lexer.py", lines(5))
+    assert message(repo) == "test(lexer): add test_lexer.py"
+
+
+def test_rename_is_a_move(repo):
+    git(repo, "mv", "src/parser/lexer.py", "src/lexer.py")
+    assert message(repo) == "refactor(lexer): move lexer.py"
+
+
+def test_status_is_used_without_stats():
+    status = parse_porcelain_v2(b"1 D. N... 100644 000000 000000 aaaaaaa 0000000 lib/old.py\0")
+    assert generate_heuristic_message([], status) == "refactor(old): remove old.py"
+    assert generate_heuristic_message([]) == ""
+
+
+def test_long_subjects_are_shortened():
+    stats = [FileStat(path=f"component_{'x' * 80}.py", added=5, change="added")]
+    subject = generate_heuristic_message(stats)
+    assert len(subject) == 72 and subject.endswith("...")
+
+
+@pytest.mark.parametrize("path,role", [
+    ("tests/unit/helpers.py", "test"),
+    ("src/widget.spec.ts", "test"),
+    ("docs/guide/intro.py", "docs"),
+    ("CHANGELOG", "docs"),
+    (".github/workflows/ci.py", "config"),
+    ("config/app.yaml", "config"),
+    ("src/app/main.py", "source"),
+])
+def test_classify_role(path, role):
+    assert classify_role(path) == role
@@ -0,0 +1,62 @@
+import json
+import os
+
+import pytest
+
+from src.core.metrics import MetricsRecorder, RequestRecord, percentile
+
+
+def test_nearest_rank_percentile():
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 1.0) == 100
+    assert percentile(values, 0.0) == 1
+    assert percentile([3.0, 1.0, 2.0], 0.5) == 2
+    assert percentile([], 0.5) is None
+
+
+def test_summary_per_provider_model_and_kind():
+    metrics = MetricsRecorder()
+    for latency in range(1, 21):
+        metrics.record(RequestRecord("gemini", "gemini-2.5-flash", latency=float(latency), ttft=latency / 10))
+    metrics.record(RequestRecord("gemini", "gemini-2.5-flash", latency=99.0, status="error", retries=2))
+    metrics.record(RequestRecord("gemini", "gemini-2.5-flash", latency=99.0, status="cancelled"))
+    metrics.record(RequestRecord("gemini", "gemini-2.5-flash", cache_hit=True))
+    metrics.record(RequestRecord("gemini", "gemini-2.5-flash", kind="summary", latency=0.5))
+
+    summary = metrics.summary()
+    message = summary[("gemini", "gemini-2.5-flash", "message")]
+    assert (message["requests"], message["errors"], message["retries"], message["cache_hits"]) == (22, 1, 2, 1)
+    # Failed and cancelled requests stay out of the latency percentiles
+    assert message["p50"] == 10 and message["p95"] == 19
+    assert message["ttft_p50"] == pytest.approx(1.0)
+    assert summary[("gemini", "gemini-2.5-flash", "summary")]["p50"] == 0.5
+
+
+def test_window_keeps_recent_requests():
+    metrics = MetricsRecorder(window=10)
+    for latency in range(100):
+        metrics.record(RequestRecord("chatgpt", "gpt-4o-mini", latency=float(latency)))
+    summary = metrics.summary()[("chatgpt", "gpt-4o-mini", "message")]
+    assert summary["requests"] == 100
+    assert summary["p50"] == 94
+    assert summary["ttft_p50"] is None
+
+    metrics.reset()
+    assert metrics.summary() == {}
+
+
+def test_log_is_written_and_rotated(tmp_path):
+    log_file = str(tmp_path / "logs" / "ai_metrics.jsonl")
+    metrics = MetricsRecorder(log_file, max_bytes=1000, backup_count=2)
+    for index in range(20):
+        metrics.record(RequestRecord("gemini", "gemini-2.5-flash", latency=float(index)))
+
+    with open(log_file, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert records[-1]["latency"] == 19.0
+    assert records[-1]["provider"] == "gemini"
+    assert os.path.exists(f"{log_file}.1") and os.path.exists(f"{log_file}.2")
+    assert not os.path.exists(f"{log_file}.3")
+    assert all(os.path.getsize(path) <= 1000 for path in (log_file, f"{log_file}.1", f"{log_file}.2"))
@@ -0,0 +1,64 @@
+import pytest
+
+from src.core.ai_provider import AIProvider
+from src.core.model_catalog import (
+    BYTES_PER_TOKEN, DEFAULT_CAPABILITIES, MESSAGE_OUTPUT_TOKENS, REASONING_OUTPUT_TOKENS,
+    TIER_PROMPT_TOKENS, estimate_tokens, get_capabilities, plan_prompt_budget
+)
+from src.core.settings_manager import SettingsManager
+
+
+def test_dated_and_suffixed_names_match_the_longest_prefix():
+    assert get_capabilities("gpt-4o-mini-2024-07-18") is get_capabilities("gpt-4o-mini")
+    assert get_capabilities("gpt-4o-2024-08-06") is get_capabilities("gpt-4o")
+    assert get_capabilities("o3-mini-high") is not get_capabilities("o3-mini")
+    assert get_capabilities("my-local-model") is DEFAULT_CAPABILITIES
+
+
+def test_token_estimate_errs_high():
+    assert estimate_tokens("") == 0
+    # Real tokenizers count about 9 tokens here
+    assert estimate_tokens("def add(a, b):\n    return a + b\n") >= 9
+    assert estimate_tokens("naïve café") > estimate_tokens("naive cafe")
+
+
+def test_tier_caps_the_prompt():
+    lite = plan_prompt_budget("gemini-2.5-flash-lite", fraction=0.5)
+    large = plan_prompt_budget("gemini-2.5-pro", fraction=0.5)
+    assert lite.prompt_tokens == TIER_PROMPT_TOKENS["lite"]
+    assert large.prompt_tokens == TIER_PROMPT_TOKENS["large"]
+    assert lite.max_bytes == lite.prompt_tokens * BYTES_PER_TOKEN
+
+
+def test_small_windows_use_the_fraction():
+    budget = plan_prompt_budget("gpt-4", fraction=0.1, overhead_tokens=100)
+    assert budget.prompt_tokens == int((8_192 - MESSAGE_OUTPUT_TOKENS - 100) * 0.1)
+    assert plan_prompt_budget("gpt-4", fraction=0.0001).prompt_tokens == 256
+    assert plan_prompt_budget("gpt-4o", max_prompt_tokens=1000).prompt_tokens == 1000
+
+
+def test_reasoning_models_get_room_to_think():
+    assert plan_prompt_budget("o3-mini").max_output_tokens == REASONING_OUTPUT_TOKENS
+    assert plan_prompt_budget("gpt-4o-mini").max_output_tokens == MESSAGE_OUTPUT_TOKENS
+
+
+@pytest.fixture
+def ai(tmp_path):
+    return AIProvider(SettingsManager(str(tmp_path / "settings.json")))
+
+
+def test_fixed_budget_is_the_default(ai):
+    ai.settings_manager.set("diff_max_bytes", 5000)
+    budget = ai.plan_budget("chatgpt")
+    assert budget.max_bytes == 5000
+    assert budget.prompt_tokens == 0
+    assert budget.model == "gpt-4o-mini"
+
+
+def test_model_budget_follows_the_model(ai):
+    ai.settings_manager.set("prompt_budget_mode", "model")
+    ai.settings_manager.set("gemini_model", "gemini-2.5-pro")
+    budget = ai.plan_budget("gemini")
+    assert budget.prompt_tokens == TIER_PROMPT_TOKENS["large"]
+    assert budget.max_bytes == budget.prompt_tokens * BYTES_PER_TOKEN
+    assert budget.max_output_tokens == REASONING_OUTPUT_TOKENS
@@ -0,0 +1,95 @@
+import os
+import subprocess
+
+import pytest
+
+from src.core.git_manager import GitManager
+from src.core.prompt_builder import PromptBuilder, parse_numstat
+
+
+def git(repo, *args):
+    subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   cwd=repo, check=True, stdout=subprocess.DEVNULL)
+
+
+def write(repo, name, text):
+    with open(os.path.join(repo, name), "w", encoding="utf-8", newline="\n") as f:
+        f.write(text)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    path = str(tmp_path)
+    git(path, "init", "-q")
+    write(path, "a.txt", "alpha\n")
+    write(path, "m.txt", "".join(f"line {i}\n" for i in range(40)))
+    write(path, "z.txt", "zulu\n")
+    git(path, "add", "-A")
+    git(path, "commit", "-q", "-m", "initial")
+    return path
+
+
+def build(repo, max_bytes=20000):
+    success, diff = PromptBuilder(GitManager()).build(repo, max_bytes)
+    assert success
+    return diff
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink") or os.name == "nt", reason="needs symlinks")
+def test_typechange_keeps_following_files(repo):
+    os.remove(os.path.join(repo, "a.txt"))
+    os.symlink("m.txt", os.path.join(repo, "a.txt"))
+    write(repo, "z.txt", "zulu\nyankee\n")
+    git(repo, "add", "-A")
+
+    diff = build(repo)
+    assert "+yankee" in diff.text
+    # Deletion and addition of the type change end up in one section
+    assert diff.text.count("diff --git a/a.txt b/a.txt") == 2
+    assert diff.text.index("+m.txt") < diff.text.index("diff --git a/z.txt")
+    assert diff.partial_files == []
+
+
+def test_rename_with_edit_is_matched_by_path(repo):
+    git(repo, "mv", "m.txt", "renamed.txt")
+    write(repo, "renamed.txt", "".join(f"line {i}\n" for i in range(39)) + "changed\n")
+    write(repo, "z.txt", "zulu\nyankee\n")
+    git(repo, "add", "-A")
+
+    diff = build(repo)
+    assert "diff --git a/m.txt b/renamed.txt" in diff.text
+    assert "+changed" in diff.text
+    assert "+yankee" in diff.text
+
+
+def test_quoted_paths_are_matched(repo):
+    name = 'say "hi"\tnow.txt' if os.name != "nt" else "say hi now.txt"
+    write(repo, name, "hello\n")
+    write(repo, "z.txt", "zulu\nyankee\n")
+    git(repo, "add", "-A")
+
+    diff = build(repo)
+    assert "+hello" in diff.text
+    assert "+yankee" in diff.text
+
+
+def test_sections_are_cut_per_file(repo):
+    write(repo, "m.txt", "".join(f"changed line {i}\n" for i in range(400)))
+    write(repo, "z.txt", "".join(f"zulu {i}\n" for i in range(100)))
+    git(repo, "add", "-A")
+
+    diff = build(repo, max_bytes=4000)
+    assert diff.partial_files == ["m.txt", "z.txt"]
+    assert diff.text.count("lines not shown") + diff.text.count("line(s) not shown") == 2
+    assert len(diff.text.encode()) <= 4000 + 100
+
+
+def test_parse_numstat_renames_and_binary():
+    output = (b":100644 100644 1111111 2222222 R090\0old.py\0new.py\0"
+              b":100644 100644 3333333 4444444 M\0logo.png\0"
+              b"3\t1\t\0old.py\0new.py\0"
+              b"-\t-\tlogo.png\0")
+    rename, image = parse_numstat(output)
+    assert (rename.path, rename.old_path, rename.added, rename.deleted) == ("new.py", "old.py", 3, 1)
+    assert rename.change == "renamed"
+    assert image.binary and image.category == "binary"
@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from src.core.rate_limiter import (
+    RequestCancelled, RequestScheduler, TokenBucket, is_retryable, retry_after_seconds
+)
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"headers": headers or {}})()
+
+
+def test_token_bucket_refills_per_minute():
+    bucket = TokenBucket(60)
+    # Pin the clock so elapsed times are exact
+    start = bucket.updated = 1000.0
+    bucket.take(60)
+    assert bucket.wait_time(1, start) == pytest.approx(1.0)
+    assert bucket.wait_time(1, start + 1) == 0
+    # Larger than the bucket: admitted once it is full, leaving it in debt
+    assert bucket.wait_time(120, start + 60) == 0
+    assert TokenBucket(0).wait_time(10 ** 9, start) == 0
+
+
+def test_retry_after_headers():
+    assert retry_after_seconds(ProviderError(429, {"retry-after": "3"})) == 3
+    assert retry_after_seconds(ProviderError(429, {"retry-after-ms": "250"})) == 0.25
+    assert retry_after_seconds(ProviderError(429)) is None
+
+
+def test_retryable_errors():
+    assert is_retryable(ProviderError(429))
+    assert is_retryable(ProviderError(503))
+    assert not is_retryable(ProviderError(400))
+    assert not is_retryable(ValueError("bad request"))
+
+
+def test_transient_errors_are_retried():
+    scheduler = RequestScheduler(max_retries=3, base_delay=0.001, max_delay=0.001)
+    calls = []
+
+    def call():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ProviderError(503)
+        return "ok"
+
+    assert scheduler.run("gemini", call) == "ok"
+    assert len(calls) == 3
+    assert scheduler.stats()["retries"] == 2
+
+
+def test_permanent_errors_are_not_retried():
+    scheduler = RequestScheduler(max_retries=3, base_delay=0.001)
+    calls = []
+
+    def call():
+        calls.append(1)
+        raise ProviderError(400)
+
+    with pytest.raises(ProviderError):
+        scheduler.run("gemini", call)
+    assert len(calls) == 1
+
+
+def test_requests_are_spaced_by_rpm():
+    scheduler = RequestScheduler()
+    scheduler.set_limits("openai", requests_per_minute=600)
+    scheduler._limits["openai"].requests.tokens = 0
+
+    start = time.monotonic()
+    for _ in range(3):
+        assert scheduler.acquire("openai")
+    # 600 rpm admits one request every 0.1 s once the bucket is empty
+    assert time.monotonic() - start >= 0.25
+
+
+def test_cancel_while_queued():
+    scheduler = RequestScheduler()
+    scheduler.pause("gemini", 30)
+    cancel_event = threading.Event()
+    threading.Timer(0.05, cancel_event.set).start()
+
+    start = time.monotonic()
+    with pytest.raises(RequestCancelled):
+        scheduler.run("gemini", lambda: "never", cancel_event=cancel_event)
+    assert time.monotonic() - start < 5
+    assert scheduler.stats()["waiting"] == 0
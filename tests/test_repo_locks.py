@@ -0,0 +1,154 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.core.async_git import AsyncGitManager
+from src.core.repo_locks import RepoLock, RepoLockRegistry
+
+
+class RecordingGitManager(AsyncGitManager):
+    """Records when each git command starts and ends instead of running it"""
+
+    def __init__(self):
+        super().__init__(locks=RepoLockRegistry())
+        self.events = []
+
+    async def run_git_command_bytes_async(self, command, cwd=None, input=None, timeout=None):
+        self.events.append(f"{command[1]} in")
+        await asyncio.sleep(0.05)
+        self.events.append(f"{command[1]} out")
+        return True, b""
+
+
+def test_async_write_excludes_reads_on_one_loop(tmp_path):
+    manager = RecordingGitManager()
+
+    async def main():
+        write = asyncio.ensure_future(manager.run_git_write_async(["git", "commit"], cwd=str(tmp_path)))
+        await asyncio.sleep(0.01)
+        await asyncio.gather(
+            write,
+            manager.run_git_read_async(["git", "status"], cwd=str(tmp_path)),
+            manager.run_git_read_async(["git", "log"], cwd=str(tmp_path)),
+        )
+
+    asyncio.run(main())
+    assert manager.events[:2] == ["commit in", "commit out"]
+    # The two reads overlap each other
+    assert sorted(manager.events[2:4]) == ["log in", "status in"]
+
+
+def test_async_write_waits_for_reader_task():
+    lock = RepoLock()
+    events = []
+
+    async def reader():
+        async with lock.read_async():
+            events.append("R in")
+            await asyncio.sleep(0.05)
+            events.append("R out")
+
+    async def writer():
+        await asyncio.sleep(0.01)
+        async with lock.write_async():
+            events.append("W in")
+
+    async def main():
+        await asyncio.gather(reader(), writer())
+
+    asyncio.run(main())
+    assert events == ["R in", "R out", "W in"]
+
+
+def test_async_read_waits_for_thread_writer():
+    lock = RepoLock()
+    events = []
+    holding = threading.Event()
+
+    def writer():
+        with lock.write():
+            holding.set()
+            time.sleep(0.05)
+            events.append("W out")
+
+    async def reader():
+        async with lock.read_async():
+            events.append("R in")
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    holding.wait()
+    asyncio.run(reader())
+    thread.join()
+    assert events == ["W out", "R in"]
+
+
+def test_cancelled_async_writer_lets_readers_in():
+    lock = RepoLock()
+    events = []
+
+    async def main():
+        async with lock.read_async():
+            writer = asyncio.ensure_future(lock.write_async().__aenter__())
+            await asyncio.sleep(0.01)
+            writer.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await writer
+
+        async with lock.read_async():
+            events.append("R in")
+
+    asyncio.run(asyncio.wait_for(main(), 1))
+    assert events == ["R in"]
+
+
+def test_thread_nesting_and_upgrade():
+    lock = RepoLock()
+    with lock.write():
+        with lock.read():
+            with lock.write():
+                pass
+    with lock.read():
+        with lock.read():
+            pass
+        with pytest.raises(RuntimeError):
+            with lock.write():
+                pass
+
+
+def test_waiting_writer_blocks_new_readers():
+    lock = RepoLock()
+    events = []
+    reading = threading.Event()
+    release = threading.Event()
+
+    def first_reader():
+        with lock.read():
+            reading.set()
+            release.wait()
+            events.append("R1 out")
+
+    def writer():
+        with lock.write():
+            events.append("W in")
+
+    def second_reader():
+        with lock.read():
+            events.append("R2 in")
+
+    threads = [threading.Thread(target=first_reader)]
+    threads[0].start()
+    reading.wait()
+    threads.append(threading.Thread(target=writer))
+    threads[1].start()
+    while not lock._waiting_writers:
+        time.sleep(0.001)
+    threads.append(threading.Thread(target=second_reader))
+    threads[2].start()
+    time.sleep(0.02)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert events == ["R1 out", "W in", "R2 in"]
@@ -0,0 +1,56 @@
+import json
+import os
+import time
+
+from src.core.response_cache import ResponseCache
+
+
+def test_equivalent_diffs_share_a_key(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    key = cache.make_key("+a  \r\n-b\n", "gemini", "gemini-2.5-flash", "v1")
+    assert key == cache.make_key("+a\n-b", "gemini", "gemini-2.5-flash", "v1")
+    assert key != cache.make_key("+a\n-b", "openai", "gemini-2.5-flash", "v1")
+    assert key != cache.make_key("+a\n-b", "gemini", "gemini-2.5-flash", "v2")
+
+
+def test_values_persist_across_instances(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put("k", {"messages": ["feat: add x"]})
+    assert cache.get("k") == {"messages": ["feat: add x"]}
+    assert cache.get("missing") is None
+    assert ResponseCache(str(tmp_path)).get("k") == {"messages": ["feat: add x"]}
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_is_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_entries=2)
+    cache.put("a", "first")
+    time.sleep(0.01)
+    cache.put("b", "second")
+    time.sleep(0.01)
+    assert cache.get("a") == "first"
+    time.sleep(0.01)
+    cache.put("c", "third")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "first" and cache.get("c") == "third"
+    assert not os.path.exists(os.path.join(str(tmp_path), "b.json"))
+
+
+def test_expired_entries_are_not_returned(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_age=60)
+    cache.put("k", "old")
+    path = os.path.join(str(tmp_path), "k.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"created": time.time() - 120, "value": "old"}, f)
+    assert cache.get("k") is None
+    assert not os.path.exists(path)
+
+
+def test_corrupt_entries_are_dropped(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put("k", "value")
+    with open(os.path.join(str(tmp_path), "k.json"), "w", encoding="utf-8") as f:
+        f.write("{not json")
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
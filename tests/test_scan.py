@@ -0,0 +1,137 @@
+import os
+import subprocess
+import threading
+
+import pytest
+
+from src.core.git_manager import GitManager
+from src.core.status_cache import StatusCache
+
+
+def git(repo, *args):
+    subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   cwd=repo, check=True, stdout=subprocess.DEVNULL)
+
+
+def make_repo(parent, name, dirty=False):
+    path = os.path.join(parent, name)
+    os.makedirs(path)
+    git(path, "init", "-q")
+    with open(os.path.join(path, "a.txt"), "w", encoding="utf-8") as f:
+        f.write("alpha\n")
+    git(path, "add", "-A")
+    git(path, "commit", "-q", "-m", "initial")
+    if dirty:
+        with open(os.path.join(path, "a.txt"), "a", encoding="utf-8") as f:
+            f.write("more\n")
+    return path
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    parent = str(tmp_path / "work")
+    os.makedirs(parent)
+    for index in range(6):
+        make_repo(parent, f"repo{index}", dirty=index % 2 == 0)
+    os.makedirs(os.path.join(parent, "not-a-repo"))
+    return parent
+
+
+def test_scan_reports_every_repository(workspace):
+    seen = []
+    repos = GitManager().scan_repositories(workspace, on_repo=seen.append, max_workers=3)
+
+    assert [repo["name"] for repo in repos] == [f"repo{index}" for index in range(6)]
+    assert sorted(repo["name"] for repo in seen) == [repo["name"] for repo in repos]
+    assert [repo["has_changes"] for repo in repos] == [True, False] * 3
+    assert repos[0]["display_name"] == "🔴 repo0"
+    assert repos[1]["display_name"] == "⚪ repo1"
+
+
+def test_scan_callbacks_run_on_the_calling_thread(workspace):
+    threads = set()
+    GitManager().scan_repositories(workspace, on_repo=lambda repo: threads.add(threading.get_ident()))
+    assert threads == {threading.get_ident()}
+
+
+def test_cancelled_scan_stops_early(workspace):
+    cancel_event = threading.Event()
+    seen = []
+
+    def on_repo(repo):
+        seen.append(repo)
+        cancel_event.set()
+
+    repos = GitManager().scan_repositories(workspace, on_repo=on_repo, cancel_event=cancel_event,
+                                           max_workers=1)
+    assert len(repos) == len(seen) == 1
+
+
+def test_scan_reuses_the_status_cache(workspace, tmp_path):
+    cache = StatusCache(str(tmp_path / "status_cache.json"))
+    manager = GitManager(cache)
+    first = manager.scan_repositories(workspace)
+    assert len(cache.entries) == 6
+    assert os.path.exists(cache.cache_file)
+    assert manager.scan_repositories(workspace) == first
+    assert manager.scan_repositories(workspace, force_refresh=True) == first
+
+
+def test_missing_folder_scans_nothing(tmp_path):
+    assert GitManager().scan_repositories(str(tmp_path / "missing")) == []
+
+
+@pytest.fixture
+def tree(tmp_path):
+    parent = str(tmp_path / "tree")
+    os.makedirs(parent)
+    make_repo(parent, "top")
+    make_repo(parent, "group/nested")
+    make_repo(parent, "group/deeper/deepest")
+    make_repo(parent, "node_modules/package")
+    make_repo(parent, ".hidden/secret")
+    # A repository's own subdirectories are not searched
+    make_repo(parent, "top/vendored")
+    # Worktrees and submodules have a .git file instead of a directory
+    os.makedirs(os.path.join(parent, "linked"))
+    with open(os.path.join(parent, "linked", ".git"), "w", encoding="utf-8") as f:
+        f.write("gitdir: ../top/.git\n")
+    return parent
+
+
+def discover(parent, *args, **kwargs):
+    return [name for name, path in GitManager().discover_repositories(parent, *args, **kwargs)]
+
+
+def test_discovery_depth(tree):
+    assert discover(tree) == ["linked", "top"]
+    assert discover(tree, 2) == ["group/nested", "linked", "top"]
+    assert discover(tree, 3) == ["group/deeper/deepest", "group/nested", "linked", "top"]
+
+
+def test_discovery_ignore_list(tree):
+    assert "node_modules/package" not in discover(tree, 3)
+    assert "node_modules/package" in discover(tree, 3, ignore_dirs=[])
+    assert discover(tree, 3, ignore_dirs=["group"]) == ["linked", "node_modules/package", "top"]
+
+
+def test_discovery_paths_and_parent_repository(tree):
+    paths = dict(GitManager().discover_repositories(tree, 2))
+    assert paths["group/nested"] == os.path.join(tree, "group", "nested")
+    # The parent folder being a repository itself does not hide its children
+    git(tree, "init", "-q")
+    assert discover(tree) == ["linked", "top"]
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink") or os.name == "nt", reason="needs symlinks")
+def test_discovery_survives_symlink_loops(tree):
+    os.symlink(tree, os.path.join(tree, "group", "loop"))
+    names = discover(tree, 6)
+    assert names.count("group/nested") == 1
+    assert "top" in names
+
+
+def test_discovery_cancel(tree):
+    cancel_event = threading.Event()
+    cancel_event.set()
+    assert discover(tree, 3, cancel_event=cancel_event) == []
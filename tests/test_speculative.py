@@ -0,0 +1,105 @@
+import os
+import subprocess
+
+import pytest
+
+from src.core.ai_provider import AIProvider
+from src.core.git_manager import GitManager
+from src.core.git_status import parse_porcelain_v2
+from src.core.prompt_builder import PromptBuilder
+from src.core.settings_manager import SettingsManager
+from src.core.speculative import SpeculativeGenerator, staged_signature
+
+
+def git(repo, *args):
+    subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   cwd=repo, check=True, stdout=subprocess.DEVNULL)
+
+
+def write(repo, name, text):
+    with open(os.path.join(repo, name), "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+class FakeProvider(AIProvider):
+    def __init__(self, settings_manager):
+        super().__init__(settings_manager)
+        self.diffs = []
+
+    def is_provider_ready(self, provider):
+        return True
+
+    def generate_candidates(self, diff, provider, count=None, use_cache=True, cancel_event=None,
+                            on_progress=None):
+        self.diffs.append(diff.text)
+        return [f"feat: message {len(self.diffs)}"]
+
+
+@pytest.fixture
+def repo(tmp_path):
+    path = str(tmp_path / "repo")
+    os.makedirs(path)
+    git(path, "init", "-q")
+    write(path, "a.txt", "alpha\n")
+    git(path, "add", "-A")
+    git(path, "commit", "-q", "-m", "initial")
+    return path
+
+
+@pytest.fixture
+def speculator(tmp_path):
+    settings = SettingsManager(str(tmp_path / "settings.json"))
+    git_manager = GitManager()
+    return SpeculativeGenerator(git_manager, PromptBuilder(git_manager), FakeProvider(settings), settings)
+
+
+def test_staged_key_follows_the_index(repo, speculator):
+    assert speculator.staged_key(repo) is None
+
+    write(repo, "a.txt", "changed\n")
+    assert speculator.staged_key(repo) is None
+    git(repo, "add", "a.txt")
+    first = speculator.staged_key(repo)
+    assert first is not None
+
+    write(repo, "a.txt", "changed again\n")
+    assert speculator.staged_key(repo) == first
+    git(repo, "add", "a.txt")
+    assert speculator.staged_key(repo) not in (None, first)
+
+
+def test_staged_key_does_not_write_the_index(repo, speculator):
+    write(repo, "a.txt", "changed\n")
+    git(repo, "add", "a.txt")
+    index = os.path.join(repo, ".git", "index")
+    before = os.stat(index).st_mtime_ns
+
+    speculator.staged_key(repo)
+    assert os.stat(index).st_mtime_ns == before
+    assert not os.path.exists(index + ".lock")
+
+
+def test_take_returns_the_result_for_the_staged_content(repo, speculator):
+    write(repo, "a.txt", "changed\n")
+    git(repo, "add", "a.txt")
+    speculator._speculate(repo, "gemini", None)
+    future = speculator.take(repo, "gemini")
+    assert future.result(timeout=5) == ["feat: message 1"]
+
+    # Same content again is not generated twice
+    speculator._speculate(repo, "gemini", None)
+    assert len(speculator.ai_provider.diffs) == 1
+
+    write(repo, "a.txt", "different\n")
+    git(repo, "add", "a.txt")
+    assert speculator.take(repo, "gemini") is None
+
+
+def test_staged_signature_ignores_worktree_only_changes():
+    status = parse_porcelain_v2(
+        b"1 M. N... 100644 100644 100644 aaaaaaa bbbbbbb staged.txt\0"
+        b"1 .M N... 100644 100644 100644 aaaaaaa aaaaaaa edited.txt\0"
+        b"? new.txt\0"
+    )
+    assert staged_signature(status) == (("M.", "staged.txt", None, "100644"),)
+    assert staged_signature(parse_porcelain_v2(b"1 .M N... 100644 100644 100644 a a edited.txt\0")) == ()
@@ -0,0 +1,85 @@
+import os
+import subprocess
+
+import pytest
+
+from src.core.git_manager import GitManager
+from src.core.staged_diff import StagedDiff
+
+
+def git(repo, *args):
+    subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   cwd=repo, check=True, stdout=subprocess.DEVNULL)
+
+
+def write(repo, name, text):
+    with open(os.path.join(repo, name), "w", encoding="utf-8", newline="\n") as f:
+        f.write(text)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    path = str(tmp_path)
+    git(path, "init", "-q")
+    write(path, "seed.txt", "seed\n")
+    git(path, "add", "-A")
+    git(path, "commit", "-q", "-m", "initial")
+    for name in ("a.txt", "b.txt", "c.txt"):
+        write(path, name, "".join(f"{name} line {i}\n" for i in range(200)))
+    git(path, "add", "-A")
+    return path
+
+
+def test_small_diff_is_read_whole(repo):
+    success, diff = GitManager().read_staged_diff(repo, max_bytes=10 ** 6)
+    assert success
+    assert not diff.truncated
+    assert diff.files == ["a.txt", "b.txt", "c.txt"]
+    assert diff.text.endswith("+c.txt line 199")
+    assert diff.omitted_note() == ""
+
+
+def test_budget_stops_reading(repo):
+    success, diff = GitManager().read_staged_diff(repo, max_bytes=1000)
+    assert success and diff.truncated
+    assert diff.bytes_read <= 1000
+    # Cut back to a whole line
+    assert diff.text.splitlines()[-1].startswith("+a.txt line ")
+    assert diff.partial_files == ["a.txt"]
+    assert diff.omitted_files == ["b.txt", "c.txt"]
+    assert "2 more changed file(s) not shown: b.txt, c.txt" in diff.omitted_note()
+
+
+def test_budget_inside_a_later_file(repo):
+    full = GitManager().read_staged_diff(repo)[1]
+    offset = full.text.index("diff --git a/b.txt")
+    success, diff = GitManager().read_staged_diff(repo, max_bytes=offset + 400)
+    assert success and diff.truncated
+    assert diff.partial_files == ["b.txt"]
+    assert diff.omitted_files == ["c.txt"]
+
+
+def test_nothing_staged(tmp_path):
+    git(str(tmp_path), "init", "-q")
+    success, diff = GitManager().read_staged_diff(str(tmp_path), max_bytes=1000)
+    assert success
+    assert diff.is_empty() and diff.files == []
+
+
+def test_failure_is_reported(tmp_path):
+    assert GitManager().read_staged_diff(str(tmp_path / "missing"), max_bytes=1000) == (False, None)
+
+
+def test_stream_can_be_closed_early(repo):
+    stream = GitManager().stream_git_command(["git", "diff", "--cached"], cwd=repo, chunk_size=64)
+    assert next(stream).startswith(b"diff --git")
+    stream.close()
+    # The read lock is released with the stream
+    with GitManager().repo_lock(repo).write():
+        pass
+
+
+def test_omitted_note_limits_names():
+    diff = StagedDiff(text="x", truncated=True, bytes_read=10,
+                      omitted_files=[f"f{index}" for index in range(25)])
+    assert diff.omitted_note(max_names=3).endswith("f0, f1, f2 (+22 more)")
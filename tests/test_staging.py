@@ -0,0 +1,100 @@
+import os
+import subprocess
+
+import pytest
+
+from src.core.git_manager import GitManager
+
+
+def git(repo, *args) -> str:
+    result = subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                            cwd=repo, check=True, capture_output=True)
+    return result.stdout.decode()
+
+
+def write(repo, name, text="x\n"):
+    with open(os.path.join(repo, name), "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+class CountingGitManager(GitManager):
+    """Records every batched git add"""
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def _stage_pathspecs(self, repo_path, paths):
+        self.batches.append(list(paths))
+        return super()._stage_pathspecs(repo_path, paths)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    path = str(tmp_path)
+    git(path, "init", "-q")
+    write(path, "keep.txt")
+    write(path, "gone.txt", "gone\n")
+    write(path, "old name.txt", "".join(f"line {i}\n" for i in range(20)))
+    write(path, ".gitignore", "*.log\n")
+    git(path, "add", "-A")
+    git(path, "commit", "-q", "-m", "initial")
+    return path
+
+
+def status(manager, repo):
+    success, output = manager.get_status_bytes(repo)
+    assert success
+    return manager.parse_git_status(output)
+
+
+def staged(repo):
+    return git(repo, "diff", "--cached", "--name-status").splitlines()
+
+
+def test_selection_is_staged_in_one_call(repo):
+    write(repo, "keep.txt", "changed\n")
+    os.remove(os.path.join(repo, "gone.txt"))
+    os.rename(os.path.join(repo, "old name.txt"), os.path.join(repo, "new -> name.txt"))
+    for index in range(5):
+        write(repo, f"new {index}.txt", f"new {index}\n")
+    manager = CountingGitManager()
+    entries = status(manager, repo)
+    logged = []
+
+    count, errors = manager.stage_files(repo, entries, list(range(len(entries))),
+                                        lambda message, level="info": logged.append(message))
+    assert (count, errors) == (len(entries), [])
+    assert len(manager.batches) == 1
+    assert "D\tgone.txt" in staged(repo)
+    assert "M\tkeep.txt" in staged(repo)
+    assert "R100\told name.txt\tnew -> name.txt" in staged(repo)
+    assert any("Staged deletion: gone.txt" in message for message in logged)
+
+
+def test_failing_path_is_isolated_by_bisection(repo):
+    for index in range(8):
+        write(repo, f"new {index}.txt")
+    write(repo, "debug.log")
+    manager = CountingGitManager()
+    entries = status(manager, repo)
+    # Ignored files are not listed by status; select one anyway to make git add fail
+    entries.append(manager.parse_git_status(b"? debug.log\0")[0])
+    indices = list(range(len(entries)))
+    indices.insert(3, indices.pop())
+
+    count, errors = manager.stage_files(repo, entries, indices, lambda *args: None)
+    assert count == 8
+    assert errors == ["Failed to add debug.log"]
+    assert len(staged(repo)) == 8
+    # One failed batch, then halves: far fewer calls than one per file
+    assert len(manager.batches[0]) == 9
+    assert len(manager.batches) <= 1 + 2 * 4
+
+
+def test_missing_file_is_reported(repo):
+    manager = GitManager()
+    entries = manager.parse_git_status(b"? vanished.txt\0")
+    count, errors = manager.stage_files(repo, entries, [0], lambda *args: None)
+    assert count == 0
+    assert errors == ["File not found: vanished.txt"]
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import subprocess
+import time
+
+import pytest
+
+from src.core.async_git import AsyncGitManager
+from src.core.git_manager import GitManager
+from src.core.status_cache import StatusCache
+
+
+def git(repo, *args):
+    subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   cwd=repo, check=True, stdout=subprocess.DEVNULL)
+
+
+def write(repo, name, text="x\n"):
+    path = os.path.join(repo, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    path = str(tmp_path / "repo")
+    os.makedirs(path)
+    git(path, "init", "-q")
+    write(path, "a.txt")
+    write(path, "src/b.py")
+    git(path, "add", "-A")
+    git(path, "commit", "-q", "-m", "initial")
+    # Out of the racy-git window, so the index can vouch for a clean tree
+    past = time.time() - 60
+    for name in ("a.txt", "src/b.py"):
+        os.utime(os.path.join(path, name), (past, past))
+    git(path, "update-index", "-q", "--refresh")
+    return path
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return StatusCache(str(tmp_path / "status_cache.json"), max_age=600)
+
+
+def test_fingerprint_tracks_index_and_head(repo, cache):
+    fingerprint = cache.fingerprint(repo)
+    cache.put(repo, fingerprint, False)
+    assert cache.get(repo, cache.fingerprint(repo)) is False
+
+    write(repo, "a.txt", "staged\n")
+    git(repo, "add", "a.txt")
+    assert cache.get(repo, cache.fingerprint(repo)) is None
+    assert cache.get(repo, None) is None
+
+
+def test_expired_entries_are_ignored(repo, cache):
+    cache.put(repo, cache.fingerprint(repo), True)
+    cache.entries[os.path.abspath(repo)]["checked"] -= 601
+    assert cache.get(repo, cache.fingerprint(repo)) is None
+
+
+def test_entries_survive_a_restart(repo, cache):
+    cache.put(repo, cache.fingerprint(repo), True)
+    assert cache.save()
+    assert StatusCache(cache.cache_file).get(repo, cache.fingerprint(repo)) is True
+
+
+def test_cached_clean_result_is_confirmed(repo, cache):
+    manager = GitManager(cache)
+    assert manager.check_has_changes_cached(repo) is False
+    assert manager.check_has_changes_cached(repo) is False
+
+    # Not visible in the fingerprint: the index and root directory are untouched
+    write(repo, "src/b.py", "edited below the root\n")
+    assert cache.get(repo, cache.fingerprint(repo)) is False
+    assert manager.check_has_changes_cached(repo) is True
+    assert cache.get(repo, cache.fingerprint(repo)) is True
+
+
+def test_async_backend_confirms_cached_clean_result(repo, cache):
+    manager = AsyncGitManager(cache)
+    assert asyncio.run(manager.check_has_changes_async(repo)) is False
+    write(repo, "src/b.py", "edited below the root\n")
+    assert asyncio.run(manager.check_has_changes_async(repo)) is True
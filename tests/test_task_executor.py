@@ -0,0 +1,79 @@
+import threading
+import time
+
+import pytest
+
+from src.core.task_executor import TaskExecutor
+
+
+@pytest.fixture
+def executor():
+    executor = TaskExecutor(max_workers=1)
+    yield executor
+    executor.shutdown()
+
+
+def poll_until(executor, condition, timeout=5.0):
+    """Poll like the Tk timer does until ``condition()`` holds"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        executor.poll()
+        time.sleep(0.005)
+
+
+def test_callbacks_run_on_the_polling_thread(executor):
+    events = []
+    task = executor.submit(
+        "work", lambda task: (task.report("halfway"), threading.get_ident())[1],
+        on_done=lambda result: events.append(("done", result, threading.get_ident())),
+        on_progress=lambda message, level: events.append(("progress", message, threading.get_ident()))
+    )
+    poll_until(executor, lambda: not task.is_active)
+
+    me = threading.get_ident()
+    assert events[0] == ("progress", "halfway", me)
+    kind, worker, caller = events[1]
+    assert kind == "done" and worker != me and caller == me
+    assert task.state == "done" and task.progress == "halfway"
+
+
+def test_tasks_run_in_submission_order(executor):
+    order = []
+    tasks = [executor.submit(f"t{index}", lambda task, index=index: order.append(index)) for index in range(5)]
+    poll_until(executor, lambda: not any(task.is_active for task in tasks))
+    assert order == list(range(5))
+
+
+def test_errors_go_to_on_error(executor):
+    errors = []
+    task = executor.submit("boom", lambda task: 1 / 0, on_error=errors.append)
+    poll_until(executor, lambda: not task.is_active)
+    assert task.state == "failed"
+    assert isinstance(errors[0], ZeroDivisionError)
+
+
+def test_cancelled_tasks(executor):
+    release = threading.Event()
+    cancelled = []
+    running = executor.submit("running", lambda task: task.cancel_event.wait(5) and 1 / 0,
+                              on_cancelled=lambda: cancelled.append("running"))
+    queued = executor.submit("queued", lambda task: release.set(),
+                             on_cancelled=lambda: cancelled.append("queued"))
+
+    assert [task.name for task in executor.active()] == ["running", "queued"]
+    executor.cancel_all()
+    poll_until(executor, lambda: not running.is_active and not queued.is_active)
+    assert sorted(cancelled) == ["queued", "running"]
+    # A queued task that was cancelled never starts
+    assert not release.is_set()
+    assert executor.active() == []
+
+
+def test_active_by_group(executor):
+    gate = threading.Event()
+    executor.submit("status", lambda task: gate.wait(5), group="status")
+    executor.submit("diff", lambda task: None, group="diff")
+    assert [task.name for task in executor.active("diff")] == ["diff"]
+    gate.set()
+    poll_until(executor, lambda: not executor.active())